@@ -1,7 +1,55 @@
+import argparse
+import contextlib
+import sys
+
 from src.lexical_analyzer.lexical_analyzer import LexicalAnalyzer
 from src.symbol_table.symbol_table import SymbolTable
 from src.syntax_analyzer.syntax_analyzer import SyntaxAnalyzer
+from src.assembler.assembler import Assembler
+from src.assembler.object_format import MAX_REGISTERS, ObjectFile
+from src.code_generator.c_backend import CBackend
 from src.code_generator.code_generator_new import CodeGenerator
+from src.code_generator.cost_model import Schedule, schedule_length
+from src.code_generator.emitter import Emitter
+from src.code_generator.target import MIN_REGISTERS, Target, default_target
+from src.optimizer.pass_manager import OPTIMIZATION_LEVELS, PassManager
+from src.vm.vm import VirtualMachine
+
+
+# Text outputs are written through buffers of this many bytes
+OUTPUT_BUFFER = 1 << 16
+
+
+def open_input(input_path):
+    """The source to compile: a file, or standard input (a pipe, ...) for '-'."""
+    if input_path == "-":
+        return contextlib.nullcontext(sys.stdin)
+    return open(input_path, "r")
+
+
+def parse_lines(input_file, lexer, parser, tok_file, bracket_file):
+    """
+    Lex and parse the source line by line, writing each line's tokens and
+    bracket form as soon as it is read.
+
+    :return: Generator of one AST per non-blank line, None where parsing failed
+    """
+    for line_number, line in enumerate(input_file, 1):
+        if not line.strip():
+            continue
+        # lexical analysis
+        tokens = lexer.tokenize(line.strip(), line_number)
+        tok_file.write(" ".join(tokens) + "\n")
+
+        # syntax analysis
+        ast = None
+        try:
+            ast = parser.parse(line.strip())
+        except Exception as e:
+            print(f"Error in line {line_number}: {str(e)}")
+        if parser.last_output is not None:
+            bracket_file.write(parser.last_output + "\n")
+        yield ast
 
 
 def compile(
@@ -11,45 +59,108 @@ def compile(
     symbol_table_path,
     lexer,
     parser,
-    code_generator,
     assembly_output_file,
+    data_output_file=None,
+    pass_manager=None,
+    num_registers=None,
+    target=None,
+    c_output_file=None,
+    run=False,
+    object_output_file=None,
 ):
+    """
+    Compile the source at `input_path` ('-' for standard input) to every output.
+
+    Lines flow through lexing and parsing one at a time, and their tokens and
+    bracket forms go straight to buffered files; only the ASTs are kept, as
+    type inference, loops and functions need the whole program. Without
+    optimization passes the IR is then lowered and written out a statement
+    at a time (CodeGenerator.stream); the passes and the C backend work on
+    the whole IR, whose assembly is written as the emitter renders it. The
+    object file is assembled from the written assembly.
+    """
     try:
-        tokenized_output = []
         with (
-            open(input_path, "r") as input_file,
-            open(tok_output_path, "w") as output_file,
+            open_input(input_path) as input_file,
+            open(tok_output_path, "w", buffering=OUTPUT_BUFFER) as tok_file,
+            open(grammar_output_path, "w", buffering=OUTPUT_BUFFER) as bracket_file,
         ):
-            for line_number, line in enumerate(input_file, 1):
-                if line.strip():
-                    # lexical analysis
-                    tokens = lexer.tokenize(line.strip(), line_number)
-                    output_file.write(" ".join(tokens) + "\n")
-                    # tokenized_output.append(tokens)
-                    tokenized_output.append(
-                        " ".join(tokens)
-                    )  # Convert list to string ✅
-
-                    # syntax analysis
-                    try:
-                        ast = parser.parse(line.strip())
-                    except Exception as e:
-                        print(f"Error in line {line_number}: {str(e)}")
+            asts = list(parse_lines(input_file, lexer, parser, tok_file, bracket_file))
 
         lexer.save_symbol_table(symbol_table_path)
-        parser.save_parsed_output(grammar_output_path)
 
         symbol_table = lexer.get_symbol_table_as_dict()
-        parse_output = parser.get_parsed_output_as_str()
 
-        code_generator = CodeGenerator(symbol_table)
+        target = target if target is not None else default_target()
+        emitter = Emitter(num_registers, target=target)
+        if num_registers is None and (object_output_file is not None or run):
+            # Object files have byte-wide register fields
+            emitter.num_registers = MAX_REGISTERS
+        code_generator = CodeGenerator(
+            symbol_table,
+            pass_manager=pass_manager,
+            emitter=emitter,
+            target=target,
+        )
 
-        # print("parse_output: ", parse_output)
-        # print("tokenized_output: ", type(tokenized_output), len(tokenized_output))
-        # print(tokenized_output)
-        code_generator.generate(parse_output, tokenized_output)
+        optimized = pass_manager is not None and bool(pass_manager.passes)
+        with open(assembly_output_file, "w", buffering=OUTPUT_BUFFER) as assembly_file:
+            if optimized or c_output_file is not None:
+                code_generator.build(asts)
+                program = code_generator.program
+                count = program.count()
+                cycles = schedule_length(program.instructions, target)
+                for line in code_generator.assembly_lines():
+                    assembly_file.write(line + "\n")
+            else:
+                # Unoptimized code is written a statement at a time, never kept whole
+                count = 0
+                schedule = Schedule(target)
+                for instructions in code_generator.stream(asts):
+                    count += sum(1 for instruction in instructions if instruction.is_code)
+                    schedule.add(instructions)
+                    for line in emitter.statement_lines(instructions, code_generator.program.layout):
+                        assembly_file.write(line + "\n")
+                cycles = schedule.length
+        program = code_generator.program
 
-        code_generator.save_assembly(assembly_output_file)
+        if optimized:
+            print("Optimization passes:")
+            for line in pass_manager.report():
+                print(f"  {line}")
+
+        if code_generator.spilled:
+            print(
+                f"Spilled {code_generator.spilled} values to memory to fit "
+                f"{emitter.num_registers} registers"
+            )
+        print(f"Target {target.name}: {count} instructions, {cycles} modeled cycles")
+
+        if data_output_file is not None:
+            program.layout.save(data_output_file)
+
+        if c_output_file is not None:
+            c_backend = CBackend()
+            c_backend.translate(code_generator.program)
+            c_backend.save(c_output_file)
+
+        if object_output_file is not None or run:
+            assembler = Assembler()
+            with open(assembly_output_file, "r") as assembly_file:
+                lines = (line.rstrip("\n") for line in assembly_file)
+                data = assembler.assemble(lines, program.layout)
+            if object_output_file is not None:
+                assembler.save(object_output_file)
+
+        if run:
+            vm = VirtualMachine().load_object(ObjectFile(data))
+            print("Program output:")
+            try:
+                vm.run()
+            except RuntimeError as e:
+                print(f"Runtime error: {str(e)}")
+            for line in vm.report():
+                print(line)
 
     except FileNotFoundError:
         print(f"Error: Could not find input file {input_path}")
@@ -61,16 +172,92 @@ def compile(
     return True
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compile a Laika program.")
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="src/input/input.txt",
+        help="source file, '-' for standard input (default: src/input/input.txt)",
+    )
+    parser.add_argument(
+        "-O",
+        dest="optimization_level",
+        type=int,
+        choices=sorted(OPTIMIZATION_LEVELS),
+        default=1,
+        help="optimization level (default: 1)",
+    )
+    parser.add_argument(
+        "--passes",
+        help="comma-separated pass names to run in order, overriding -O",
+    )
+    parser.add_argument(
+        "--registers",
+        dest="num_registers",
+        type=int,
+        help="number of physical registers (default: the target's register file)",
+    )
+    parser.add_argument(
+        "--keep-exported",
+        action="store_true",
+        help="keep the final stores to variables listed in laika.csv",
+    )
+    parser.add_argument(
+        "--target",
+        help="JSON machine description to generate code for "
+        "(default: src/code_generator/targets/laika.json)",
+    )
+    parser.add_argument(
+        "--emit-c",
+        action="store_true",
+        help="also translate the program to C (src/output/laika.c)",
+    )
+    parser.add_argument(
+        "--run",
+        action="store_true",
+        help="execute the generated program in the VM",
+    )
+    parser.add_argument(
+        "--emit-object",
+        action="store_true",
+        help="also assemble the program into a binary object file (src/output/laika.obj)",
+    )
+    return parser.parse_args()
+
+
 def main():
-    input_file = "src/input/input.txt"
+    args = parse_args()
+    passes = args.passes.split(",") if args.passes else None
+    try:
+        target = Target.load(args.target) if args.target else default_target()
+        num_registers = (
+            args.num_registers if args.num_registers is not None else target.registers
+        )
+        if num_registers is not None and num_registers < MIN_REGISTERS:
+            raise ValueError(f"--registers must be at least {MIN_REGISTERS}")
+        pass_manager = PassManager(
+            passes,
+            args.optimization_level,
+            num_registers=num_registers,
+            keep_exported=args.keep_exported,
+            target=target,
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        return
+
+    input_file = args.input
     tok_output_file = "src/output/laika.tok"
     symbol_table_file = "src/output/laika.csv"
     grammar_output_file = "src/output/laika.bracket"
     assembly_output_file = "src/output/laika.asm"
+    data_output_file = "src/output/laika.data"
+    c_output_file = "src/output/laika.c" if args.emit_c else None
+    object_output_file = "src/output/laika.obj" if args.emit_object else None
     symbol_table = SymbolTable()
     lexer = LexicalAnalyzer(symbol_table)
-    parser = SyntaxAnalyzer(symbol_table, lexer)
-    code_generator = CodeGenerator(symbol_table)
+    parser = SyntaxAnalyzer(symbol_table, lexer, keep_output=False)
 
     if compile(
         input_file,
@@ -79,14 +266,26 @@ def main():
         symbol_table_file,
         lexer,
         parser,
-        code_generator,
         assembly_output_file,
+        data_output_file,
+        pass_manager,
+        num_registers,
+        target,
+        c_output_file,
+        args.run,
+        object_output_file,
     ):
-        print(f"Successfully processed {input_file} and generated:")
+        source = "standard input" if input_file == "-" else input_file
+        print(f"Successfully processed {source} and generated:")
         print(f"- Symbol Table: {symbol_table_file}")
         print(f"- Tokens: {tok_output_file}")
         print(f"- Parsed Output: {grammar_output_file}")
         print(f"- Assembly Code: {assembly_output_file}")
+        print(f"- Data Map: {data_output_file}")
+        if c_output_file is not None:
+            print(f"- C Source: {c_output_file}")
+        if object_output_file is not None:
+            print(f"- Object File: {object_output_file}")
     else:
         print("Failed to process files")
 
@@ -0,0 +1,280 @@
+from src.assembler.object_format import (
+    CODE_NUMBERS,
+    CONSTANT,
+    FORM_ABSOLUTE,
+    FORM_ABSOLUTE_SCALED,
+    FORM_DISPLACEMENT,
+    FORM_IMMEDIATE,
+    FORM_INDIRECT,
+    FORM_PRINT,
+    FORM_REGISTERS,
+    FORM_SCALED,
+    FORM_VECTOR,
+    FORM_VECTOR_SCALAR_LEFT,
+    FORM_VECTOR_SCALAR_RIGHT,
+    HEADER,
+    INSTRUCTION,
+    MAGIC,
+    MAX_REGISTERS,
+    OPCODES,
+    STATEMENT_END,
+    STRING,
+    SYMBOL,
+    VERSION,
+    align,
+    encode_constant,
+)
+from src.code_generator.data_layout import WORD_SIZE
+from src.code_generator.instruction import (
+    BLOCK_OPCODES,
+    VECTOR_OPCODES,
+    Instruction,
+    is_immediate,
+    is_memory,
+    is_register,
+    parse_address,
+)
+from src.code_generator.semantics import parse_immediate
+
+
+class Assembler:
+    """
+    Turn laika assembly into the binary object format (see object_format).
+
+    Blank lines end a statement, as the emitter writes them; comments are
+    kept so that error lines survive a round trip through the disassembler.
+    Labels are records of their own, which branches refer to by index.
+    Operands still naming a variable (``@x``) are resolved here: through
+    the layout if it has the variable, otherwise to a word appended to the
+    data segment, as a linker would.
+    """
+
+    def __init__(self):
+        self.data = b""
+
+    def assemble(self, assembly_code, layout=None):
+        """
+        Encode assembly lines.
+
+        :param assembly_code: Lines of laika assembly (e.g. CodeGenerator.assembly_code)
+        :param layout: DataLayout the code was emitted for (IRProgram.layout)
+        :return: The object file as bytes
+        """
+        # (kind, bits) of every constant record, and the index of each immediate
+        self.constants = []
+        self.constant_numbers = {}
+        self.strings = {}
+        self.layout = layout
+        # symbol records (string index, address, list size) and scalar addresses
+        self.symbols = []
+        self.variables = {}
+        self.size = 0
+        if layout is not None:
+            for name, (address, size) in layout.lists.items():
+                self.symbols.append((self._string(name), address, size))
+            for name, address in layout.scalars.items():
+                self.symbols.append((self._string(name), address, 0))
+                self.variables[name] = address
+            self.size = layout.size
+
+        instructions = [
+            Instruction.parse(line) for entry in assembly_code for line in entry.split("\n")
+        ]
+        # Label -> index of its record; blank lines get no record
+        self.labels = {}
+        position = 0
+        for instruction in instructions:
+            if instruction.opcode == "LABEL":
+                self.labels[instruction.operands[0]] = position
+            if instruction.opcode is not None or instruction.comment is not None:
+                position += 1
+
+        records = []
+        for instruction in instructions:
+            if instruction.opcode is None and instruction.comment is None:
+                if records:
+                    records[-1][1] |= STATEMENT_END
+                continue
+            records.append(self._encode(instruction))
+
+        code = b"".join(self._pack(*record) for record in records)
+        constants = b"".join(CONSTANT.pack(*constant) for constant in self.constants)
+        symbols = b"".join(SYMBOL.pack(*symbol) for symbol in self.symbols)
+        string_records = []
+        blob = []
+        size = 0
+        for text in self.strings:
+            encoded = text.encode("utf-8")
+            string_records.append(STRING.pack(size, len(encoded)))
+            blob.append(encoded)
+            size += len(encoded)
+        strings = b"".join(string_records + blob)
+
+        sections = []
+        offset = HEADER.size
+        for section in (code, constants, symbols, strings):
+            sections.append(offset)
+            offset = align(offset + len(section))
+
+        header = HEADER.pack(
+            MAGIC,
+            VERSION,
+            0,
+            self.size,
+            sections[0],
+            len(records),
+            sections[1],
+            len(self.constants),
+            sections[2],
+            len(self.symbols),
+            sections[3],
+            len(self.strings),
+        )
+        data = bytearray(offset)
+        data[: HEADER.size] = header
+        for start, section in zip(sections, (code, constants, symbols, strings)):
+            data[start : start + len(section)] = section
+        self.data = bytes(data)
+        return self.data
+
+    def save(self, filename):
+        with open(filename, "wb") as f:
+            f.write(self.data)
+
+    def _pack(self, opcode, form, a, b, c, d):
+        """The INSTRUCTION record; form may carry the STATEMENT_END bit."""
+        code = CODE_NUMBERS.get((opcode, form & ~STATEMENT_END))
+        if code is None:
+            raise ValueError(f"{opcode} cannot take operand form {form & ~STATEMENT_END}")
+        return INSTRUCTION.pack(code | form & STATEMENT_END, a, b, c, d)
+
+    def _encode(self, instruction):
+        """[opcode, form, a, b, c, d] for one instruction or comment."""
+        if instruction.opcode is None:
+            comment = self._string(instruction.comment)
+            return ["COMMENT", FORM_REGISTERS, 0, 0, 0, comment]
+
+        opcode, operands = instruction.opcode, instruction.operands
+        if opcode not in OPCODES or opcode == "COMMENT":
+            raise ValueError(f"Unknown instruction '{instruction}'")
+        if opcode in ("ERROR", "RET"):
+            return [opcode, FORM_REGISTERS, 0, 0, 0, 0]
+        if opcode == "LABEL":
+            return [opcode, FORM_REGISTERS, 0, 0, 0, self._string(operands[0])]
+        if opcode in ("BR", "CALL"):
+            return [opcode, FORM_REGISTERS, 0, 0, 0, self._label(operands[0])]
+        if opcode == "BZ":
+            register = self._register(operands[0])
+            return [opcode, FORM_REGISTERS, register, 0, 0, self._label(operands[1])]
+        if opcode in ("LD", "LD.b"):
+            return [opcode, *self._memory_operand(operands[1], self._register(operands[0]))]
+        if opcode in ("ST", "ST.b"):
+            return [opcode, *self._memory_operand(operands[0], self._register(operands[1]))]
+        if opcode in ("FILL", "FILL.b"):
+            form, a, b, _, d = self._memory_operand(operands[0], self._register(operands[1]))
+            if form not in (FORM_ABSOLUTE, FORM_DISPLACEMENT, FORM_INDIRECT):
+                raise ValueError(f"{opcode} cannot take the address '{operands[0]}'")
+            return [opcode, form, a, b, self._register(operands[2]), d]
+        if opcode in VECTOR_OPCODES:
+            return [opcode, *self._vector_operands(operands)]
+        if opcode in BLOCK_OPCODES:
+            target, source, count = operands
+            addresses = self._constant_group(self._absolute(target), self._absolute(source))
+            return [opcode, FORM_REGISTERS, self._register(count), 0, 0, addresses]
+
+        registers = [self._register(operand) for operand in operands] + [0, 0]
+        return [opcode, FORM_REGISTERS, *registers[:3], 0]
+
+    def _memory_operand(self, operand, a):
+        """[form, a, b, c, d] for the memory side of a LD or ST."""
+        if operand == "@print":
+            return [FORM_PRINT, a, 0, 0, 0]
+        if is_immediate(operand):
+            return [FORM_IMMEDIATE, a, 0, 0, self._constant(parse_immediate(operand))]
+        if is_memory(operand):
+            return [FORM_ABSOLUTE, a, 0, 0, self._variable(operand[1:])]
+        if is_register(operand):
+            return [FORM_INDIRECT, a, self._register(operand), 0, 0]
+        if is_memory(parse_address(operand)[0]):
+            if self.layout is None:
+                raise ValueError(f"No data layout to resolve '{operand}'")
+            operand = self.layout.resolve(operand)
+        base, index, scale, displacement = parse_address(operand)
+        if base.isdigit():
+            if index is None:
+                return [FORM_ABSOLUTE, a, 0, 0, int(base) + displacement]
+            return [FORM_ABSOLUTE_SCALED, a, self._register(index), scale, int(base)]
+        if index is None:
+            return [FORM_DISPLACEMENT, a, self._register(base), 0, displacement]
+        return [FORM_SCALED, a, self._register(base), self._register(index), scale]
+
+    def _vector_operands(self, operands):
+        """[form, a, b, c, d] of a vector operation."""
+        target, left, right, lanes = operands
+        form = FORM_VECTOR
+        # Register numbers of scalar sources, and the addresses of the group
+        registers = []
+        addresses = [self._absolute(target)]
+        scalar_forms = (FORM_VECTOR_SCALAR_LEFT, FORM_VECTOR_SCALAR_RIGHT)
+        for operand, scalar_form in zip((left, right), scalar_forms):
+            if is_register(operand):
+                if form != FORM_VECTOR:
+                    raise ValueError(f"Vector operation on two registers, '{operand}'")
+                form = scalar_form
+                registers.append(self._register(operand))
+                addresses.append(0)
+            else:
+                registers.append(0)
+                addresses.append(self._absolute(operand))
+        lanes = parse_immediate(lanes)
+        if not 0 < lanes <= 0xFF:
+            raise ValueError(f"{lanes} lanes do not fit the object format")
+        return [form, lanes, *registers, self._constant_group(*addresses)]
+
+    def _absolute(self, operand):
+        """Absolute address of a memory operand without registers."""
+        if is_memory(parse_address(operand)[0]):
+            if self.layout is None:
+                raise ValueError(f"No data layout to resolve '{operand}'")
+            operand = self.layout.resolve(operand)
+        base, index, _, displacement = parse_address(operand)
+        if not base.isdigit() or index is not None:
+            raise ValueError(f"Expected an absolute address, got '{operand}'")
+        return int(base) + displacement
+
+    def _register(self, operand):
+        if not is_register(operand) or operand[0] != "R":
+            raise ValueError(f"Expected a physical register, got '{operand}'")
+        number = int(operand[1:])
+        if number >= MAX_REGISTERS:
+            raise ValueError(f"Register {operand} does not fit the object format")
+        return number
+
+    def _label(self, label):
+        if label not in self.labels:
+            raise ValueError(f"Unknown label '{label}'")
+        return self.labels[label]
+
+    def _constant(self, value):
+        encoded = encode_constant(value)
+        if encoded not in self.constant_numbers:
+            self.constant_numbers[encoded] = len(self.constants)
+            self.constants.append(encoded)
+        return self.constant_numbers[encoded]
+
+    def _constant_group(self, *values):
+        """Index of the first of consecutive new constants holding the values."""
+        index = len(self.constants)
+        self.constants.extend(encode_constant(value) for value in values)
+        return index
+
+    def _string(self, text):
+        return self.strings.setdefault(text, len(self.strings))
+
+    def _variable(self, name):
+        """Address of a variable, giving it a word after the data segment if it has none."""
+        if name not in self.variables:
+            self.variables[name] = (self.size + WORD_SIZE - 1) // WORD_SIZE * WORD_SIZE
+            self.size = self.variables[name] + WORD_SIZE
+            self.symbols.append((self._string(name), self.variables[name], 0))
+        return self.variables[name]
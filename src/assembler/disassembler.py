@@ -0,0 +1,106 @@
+import mmap
+import sys
+
+from src.assembler.object_format import (
+    FORM_ABSOLUTE,
+    FORM_ABSOLUTE_SCALED,
+    FORM_DISPLACEMENT,
+    FORM_IMMEDIATE,
+    FORM_INDIRECT,
+    FORM_PRINT,
+    FORM_SCALED,
+    FORM_VECTOR_SCALAR_LEFT,
+    FORM_VECTOR_SCALAR_RIGHT,
+    ObjectFile,
+)
+from src.code_generator.instruction import BLOCK_OPCODES, VECTOR_OPCODES
+from src.code_generator.semantics import format_immediate
+
+
+class Disassembler:
+    """Turn an object file back into laika assembly, one blank line per statement."""
+
+    def __init__(self, object_file):
+        """
+        :param object_file: ObjectFile to read
+        """
+        self.object_file = object_file
+
+    def disassemble(self):
+        """
+        :return: Lines of assembly as the emitter writes them
+        """
+        lines = []
+        for opcode, form, statement_end, a, b, c, d in self.object_file.instructions():
+            lines.append(self._format(opcode, form, a, b, c, d))
+            if statement_end:
+                lines.append("")
+        return lines
+
+    def format_instruction(self, index):
+        """Assembly text of instruction `index`."""
+        opcode, form, _, a, b, c, d = self.object_file.instruction(index)
+        return self._format(opcode, form, a, b, c, d)
+
+    def _format(self, opcode, form, a, b, c, d):
+        if opcode == "COMMENT":
+            return f"# {self.object_file.string(d)}"
+        if opcode == "ERROR":
+            return opcode
+        if opcode == "LABEL":
+            return f"{opcode} {self.object_file.string(d)}"
+        if opcode in ("BR", "CALL"):
+            return f"{opcode} {self._label(d)}"
+        if opcode == "RET":
+            return opcode
+        if opcode == "BZ":
+            return f"{opcode} R{a} {self._label(d)}"
+        if opcode in ("LD", "LD.b"):
+            return f"{opcode} R{a} {self._memory_operand(form, b, c, d)}"
+        if opcode in ("ST", "ST.b"):
+            return f"{opcode} {self._memory_operand(form, b, c, d)} R{a}"
+        if opcode in ("FILL", "FILL.b"):
+            return f"{opcode} {self._memory_operand(form, b, c, d)} R{a} R{c}"
+        if opcode in VECTOR_OPCODES:
+            left = f"R{b}" if form == FORM_VECTOR_SCALAR_LEFT else self._address(d + 1)
+            right = f"R{c}" if form == FORM_VECTOR_SCALAR_RIGHT else self._address(d + 2)
+            return f"{opcode} {self._address(d)} {left} {right} #{a}"
+        if opcode in BLOCK_OPCODES:
+            return f"{opcode} {self._address(d)} {self._address(d + 1)} R{a}"
+        if opcode in ("MOV", "FL.i"):
+            return f"{opcode} R{a} R{b}"
+        return f"{opcode} R{a} R{b} R{c}"
+
+    def _label(self, index):
+        """Name of the LABEL at record `index`."""
+        return self.object_file.string(self.object_file.instruction(index)[-1])
+
+    def _address(self, constant):
+        return f"[{self.object_file.constant(constant)}]"
+
+    def _memory_operand(self, form, b, c, d):
+        if form == FORM_PRINT:
+            return "@print"
+        if form == FORM_IMMEDIATE:
+            return format_immediate(self.object_file.constant(d))
+        if form == FORM_ABSOLUTE:
+            return f"[{d}]"
+        if form == FORM_ABSOLUTE_SCALED:
+            return f"[{d}+R{b}*{c}]"
+        if form == FORM_INDIRECT:
+            return f"R{b}"
+        if form == FORM_DISPLACEMENT:
+            return f"[R{b}+{d}]"
+        if form == FORM_SCALED:
+            return f"[R{b}+R{c}*{d}]"
+        raise ValueError(f"Unknown operand form {form}")
+
+
+def main(path):
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for line in Disassembler(ObjectFile(data)).disassemble():
+            print(line)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
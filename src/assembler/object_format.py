@@ -0,0 +1,196 @@
+"""
+Binary object format for laika programs (.obj).
+
+All fields are little-endian and every section starts 4-byte aligned, so a
+loader can ``mmap`` the file and read any record in place with
+``struct.unpack_from``:
+
+- header: HEADER, see ObjectFile for the fields
+- code: one fixed-width INSTRUCTION record per instruction
+- constants: the deduplicated immediates, and the addresses of each vector
+  and block operation, CONSTANT records (kind, 32 bits)
+- symbols: SYMBOL records (string index, address, list size in bytes or 0
+  for scalars), the data map of the program's static data segment
+- strings: STRING records (offset, length) into the UTF-8 blob after them,
+  for symbol names and error comments
+
+Variables and list elements are addressed absolutely within the data
+segment, whose size the header gives; the symbols are only there to name
+the addresses. An instruction record is 8 bytes, (code, a, b, c, d).
+``code`` numbers an (opcode, form) pair of CODES, the form saying how the
+memory operand, if any, is encoded; its STATEMENT_END bit marks the last
+instruction of a source statement. a, b and c are register numbers, so
+at most MAX_REGISTERS of them (but for the vector operations), d is a
+constant or string index, an address, a displacement or a scale:
+
+    LD    a=dest, source by form       ST    a=value, target by form
+    MOV/FL.i  a=dest b=source          FILL  a=value c=count, target by form
+    arithmetic  a=dest b=left c=right  ERROR, COMMENT d=string
+    LD.b, ST.b, FILL.b  as LD, ST and FILL on single bytes
+    VADD.i ...  a=lanes d=first of three constants holding the destination
+                and source addresses, sources by form
+    COPY, COPY.b  a=count d=first of two constants holding the destination
+                  and source addresses
+    LABEL  d=string (its name)          BR  d=index of the LABEL's record
+    BZ  a=register tested, d as BR     CALL  d as BR
+    RET  no operands
+
+    IMMEDIATE  d=constant              ABSOLUTE  [d]
+    DISPLACEMENT  [Rb+d]               SCALED  [Rb+Rc*d]
+    INDIRECT  Rb                       PRINT  @print
+    ABSOLUTE_SCALED  [d+Rb*c]
+    VECTOR  both sources from the constants
+    VECTOR_SCALAR_LEFT  b=register, right source from the constants
+    VECTOR_SCALAR_RIGHT  c=register, left source from the constants
+"""
+
+import struct
+
+from src.code_generator.instruction import BLOCK_OPCODES, BRANCH_OPCODES, VECTOR_OPCODES
+from src.code_generator.semantics import OPERATIONS
+
+
+MAGIC = b"LAIK"
+VERSION = 8
+
+# magic, version, flags, data segment size, then (offset, count) of code,
+# constants, symbols and strings
+HEADER = struct.Struct("<4sHHIIIIIIIII")
+INSTRUCTION = struct.Struct("<BBBBi")
+CONSTANT = struct.Struct("<II")
+SYMBOL = struct.Struct("<III")
+STRING = struct.Struct("<II")
+
+# Opcode numbers; new opcodes are only ever appended
+OPCODES = (
+    "ERROR", "COMMENT", "LD", "ST", "MOV", "FILL", *OPERATIONS,
+    "LD.b", "ST.b", "FILL.b", *VECTOR_OPCODES, *BLOCK_OPCODES,
+    "LABEL", *BRANCH_OPCODES,
+)
+
+# Operand forms
+(
+    FORM_REGISTERS,
+    FORM_IMMEDIATE,
+    FORM_ABSOLUTE,
+    FORM_DISPLACEMENT,
+    FORM_SCALED,
+    FORM_INDIRECT,
+    FORM_PRINT,
+    FORM_ABSOLUTE_SCALED,
+    FORM_VECTOR,
+    FORM_VECTOR_SCALAR_LEFT,
+    FORM_VECTOR_SCALAR_RIGHT,
+) = range(11)
+
+# The forms each opcode is encoded with; all others only have FORM_REGISTERS
+ELEMENT_FORMS = (FORM_ABSOLUTE, FORM_DISPLACEMENT, FORM_SCALED, FORM_INDIRECT, FORM_ABSOLUTE_SCALED)
+FILL_FORMS = (FORM_ABSOLUTE, FORM_DISPLACEMENT, FORM_INDIRECT)
+VECTOR_FORMS = (FORM_VECTOR, FORM_VECTOR_SCALAR_LEFT, FORM_VECTOR_SCALAR_RIGHT)
+FORMS = {
+    "LD": (FORM_IMMEDIATE, *ELEMENT_FORMS),
+    "ST": (FORM_PRINT, *ELEMENT_FORMS),
+    "LD.b": ELEMENT_FORMS,
+    "ST.b": ELEMENT_FORMS,
+    "FILL": FILL_FORMS,
+    "FILL.b": FILL_FORMS,
+    **{opcode: VECTOR_FORMS for opcode in VECTOR_OPCODES},
+}
+
+# Code numbers of the (opcode, form) pairs, below STATEMENT_END
+CODES = tuple(
+    (opcode, form) for opcode in OPCODES for form in FORMS.get(opcode, (FORM_REGISTERS,))
+)
+CODE_NUMBERS = {code: number for number, code in enumerate(CODES)}
+CODE_MASK = 0x7F
+STATEMENT_END = 0x80
+assert len(CODES) <= CODE_MASK + 1
+
+# Register fields are a byte wide
+MAX_REGISTERS = 0x100
+
+# Constant kinds
+INT_CONSTANT = 0
+REAL_CONSTANT = 1
+
+
+def encode_constant(value):
+    """(kind, bits) of an int32 or float32 value."""
+    if isinstance(value, float):
+        return REAL_CONSTANT, struct.unpack("<I", struct.pack("<f", value))[0]
+    return INT_CONSTANT, value & 0xFFFFFFFF
+
+
+def decode_constant(kind, bits):
+    if kind == REAL_CONSTANT:
+        return struct.unpack("<f", struct.pack("<I", bits))[0]
+    return bits - 0x100000000 if bits & 0x80000000 else bits
+
+
+def align(offset):
+    return (offset + 3) & ~3
+
+
+class ObjectFile:
+    """
+    Read access to an object file held in any buffer (bytes, mmap, ...).
+
+    Nothing is parsed up front beyond the header; records are unpacked
+    from the buffer when asked for.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        if len(buffer) < HEADER.size:
+            raise ValueError("Not a laika object file: too short")
+        (
+            magic,
+            version,
+            _flags,
+            self.data_size,
+            self.code_offset,
+            self.code_count,
+            self.constant_offset,
+            self.constant_count,
+            self.symbol_offset,
+            self.symbol_count,
+            self.string_offset,
+            self.string_count,
+        ) = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a laika object file: bad magic")
+        if version != VERSION:
+            raise ValueError(f"Unsupported object file version {version}")
+        self.blob_offset = self.string_offset + self.string_count * STRING.size
+
+    def instruction(self, index):
+        """(opcode name, form, statement end, a, b, c, d) of instruction `index`."""
+        code, a, b, c, d = INSTRUCTION.unpack_from(
+            self.buffer, self.code_offset + index * INSTRUCTION.size
+        )
+        opcode, form = CODES[code & CODE_MASK]
+        return opcode, form, bool(code & STATEMENT_END), a, b, c, d
+
+    def instructions(self):
+        return (self.instruction(index) for index in range(self.code_count))
+
+    def constant(self, index):
+        kind, bits = CONSTANT.unpack_from(
+            self.buffer, self.constant_offset + index * CONSTANT.size
+        )
+        return decode_constant(kind, bits)
+
+    def symbol(self, index):
+        """(name, address, list size in bytes or 0) of symbol `index`."""
+        string, address, length = SYMBOL.unpack_from(
+            self.buffer, self.symbol_offset + index * SYMBOL.size
+        )
+        return self.string(string), address, length
+
+    def symbols(self):
+        return [self.symbol(index) for index in range(self.symbol_count)]
+
+    def string(self, index):
+        offset, length = STRING.unpack_from(self.buffer, self.string_offset + index * STRING.size)
+        start = self.blob_offset + offset
+        return bytes(self.buffer[start : start + length]).decode("utf-8")
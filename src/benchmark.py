@@ -0,0 +1,165 @@
+"""
+Time the VM against the C backend on the same program.
+
+    python -m src.benchmark                  # a generated loop-heavy program
+    python -m src.benchmark program.txt -O1 --target path/to/laika-lite.json
+
+The program is compiled once. Its assembly runs in the VM (src/vm/vm.py),
+and its C translation (CBackend) is built with the system compiler ($CC,
+or cc) and run natively. Both must print the same values; each is timed
+as the best of --repeat runs, the native time including process start.
+"""
+
+import argparse
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.code_generator import c_backend
+from src.code_generator.target import Target, default_target
+from src.compiler import compile_source
+from src.optimizer.pass_manager import OPTIMIZATION_LEVELS
+from src.vm.vm import VirtualMachine
+
+
+def generate_program(iterations):
+    """
+    A program whose run time grows with `iterations`: a function call,
+    integer and real arithmetic and a whole-list operation in nested loops.
+    """
+    return f"""
+x = list[64]
+for i in 0..64 {{
+x[i] = 3
+}}
+def f(a, b) = a * b + 1
+s = 0
+t = 0.5
+repeat {iterations} {{
+for i in 0..64 {{
+s = s + f(x[i], i) // 7
+t = t * 0.5 + 1.5
+}}
+y = x + x
+}}
+s
+t
+y[5]
+"""
+
+
+def time_vm(code_generator, repeat):
+    """(best seconds, instructions executed, printed lines) of runs in the VM."""
+    assembly = list(code_generator.assembly_lines())
+    best = None
+    for _ in range(repeat):
+        output = io.StringIO()
+        vm = VirtualMachine(output).load(assembly, code_generator.program.layout)
+        vm.run()
+        best = vm.seconds if best is None else min(best, vm.seconds)
+    return best, vm.executed, output.getvalue().splitlines()
+
+
+def time_native(code_generator, repeat, compiler):
+    """(build seconds, best run seconds, printed lines) of the C translation."""
+    backend = c_backend.CBackend()
+    backend.translate(code_generator.program)
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "laika.c")
+        executable = os.path.join(directory, "laika")
+        backend.save(source)
+        start = time.perf_counter()
+        c_backend.build(source, executable, compiler)
+        build = time.perf_counter() - start
+
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = subprocess.run([executable], capture_output=True, text=True)
+            elapsed = time.perf_counter() - start
+            if result.returncode != 0:
+                raise RuntimeError(f"Native program failed: {result.stderr.strip()}")
+            best = elapsed if best is None else min(best, elapsed)
+    return build, best, result.stdout.splitlines()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Time the VM against the C backend.")
+    parser.add_argument(
+        "input", nargs="?", help="source file (default: a generated program)"
+    )
+    parser.add_argument(
+        "-O",
+        dest="optimization_level",
+        type=int,
+        choices=sorted(OPTIMIZATION_LEVELS),
+        default=2,
+        help="optimization level (default: 2)",
+    )
+    parser.add_argument(
+        "--target",
+        help="JSON machine description (default: src/code_generator/targets/laika.json)",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=1000,
+        help="outer loop count of the generated program (default: 1000)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="runs of each backend (default: 3)"
+    )
+    parser.add_argument(
+        "--cc",
+        default=os.environ.get("CC", "cc"),
+        help="C compiler (default: $CC or cc)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if shutil.which(args.cc) is None:
+        print(f"Error: C compiler '{args.cc}' not found")
+        return 1
+    target = Target.load(args.target) if args.target else default_target()
+    if args.input is not None:
+        with open(args.input, "r") as f:
+            source = f.read()
+        name = args.input
+    else:
+        source = generate_program(args.iterations)
+        name = f"generated program, {args.iterations} iterations"
+
+    start = time.perf_counter()
+    code_generator = compile_source(source, args.optimization_level, target)
+    compile_seconds = time.perf_counter() - start
+    if code_generator.error_encountered:
+        print("Error: the program does not compile")
+        return 1
+
+    vm_seconds, executed, vm_output = time_vm(code_generator, args.repeat)
+    build_seconds, native_seconds, native_output = time_native(
+        code_generator, args.repeat, args.cc
+    )
+
+    print(f"{name}, -O{args.optimization_level}, target {target.name}")
+    print(
+        f"  compile  {compile_seconds * 1000:10.2f} ms  "
+        f"{code_generator.program.count()} instructions"
+    )
+    print(f"  vm       {vm_seconds * 1000:10.2f} ms  {executed} instructions executed")
+    print(f"  native   {native_seconds * 1000:10.2f} ms  built in {build_seconds * 1000:.0f} ms")
+    print(f"  speedup  {vm_seconds / native_seconds:10.2f}x")
+    if vm_output != native_output:
+        print("Error: the VM and the native program printed different values")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
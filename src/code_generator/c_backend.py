@@ -0,0 +1,406 @@
+import subprocess
+
+from src.code_generator.data_layout import WORD_SIZE
+from src.code_generator.instruction import (
+    BLOCK_OPCODES,
+    VECTOR_OPCODES,
+    is_immediate,
+    is_memory,
+    is_register,
+    parse_address,
+)
+from src.code_generator.semantics import parse_immediate
+
+
+# Runtime support shared by every translation unit. A cell is one 4-byte
+# memory word, read as an integer or a real depending on the instruction;
+# int8 list elements are single bytes of the same memory.
+PRELUDE = r"""#include <math.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+typedef union {
+    int32_t i;
+    float f;
+} cell;
+
+static inline void fail(const char *message) {
+    fflush(stdout);
+    fprintf(stderr, "Error: %s\n", message);
+    exit(1);
+}
+
+static inline cell *element(cell *memory, int32_t size, int32_t address, int32_t width) {
+    if (address < 0 || address % width != 0 || address / width >= size) {
+        fail("element address out of range");
+    }
+    return &memory[address / width];
+}
+
+static inline int8_t *byte_at(cell *memory, int32_t size, int32_t address) {
+    if (address < 0 || address / (int32_t)sizeof(cell) >= size) {
+        fail("element address out of range");
+    }
+    return (int8_t *)memory + address;
+}
+
+static inline void copy_block(cell *memory, int32_t size, int32_t target, int32_t source, int32_t bytes) {
+    int32_t limit = size * (int32_t)sizeof(cell);
+    if (bytes < 0 || target + bytes > limit || source + bytes > limit) {
+        fail("element address out of range");
+    }
+    memmove((char *)memory + target, (char *)memory + source, bytes);
+}
+
+static inline int32_t wrap(double value) {
+    double low = fmod(value, 4294967296.0);
+    if (low < 0) {
+        low += 4294967296.0;
+    }
+    return (int32_t)(uint32_t)low;
+}
+
+static inline int32_t div_i(int32_t a, int32_t b) {
+    if (b == 0) {
+        fail("integer division by zero");
+    }
+    if (a == INT32_MIN && b == -1) {
+        return INT32_MIN;
+    }
+    return a / b;
+}
+
+static inline int32_t div_r(double a, double b) {
+    if (b == 0) {
+        fail("integer division by zero");
+    }
+    return wrap(trunc(a / b));
+}
+
+static inline int32_t exp_i(int32_t base, int32_t exponent) {
+    if (exponent < 0) {
+        if (base == 0) {
+            fail("zero raised to a negative power");
+        }
+        if (base == 1 || base == -1) {
+            return base == -1 && (exponent & 1) ? -1 : 1;
+        }
+        return 0;
+    }
+    uint32_t result = 1, factor = (uint32_t)base;
+    for (uint32_t n = (uint32_t)exponent; n; n >>= 1) {
+        if (n & 1) {
+            result *= factor;
+        }
+        factor *= factor;
+    }
+    return (int32_t)result;
+}
+
+static inline float real(double value) {
+    float result = (float)value;
+    if (!isfinite(result)) {
+        fail("real result is not finite");
+    }
+    return result;
+}
+
+static inline float div_f(float a, float b) {
+    if (b == 0) {
+        fail("real division by zero");
+    }
+    return real((double)a / b);
+}
+
+static inline float exp_f(float base, float exponent) {
+    if (base == 0 && exponent < 0) {
+        fail("zero raised to a negative power");
+    }
+    if (base < 0 && exponent != truncf(exponent)) {
+        fail("negative base with a fractional exponent");
+    }
+    return real(pow(base, exponent));
+}
+
+static inline void print_i(int32_t value) {
+    printf("%d\n", (int)value);
+}
+
+static inline void print_f(float value) {
+    /* Shortest text that reads back as the same float, like format_value */
+    char text[64];
+    for (int digits = 1; digits < 18; digits++) {
+        snprintf(text, sizeof text, "%.*g", digits, (double)value);
+        if ((float)strtod(text, NULL) == value) {
+            break;
+        }
+    }
+    if (!strpbrk(text, ".en")) {
+        strcat(text, ".0");
+    }
+    puts(text);
+}
+"""
+
+INT_OPERATORS = {"ADD.i": "+", "SUB.i": "-", "MUL.i": "*"}
+REAL_OPERATORS = {"ADD.f": "+", "SUB.f": "-", "MUL.f": "*"}
+COMPARISON_OPERATORS = {"EQ": "==", "NE": "!=", "LT": "<", "GT": ">", "LE": "<=", "GE": ">="}
+
+
+class CBackend:
+    """
+    Translate an optimized IRProgram into a standalone C program.
+
+    Virtual registers become typed locals (int32_t or float) and variables
+    become local cells. Lists live in one static array of cells at their
+    addresses in program.layout, int8 elements as bytes of it; elements at
+    constant addresses are indexed directly, computed addresses are checked
+    against the array. Loops keep their labels and branches as C labels
+    and gotos, which is safe as every local is declared at the top of
+    main. A CALL pushes the number of its call site and jumps to the
+    function's label, and RET switches on the popped number back to the
+    label after that call site, so functions stay inside main too. Printed
+    values go through stdout with full buffering and are
+    written the way semantics.format_value writes them, so the program
+    prints exactly what the laika semantics prescribe. Run-time errors
+    (division by zero, non-finite reals, addresses outside the lists) stop
+    the program with exit status 1.
+    """
+
+    def __init__(self):
+        self.source = []
+
+    def translate(self, program):
+        """
+        Build the C source for the program.
+
+        :param program: IRProgram after optimization (virtual registers)
+        :return: List of source lines
+        """
+        self.width = WORD_SIZE
+        self.types = program.value_types()
+
+        self.layout = program.layout
+        variables = sorted(
+            {
+                operand[1:]
+                for instruction in program.instructions
+                for operand in instruction.operands
+                if is_memory(operand) and operand != "@print"
+            }
+        )
+        self.size = max(-(-self.layout.size // self.width), 1)
+        # Call sites, numbered in program order as they are translated
+        self.call_sites = sum(
+            instruction.opcode == "CALL" for instruction in program.instructions
+        )
+        self.calls = 0
+
+        lines = [PRELUDE, f"static cell memory[{self.size}];", ""]
+        lines.append("int main(void) {")
+        lines.append("    static char buffer[1 << 16];")
+        lines.append("    setvbuf(stdout, buffer, _IOFBF, sizeof buffer);")
+        if self.call_sites:
+            # No function calls itself, so the calls in progress are distinct sites
+            lines.append(f"    int32_t returns[{self.call_sites}];")
+            lines.append("    int32_t depth = 0;")
+        for name in variables:
+            lines.append(f"    cell {self._variable(name)} = {{.i = 0}};")
+        for register in sorted(self.types, key=lambda register: int(register[1:])):
+            c_type = "float" if self.types[register] == "REAL" else "int32_t"
+            lines.append(f"    {c_type} {register};")
+
+        for line, instructions in program.statements():
+            lines.append("")
+            lines.append(f"    /* line {line} */")
+            for instruction in instructions:
+                if instruction.is_code:
+                    lines.extend(f"    {statement}" for statement in self._translate(instruction))
+                elif instruction.opcode == "LABEL":
+                    lines.append(f"{instruction.operands[0]}:;")
+                elif instruction.opcode is not None or instruction.comment is not None:
+                    lines.append(f"    /* {str(instruction).replace('*/', '* /')} */")
+
+        lines.extend(["", "    fflush(stdout);", "    return 0;", "}"])
+        self.source = lines
+        return lines
+
+    def save(self, filename):
+        with open(filename, "w") as f:
+            for line in self.source:
+                f.write(f"{line}\n")
+
+    def _translate(self, instruction):
+        opcode, operands = instruction.opcode, instruction.operands
+
+        if opcode == "LD":
+            dest, source = operands
+            if is_immediate(source):
+                return [f"{dest} = {self._literal(parse_immediate(source))};"]
+            if is_memory(source):
+                return [f"{dest} = {self._variable(source[1:])}.{self._field(dest)};"]
+            return [f"{dest} = {self._element(source)}->{self._field(dest)};"]
+
+        if opcode == "ST":
+            target, value = operands
+            if target == "@print":
+                function = "print_f" if self.types.get(value) == "REAL" else "print_i"
+                return [f"{function}({value});"]
+            if is_memory(target):
+                return [f"{self._variable(target[1:])}.{self._field(value)} = {value};"]
+            return [f"{self._element(target)}->{self._field(value)} = {value};"]
+
+        if opcode == "LD.b":
+            dest, source = operands
+            return [f"{dest} = *{self._byte(source)};"]
+
+        if opcode == "ST.b":
+            target, value = operands
+            return [f"*{self._byte(target)} = (int8_t){value};"]
+
+        if opcode in ("FILL", "FILL.b"):
+            target, value, count = operands
+            base, _, _, displacement = parse_address(self.layout.resolve(target))
+            start = base if not displacement else f"{base} + {displacement}"
+            if opcode == "FILL.b":
+                store = f"*byte_at(memory, {self.size}, {start} + k) = (int8_t){value};"
+            else:
+                address = self._address(f"{start} + k * {self.width}")
+                store = f"{address}->{self._field(value)} = {value};"
+            return [
+                f"for (int32_t k = 0; k < {count}; k++) {{",
+                f"    {store}",
+                "}",
+            ]
+
+        if opcode in VECTOR_OPCODES:
+            target, left, right, lanes = operands
+            scalar_opcode = VECTOR_OPCODES[opcode]
+            field = "f" if scalar_opcode.endswith(".f") else "i"
+            left, right = (
+                operand if is_register(operand) else f"{self._lane(operand)}.{field}"
+                for operand in (left, right)
+            )
+            expression = self._arithmetic(scalar_opcode, left, right)
+            return [
+                f"for (int32_t k = 0; k < {parse_immediate(lanes)}; k++) {{",
+                f"    {self._lane(target)}.{field} = {expression};",
+                "}",
+            ]
+
+        if opcode in BLOCK_OPCODES:
+            target, source, count = operands
+            target, source = (self._constant_address(operand) for operand in (target, source))
+            width = 1 if opcode == "COPY.b" else self.width
+            return [f"copy_block(memory, {self.size}, {target}, {source}, {count} * {width});"]
+
+        if opcode == "BR":
+            return [f"goto {operands[0]};"]
+        if opcode == "BZ":
+            return [f"if ({operands[0]} == 0) goto {operands[1]};"]
+        if opcode == "CALL":
+            site = self.calls
+            self.calls += 1
+            return [
+                f"returns[depth++] = {site};",
+                f"goto {operands[0]};",
+                f"return_{site}:;",
+            ]
+        if opcode == "RET":
+            cases = [f"case {site}: goto return_{site};" for site in range(self.call_sites)]
+            return [
+                "switch (returns[--depth]) {",
+                *(f"    {case}" for case in cases),
+                "}",
+            ]
+        if opcode == "MOV":
+            return [f"{operands[0]} = {operands[1]};"]
+        if opcode == "FL.i":
+            return [f"{operands[0]} = (float){operands[1]};"]
+
+        dest, left, right = operands
+        if opcode in INT_OPERATORS or opcode in REAL_OPERATORS:
+            expression = self._arithmetic(opcode, left, right)
+        elif opcode == "DIV.i":
+            if "REAL" in (self.types.get(left), self.types.get(right)):
+                expression = f"div_r({left}, {right})"
+            else:
+                expression = f"div_i({left}, {right})"
+        elif opcode == "EXP.i":
+            expression = f"exp_i({left}, {right})"
+        elif opcode == "DIV.f":
+            expression = f"div_f({left}, {right})"
+        elif opcode == "EXP.f":
+            expression = f"exp_f({left}, {right})"
+        elif opcode == "SHL":
+            expression = f"(int32_t)((uint32_t){left} << ({right} & 31))"
+        elif opcode == "SHR":
+            expression = f"{left} >> ({right} & 31)"
+        elif opcode[:2] in COMPARISON_OPERATORS:
+            expression = f"{left} {COMPARISON_OPERATORS[opcode[:2]]} {right}"
+        else:
+            raise ValueError(f"No C translation for {opcode}")
+        return [f"{dest} = {expression};"]
+
+    def _arithmetic(self, opcode, left, right):
+        if opcode in INT_OPERATORS:
+            return f"(int32_t)((uint32_t){left} {INT_OPERATORS[opcode]} (uint32_t){right})"
+        return f"real((double){left} {REAL_OPERATORS[opcode]} {right})"
+
+    def _lane(self, address):
+        """Cell k of a vector operand, whose address is constant and in range."""
+        return f"memory[{self._constant_address(address) // self.width} + k]"
+
+    def _constant_address(self, address):
+        base, _, _, displacement = parse_address(self.layout.resolve(address))
+        return int(base) + displacement
+
+    def _field(self, register):
+        return "f" if self.types.get(register) == "REAL" else "i"
+
+    def _variable(self, name):
+        # Prefixed so that laika names never clash with C keywords
+        return f"var_{name}"
+
+    def _element(self, address):
+        base, index, scale, displacement = parse_address(self.layout.resolve(address))
+        if base.isdigit() and index is None:
+            # A constant address inside a list, known to be in range
+            return f"(&memory[{(int(base) + displacement) // self.width}])"
+        return self._address(self._computed(base, index, scale, displacement))
+
+    def _byte(self, address):
+        base, index, scale, displacement = parse_address(self.layout.resolve(address))
+        if base.isdigit() and index is None:
+            return f"((int8_t *)memory + {int(base) + displacement})"
+        expression = self._computed(base, index, scale, displacement)
+        return f"byte_at(memory, {self.size}, {expression})"
+
+    def _computed(self, base, index, scale, displacement):
+        """C expression of an address only known at run time."""
+        expression = base
+        if index is not None:
+            expression += f" + {index} * {scale}"
+        if displacement:
+            expression += f" + {displacement}"
+        return expression
+
+    def _address(self, expression):
+        return f"element(memory, {self.size}, {expression}, {self.width})"
+
+    def _literal(self, value):
+        if isinstance(value, float):
+            return f"(float){value.hex()}"
+        if value == -(2**31):
+            return "INT32_MIN"
+        return str(value)
+
+
+def build(source_path, executable_path, compiler="cc"):
+    """Compile a translated program with the system C compiler."""
+    subprocess.run(
+        [compiler, "-O2", "-o", executable_path, source_path, "-lm"],
+        check=True,
+    )
@@ -1,865 +1,688 @@
+from collections import deque
+
+from src.code_generator.data_layout import (
+    DataLayout,
+    call_result,
+    calls,
+    loop_counter,
+    parameter_variable,
+    statement_calls,
+)
+from src.code_generator.emitter import Emitter
+from src.code_generator.instruction import MARKERS, Instruction
+from src.code_generator.ir import IRProgram
+from src.code_generator.semantics import (
+    DEFAULT_ELEMENT_TYPE,
+    ELEMENT_WIDTHS,
+    format_immediate,
+    to_float32,
+)
+from src.code_generator.target import default_target
+from src.code_generator.type_inference import TypeInference
+
+
+# Laika operator -> opcode (type suffix is added during lowering)
+ARITHMETIC_OPCODES = {
+    "+": "ADD",
+    "-": "SUB",
+    "*": "MUL",
+    "/": "DIV",
+    "^": "EXP",
+}
+
+COMPARISON_OPCODES = {
+    "==": "EQ",
+    "!=": "NE",
+    "<": "LT",
+    ">": "GT",
+    "<=": "LE",
+    ">=": "GE",
+}
+
+
 class CodeGenerator:
-    def __init__(self, symbol_table):
+    def __init__(self, symbol_table, pass_manager=None, emitter=None, target=None):
         """
         Initialize the CodeGenerator with a symbol table.
 
         :param symbol_table: A dictionary mapping variable names to their types
+        :param pass_manager: Optional PassManager run over the IR before emission
+        :param emitter: Emitter that turns the IR into assembly text
+        :param target: Machine description instructions are selected for (None for the default)
         """
         self.symbol_table = symbol_table
+        self.pass_manager = pass_manager
+        self.target = target if target is not None else default_target()
+        self.emitter = (
+            emitter
+            if emitter is not None
+            else Emitter(self.target.registers, target=self.target)
+        )
         self.register_count = 0
+        self.label_count = 0
         self.error_encountered = False
+        self.program = IRProgram()
+        self.spilled = 0
         self.assembly_code = []
+        self.current_line = None
 
     def get_register(self):
         """
-        Generate a new unique register name.
+        Generate a new unique virtual register name.
 
-        :return: A new register name (e.g., 'R0', 'R1')
+        :return: A new register name (e.g., 'v0', 'v1')
         """
-        reg = f"R{self.register_count}"
+        reg = f"v{self.register_count}"
         self.register_count += 1
         return reg
 
-    def generate(self, parsed_output, tokenized_output):
+    def get_label(self):
         """
-        Generate assembly-like instructions from parsed and tokenized outputs.
-        """
-        self.assembly_code = []
-        self.error_encountered = False
-        parsed_lines = parsed_output.split("\n")
-        parsed_lines = list(filter(None, parsed_lines))
-
-        for i, tokens in enumerate(tokenized_output):
-            # reset register count
-            self.register_count = 0
-
-            if (
-                "SyntaxError" in parsed_lines[i]
-                or "Undefined variable" in parsed_lines[i]
-                or "Index" in parsed_lines[i]
-            ):
-                self.assembly_code.append("ERROR\n")
-                continue
+        Generate a new unique label name.
 
-            token_list = tokens.split()
-            parsed_line = parsed_lines[i].strip()
+        :return: A new label name (e.g., 'L0', 'L1')
+        """
+        label = f"L{self.label_count}"
+        self.label_count += 1
+        return label
 
-            try:
-                # First check for explicit parentheses tokens
-                if "LPAREN" in tokens and "RPAREN" in tokens:
-                    # Filter out parentheses tokens and handle inner expression
-                    inner_tokens = [
-                        token
-                        for token in token_list
-                        if "LPAREN" not in token and "RPAREN" not in token
-                    ]
-                    if "PLUS" in tokens:
-                        self._handle_addition(inner_tokens)
-                    elif "TIMES" in tokens:
-                        self._handle_multiplication(inner_tokens)
-                    elif "DIVIDE" in tokens:
-                        self._handle_division(inner_tokens)
-                    elif "NOT_EQUAL" in tokens:
-                        self._handle_not_equal(inner_tokens)
-                    # elif ''
-                    elif "INTEGER_DIVIDE" in tokens:
-                        self._handle_integer_division(inner_tokens)
-                    elif "EXP" in tokens:
-                        self._handle_exponentiation(inner_tokens)
-                    elif "MINUS" in tokens:
-                        self._handle_subtraction(inner_tokens)
-                    elif "GREATER_THAN" in tokens:
-                        self._handle_greater_than(inner_tokens)
-                    elif "LESS_THAN" in tokens:
-                        self._handle_less_than(inner_tokens)
-                    elif "GREATER_THAN_EQUAL" in tokens:
-                        self._handle_greater_than_equal(inner_tokens)
-                    elif "LESS_THAN_EQUAL" in tokens:
-                        self._handle_less_than_equal(inner_tokens)
-                    elif "EQUAL_TO" in tokens:
-                        self._handle_equal(inner_tokens)
-                        
-                # Then check for compound expressions
-                elif (
-                    parsed_line.startswith("(")
-                    and "=" in parsed_line
-                    and ("+" in parsed_line or "*" in parsed_line or "/" in parsed_line)
-                ):
-                    operator = None
-                    if "+" in parsed_line:
-                        operator = "PLUS"
-                    elif "*" in parsed_line:
-                        operator = "TIMES"
-                    elif "/" in parsed_line:
-                        operator = "DIVIDE"
-                    self._handle_compound_expression(token_list, operator)
-                elif "LBRACKET" in tokens:
-                    self._handle_list_operation(token_list)
-                elif "ASSIGNMENT" in tokens:
-                    self._handle_assignment(token_list)
-                elif "PLUS" in tokens:
-                    self._handle_addition(token_list)
-                elif "TIMES" in tokens:
-                    self._handle_multiplication(token_list)
-                elif "DIVIDE" in tokens:
-                    self._handle_division(token_list)
-                elif "NOT_EQUAL" in tokens:
-                    self._handle_not_equal(token_list)
-                elif "INTEGER_DIVIDE" in tokens:
-                    self._handle_integer_division(token_list)
-                elif "EXP" in tokens:
-                    self._handle_exponentiation(token_list)
-                elif "MINUS" in tokens:
-                    self._handle_subtraction(token_list)
-                else:
-                    self.assembly_code.append("# UNHANDLED OPERATION")
-                    continue
-            except Exception as e:
-                self.assembly_code.append(f"# ERROR: {str(e)}")
-                self.error_encountered = True
+    def generate(self, asts):
+        """
+        Generate assembly-like instructions from the parser's ASTs.
 
-            self.assembly_code.append("")
+        Lowering to IR, optimization and emission are separate stages; the IR
+        is kept in self.program.
 
+        :param asts: One AST per source line, None for lines that failed to parse
+        """
+        self.build(asts)
+        self.assembly_code = self.emitter.emit(self.program)
         return self.assembly_code
 
-    def _handle_compound_expression(self, tokens, operator):
-        """
-        Handles compound expressions like (h = (((1+2)+3)+4))
-        Ensures step-by-step computation before final storage.
-        """
-        var_name = tokens[0].split("/")[0]  # The variable being assigned
-        values = []  # List to store operand values
-        ops = []  # List to store operators
-
-        # Extract values and operators from the tokenized input
-        for token in tokens[2:]:  # Skip the variable name and assignment operator
-            if "/INT" in token or "/VAR" in token:
-                values.append(token.split("/")[0])  # Extract value
-            elif "/PLUS" in token:
-                ops.append("PLUS")
-            elif "/TIMES" in token:
-                ops.append("TIMES")
-            elif "/DIVIDE" in token:
-                ops.append("DIVIDE")
-            elif "/NOT_EQUAL" in token:
-                ops.append("NOT_EQUAL")
-            elif "/EXP" in token:
-                ops.append("EXP")
-            elif "/INTEGER_DIVIDE" in token:
-                ops.append("INTEGER_DIVIDE")
-            elif "/MINUS" in token:
-                ops.append("MINUS")
-            elif "/GREATER_THAN" in token:
-                ops.append("GREATER_THAN")
-            elif "/LESS_THAN" in token:
-                ops.append("LESS_THAN")
-            elif "/GREATER_THAN_EQUAL" in token:
-                ops.append("GREATER_THAN_EQUAL")
-            elif "/LESS_THAN_EQUAL" in token:
-                ops.append("LESS_THAN_EQUAL")
-            elif "/EQUAL_TO" in token:
-                ops.append("EQUAL_TO")
-            
-
-        # Ensure we process from left to right
-        r_left = self.get_register()
-        self.assembly_code.append(f"LD {r_left} {self._load_value(values[0])}")
-
-        for i in range(len(ops)):
-            r_right = self.get_register()
-            self.assembly_code.append(f"LD {r_right} {self._load_value(values[i + 1])}")
-
-            r_result = self.get_register()
-
-            if ops[i] == "PLUS":
-                self.assembly_code.append(f"ADD.i {r_result} {r_left} {r_right}")
-            elif ops[i] == "TIMES":
-                self.assembly_code.append(f"MUL.i {r_result} {r_left} {r_right}")
-            elif ops[i] == "DIVIDE":
-                self.assembly_code.append(f"DIV.i {r_result} {r_left} {r_right}")
-
-            r_left = r_result  # Carry result forward
-
-        # Store final computed value in the variable
-        self.assembly_code.append(f"ST @{var_name} {r_left}")
-
-    def _load_value(self, value):
-        """Returns correctly formatted value loading instruction"""
-        return (
-            f"#{value}"
-            if value.isdigit() or value.replace(".", "", 1).isdigit()
-            else f"@{value}"
+    def build(self, asts):
+        """
+        Lower and optimize the ASTs into self.program without rendering it,
+        for callers that stream the assembly with assembly_lines. Values that
+        do not fit the emitter's registers are then spilled to memory
+        (self.spilled counts them).
+
+        :param asts: One AST per source line, None for lines that failed to parse
+        """
+        if self.pass_manager is not None:
+            asts = self.pass_manager.run_ast(asts)
+        self.program = self.lower(asts)
+        if self.pass_manager is not None:
+            self.pass_manager.run(self.program)
+        self.spilled = self.emitter.spill(self.program)
+        return self.program
+
+    def assembly_lines(self):
+        """Generate the assembly of self.program line by line, without keeping it."""
+        return self.emitter.lines(self.program)
+
+    def stream(self, asts):
+        """
+        Lower, spill and hand out the program one statement at a time, for
+        callers that emit it as it goes (Emitter.statement_lines) without
+        keeping its IR. Only for unoptimized code: lowering keeps no value in
+        a register from one statement to the next, so each statement can be
+        allocated registers on its own, but the passes work on the whole
+        program. The ASTs are still needed up front for the types and the
+        data layout, which self.program keeps (self.spilled counts the
+        registers spilled).
+
+        :param asts: One AST per source line, None for lines that failed to parse
+        :return: Generator of the instructions of each statement
+        """
+        self._start(asts)
+        for line_number, ast in enumerate(asts, 1):
+            self._lower_line(line_number, ast)
+            if not self.program.instructions:
+                continue
+            statement = IRProgram(self.program.instructions, self.symbol_table)
+            statement.register_types = self.program.register_types
+            statement.layout = self.program.layout
+            self.spilled += self.emitter.spill(statement)
+            yield statement.instructions
+            self.program.instructions = []
+            self.program.register_types = {}
+
+    def lower(self, asts):
+        """Translate ASTs into an IRProgram over virtual registers."""
+        self._start(asts)
+        for line_number, ast in enumerate(asts, 1):
+            self._lower_line(line_number, ast)
+        return self.program
+
+    def _start(self, asts):
+        """Reset the state of lowering and work out the program-wide types and layout."""
+        self.program = IRProgram(symbol_table=self.symbol_table)
+        self.register_count = 0
+        self.label_count = 0
+        self.error_encountered = False
+        self.spilled = 0
+        self.types = TypeInference().infer(asts)
+        self.program.layout = DataLayout.build(
+            self.symbol_table, asts, self.types, self.target
         )
+        # Loops whose header compiled: header line -> (start label, end label, variable)
+        self.loops = {}
+        self.loop_headers = {end: header for header, end in self.types.loops.items()}
+        self.specializations = self._specializations(asts)
+        # (function name, argument types) -> label of the compiled body
+        self.entries = {}
+        # Parameter -> type while a function body is lowered, else None
+        self.parameters = None
+        # Where the results of the calls made so far in the statement are, in call order
+        self.call_results = deque()
+
+    def _lower_line(self, line_number, ast):
+        """Lower the statement on one source line, an error line if it does not compile."""
+        self.current_line = line_number
+
+        if ast is None:
+            self._emit("ERROR")
+            return
 
-    def _handle_parenthesis(self, tokens):
-        """
-        Handle expressions within parentheses by processing the inner expression.
-        Now handles nested expressions properly.
-        """
-        # Filter out the outer LPAREN/RPAREN tokens
-        inner_tokens = [
-            token for token in tokens if "LPAREN" not in token and "RPAREN" not in token
-        ]
-
-        # Check for assignment with expression
-        if any("ASSIGNMENT" in token for token in inner_tokens):
-            # Find position of ASSIGNMENT
-            assign_pos = next(
-                i for i, token in enumerate(inner_tokens) if "ASSIGNMENT" in token
+        try:
+            self._lower_statement(ast)
+        except Exception as e:
+            self.program.append(
+                Instruction(comment=f"ERROR: {str(e)}", line=line_number)
             )
-            var_name = inner_tokens[0].split("/")[0]
-
-            # Process right-hand side expression
-            right_tokens = inner_tokens[assign_pos + 1 :]
-
-            if any("PLUS" in token for token in right_tokens):
-                # Handle addition first
-                left_val = right_tokens[0].split("/")[0]
-                right_val = right_tokens[2].split("/")[0]
-
-                r_left = self.get_register()
-                r_right = self.get_register()
-                r_result = self.get_register()
-
-                self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-                self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-                self.assembly_code.append(f"ADD.i {r_result} {r_left} {r_right}")
-                self.assembly_code.append(f"ST @{var_name} {r_result}")
-
-            elif any("TIMES" in token for token in right_tokens):
-                # Handle multiplication first
-                left_val = right_tokens[0].split("/")[0]
-                right_val = right_tokens[2].split("/")[0]
-
-                r_left = self.get_register()
-                r_right = self.get_register()
-                r_result = self.get_register()
-
-                self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-                self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-                self.assembly_code.append(f"MUL.i {r_result} {r_left} {r_right}")
-                self.assembly_code.append(f"ST @{var_name} {r_result}")
-
-            elif any("DIVIDE" in token for token in right_tokens):
-                # Handle division first
-                left_val = right_tokens[0].split("/")[0]
-                right_val = right_tokens[2].split("/")[0]
-
-                r_left = self.get_register()
-                r_right = self.get_register()
-                r_result = self.get_register()
-
-                self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-                self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-                self.assembly_code.append(f"DIV.i {r_result} {r_left} {r_right}")
-                self.assembly_code.append(f"ST @{var_name} {r_result}")
-
-            elif any("NOT_EQUAL" in token for token in right_tokens):
-                # Handle not equal first
-                left_val = right_tokens[0].split("/")[0]
-                right_val = right_tokens[2].split("/")[0]
-
-                r_left = self.get_register()
-                r_right = self.get_register()
-                r_result = self.get_register()
-
-                self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-                self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-                self.assembly_code.append(f"NE.i {r_result} {r_left} {r_right}")
-                self.assembly_code.append(f"ST @{var_name} {r_result}")
-
-            elif any("EXP" in token for token in right_tokens):
-                # Handle exponentiation first
-                left_val = right_tokens[0].split("/")[0]
-                right_val = right_tokens[2].split("/")[0]
-
-                r_left = self.get_register()
-                r_right = self.get_register()
-                r_result = self.get_register()
-
-                self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-                self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-                self.assembly_code.append(f"EXP.i {r_result} {r_left} {r_right}")
-                self.assembly_code.append(f"ST @{var_name} {r_result}")
-
-            elif any("MINUS" in token for token in right_tokens):
-                # Handle subtraction first
-                left_val = right_tokens[0].split("/")[0]
-                right_val = right_tokens[2].split("/")[0]
-
-                r_left = self.get_register()
-                r_right = self.get_register()
-                r_result = self.get_register()
-
-                self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-                self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-                self.assembly_code.append(f"SUB.i {r_result} {r_left} {r_right}")
-                self.assembly_code.append(f"ST @{var_name} {r_result}")
-            
-            
+            self.error_encountered = True
+
+    def _emit(self, opcode, *operands):
+        if opcode not in MARKERS and not self.target.has(opcode):
+            raise ValueError(f"{opcode} is not available on target '{self.target.name}'")
+        self.program.append(Instruction(opcode, list(operands), line=self.current_line))
+
+    def _lower_statement(self, ast):
+        """Lower one top-level statement; bare expressions are printed."""
+        if self.current_line in self.types.errors:
+            raise ValueError(self.types.errors[self.current_line])
+        if isinstance(ast, tuple) and ast[0] == "def":
+            self._lower_function(ast)
+            return
+        self._lower_calls(statement_calls(ast))
+        if isinstance(ast, tuple) and ast[0] in ("repeat", "for"):
+            self._lower_loop(ast)
+        elif ast == ("end",):
+            self._lower_loop_end()
+        elif isinstance(ast, tuple) and ast[0] == "=":
+            _, var_name, expr = ast
+            if isinstance(expr, tuple) and expr[0] == "list_decl":
+                self._lower_list_initialization(var_name, expr[1], expr[2])
+            elif isinstance(expr, tuple) and expr[0] == "list_op":
+                self._lower_list_operation(var_name, *expr[1:])
+            elif isinstance(expr, tuple) and expr[0] == "list_slice":
+                self._lower_list_slice(var_name, *expr[1:])
             else:
-                # Simple assignment
-                value = right_tokens[0].split("/")[0]
-                r_val = self.get_register()
-                self.assembly_code.append(f"LD {r_val} {self._load_value(value)}")
-                self.assembly_code.append(f"ST @{var_name} {r_val}")
-
+                r_value, _ = self._lower_expression(expr)
+                self._emit("ST", f"@{var_name}", r_value)
+        elif isinstance(ast, tuple) and ast[0] == "list_assign":
+            self._lower_list_element_assignment(ast)
         else:
-            # Handle non-assignment expressions
-            if any("PLUS" in token for token in inner_tokens):
-                self._handle_addition(inner_tokens)
-            elif any("TIMES" in token for token in inner_tokens):
-                self._handle_multiplication(inner_tokens)
-            elif any("DIVIDE" in token for token in inner_tokens):
-                self._handle_division(inner_tokens)
-            elif any("NOT_EQUAL" in token for token in inner_tokens):
-                self._handle_not_equal(inner_tokens)
-            elif any("EXP" in token for token in inner_tokens):
-                self._handle_exponentiation(inner_tokens)
-            elif any("INTEGER_DIVIDE" in token for token in inner_tokens):
-                self._handle_integer_division(inner_tokens)
-            elif any("MINUS" in token for token in inner_tokens):
-                self._handle_subtraction(inner_tokens)
+            r_value, _ = self._lower_expression(ast)
+            self._emit("ST", "@print", r_value)
+
+    def _lower_loop(self, ast):
+        """
+        Handle the head of a loop (repeat n {, for i in a..b {)
+
+        The number of iterations is worked out once, n or b - a and at
+        least 0, and kept in the loop's counter (see loop_counter); a for
+        loop also stores a into i. Each iteration then starts at
+        LABEL Ls, leaving through BZ to Le once the counter is down to zero
+        and counting it down otherwise. The code is the same whatever the
+        number of iterations, and so is the code of the body.
+        """
+        line = self.current_line
+        bounds = ast[1:] if ast[0] == "repeat" else ast[2:]
+        for bound in bounds:
+            if self.types.expression_type(bound, line) != "INT":
+                raise ValueError(f"Loop bounds must be integers, got {bound}")
+
+        if ast[0] == "repeat":
+            count = ast[1]
+            if isinstance(count, int):
+                r_count = self._load(f"#{max(count, 0)}", "INT")
             else:
-                self.assembly_code.append("# UNHANDLED OPERATION")
-                return
-
-    def _handle_assignment(self, tokens):
-        """
-        Handle variable assignment operations.
-        """
-        var_name = tokens[0].split("/")[0]
-        value = tokens[-1].split("/")[0]
-
-        r_val = self.get_register()
-        self.assembly_code.append(f"LD {r_val} {self._load_value(value)}")
-        self.assembly_code.append(f"ST @{var_name} {r_val}")
-
-    def _handle_addition(self, tokens):
-        """
-        Handle chained addition operations properly.
-        """
-        values = [t.split("/")[0] for t in tokens if "/INT" in t]
-
-        if len(values) < 2:
-            self.assembly_code.append("# ERROR: Addition requires at least two values")
-            return
-
-        # Load first two values and perform the first addition
-        r_prev = self.get_register()
-        self.assembly_code.append(f"LD {r_prev} {self._load_value(values[0])}")
-
-        for val in values[1:]:
-            r_next = self.get_register()
-            self.assembly_code.append(f"LD {r_next} {self._load_value(val)}")
-            r_result = self.get_register()
-            self.assembly_code.append(f"ADD.i {r_result} {r_prev} {r_next}")
-            r_prev = r_result  # Store result in previous register for next addition
-
-        # Final result stored in variable
-        self.assembly_code.append(f'ST @{tokens[0].split("/")[0]} {r_prev}')
-
-    def _handle_subtraction(self, tokens):
-        """
-        Handle subtraction operations.
-        """
-        left_val, left_type = tokens[0].split("/")[0], tokens[0].split("/")[1]
-        right_val, right_type = tokens[2].split("/")[0], tokens[2].split("/")[1]
-
-        r_left = self.get_register()
-        r_right = self.get_register()
-        r_result = self.get_register()
-
-        self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-        self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-
-        if left_type == "REAL" or right_type == "REAL":
-            if left_type == "INT":
-                self.assembly_code.append(f"FL.i {r_left} {r_left}")
-            if right_type == "INT":
-                self.assembly_code.append(f"FL.i {r_right} {r_right}")
-            self.assembly_code.append(f"SUB.f {r_result} {r_left} {r_right}")
+                r_count = self._positive(self._lower_expression(count)[0])
         else:
-            self.assembly_code.append(f"SUB.i {r_result} {r_left} {r_right}")
-
-        self.assembly_code.append(f"ST @print {r_result}")
-
-    def _handle_multiplication(self, tokens):
-        """
-        Handle multiplication operations.
-        """
-        left_val, left_type = tokens[0].split("/")[0], tokens[0].split("/")[1]
-        right_val, right_type = tokens[2].split("/")[0], tokens[2].split("/")[1]
-
-        r_left = self.get_register()
-        r_right = self.get_register()
-        r_result = self.get_register()
-
-        self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-        self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-
-        if left_type == "REAL" or right_type == "REAL":
-            if left_type == "INT":
-                self.assembly_code.append(f"FL.i {r_left} {r_left}")
-            if right_type == "INT":
-                self.assembly_code.append(f"FL.i {r_right} {r_right}")
-            self.assembly_code.append(f"MUL.f {r_result} {r_left} {r_right}")
+            _, var_name, start, end = ast
+            r_start, _ = self._lower_expression(start)
+            if isinstance(start, int) and isinstance(end, int):
+                r_count = self._load(f"#{max(end - start, 0)}", "INT")
+            else:
+                r_end, _ = self._lower_expression(end)
+                r_count = self._positive(self._operation("SUB.i", r_end, r_start, "INT"))
+            self._emit("ST", f"@{var_name}", r_start)
+        counter = f"@{loop_counter(line)}"
+        self._emit("ST", counter, r_count)
+        if not self.loops:
+            # Reals first assigned in the loop read as 0.0 when it runs no times
+            for name, value_type in self.types.first_assigned(line).items():
+                if value_type == "REAL":
+                    self._emit("ST", f"@{name}", self._load("#0.0", "REAL"))
+
+        start_label, end_label = self.get_label(), self.get_label()
+        self.loops[line] = (start_label, end_label, ast[1] if ast[0] == "for" else None)
+        self._emit("LABEL", start_label)
+        r_left = self._load(counter, "INT")
+        self._emit("BZ", r_left, end_label)
+        r_one = self._load("#1", "INT")
+        self._emit("ST", counter, self._operation("SUB.i", r_left, r_one, "INT"))
+
+    def _positive(self, r_value):
+        """max(value, 0) of an integer register, as value * (value > 0)."""
+        if self.target.has("GT.i"):
+            r_zero = self._load("#0", "INT")
+            r_positive = self._operation("GT.i", r_value, r_zero, "INT")
         else:
-            self.assembly_code.append(f"MUL.i {r_result} {r_left} {r_right}")
-
-        self.assembly_code.append(f"ST @print {r_result}")
-
-    def _handle_division(self, tokens):
-        """
-        Handle division operations.
-        """
-        left_val, left_type = tokens[0].split("/")[0], tokens[0].split("/")[1]
-        right_val, right_type = tokens[2].split("/")[0], tokens[2].split("/")[1]
-
-        r_left = self.get_register()
-        r_right = self.get_register()
-        r_result = self.get_register()
-
-        self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-        self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-
-        if left_type == "REAL" or right_type == "REAL":
-            if left_type == "INT":
-                self.assembly_code.append(f"FL.i {r_left} {r_left}")
-            if right_type == "INT":
-                self.assembly_code.append(f"FL.i {r_right} {r_right}")
-            self.assembly_code.append(f"DIV.f {r_result} {r_left} {r_right}")
+            # Integers compare exactly as reals on targets without .i comparisons
+            r_real = self._to_real(r_value, "INT")
+            r_zero = self._load("#0.0", "REAL")
+            r_positive = self._operation("GT.f", r_real, r_zero, "INT")
+        return self._operation("MUL.i", r_value, r_positive, "INT")
+
+    def _lower_loop_end(self):
+        """
+        Handle the end of a loop (})
+
+        A for loop steps its variable, then BR goes back to the loop's
+        start and the loop's end label follows.
+        """
+        header = self.loop_headers[self.current_line]
+        if header not in self.loops:
+            raise ValueError("The loop closed here did not compile")
+        start_label, end_label, var_name = self.loops.pop(header)
+        if var_name is not None:
+            r_value = self._load(f"@{var_name}", "INT")
+            r_one = self._load("#1", "INT")
+            self._emit("ST", f"@{var_name}", self._operation("ADD.i", r_value, r_one, "INT"))
+        self._emit("BR", start_label)
+        self._emit("LABEL", end_label)
+
+    def _specializations(self, asts):
+        """
+        Function name -> the combinations of argument types it is called
+        with, by the program or, in turn, by the bodies of called functions.
+        """
+        found = {}
+        pending = []
+
+        def visit(call_list, line, parameters):
+            for call, _ in call_list:
+                name, _, arguments, _ = call
+                argument_types = tuple(
+                    self.types.expression_type(argument, line, parameters)
+                    for argument in arguments
+                )
+                if argument_types not in found.setdefault(name, []):
+                    found[name].append(argument_types)
+                    pending.append((name, argument_types))
+
+        for line, ast in enumerate(asts, 1):
+            if line in self.types.errors or (isinstance(ast, tuple) and ast[0] == "def"):
+                continue
+            visit(statement_calls(ast), line, None)
+        while pending:
+            name, argument_types = pending.pop()
+            line, parameters, body = self.types.functions[name]
+            visit(calls(body), line, dict(zip(parameters, argument_types)))
+        return found
+
+    def _lower_function(self, ast):
+        """
+        Handle a function definition (def f(a, b) = a * b)
+
+        The body is compiled once for each combination of argument types
+        it is called with, behind a BR that jumps over all of them: LABEL
+        Lf, the body reading its arguments from the parameter variables
+        and storing its value to the function's own variable @f, then RET.
+        A function never called (the inliner may have replaced every call)
+        leaves no code. A body that does not compile for some argument
+        types is left out, and the calls needing it fail instead.
+        """
+        _, name, parameters, body = ast
+        if not self.specializations.get(name):
+            return
+        skip_label = self.get_label()
+        self._emit("BR", skip_label)
+        for argument_types in self.specializations[name]:
+            start = len(self.program.instructions)
+            entry = self.get_label()
+            self.parameters = dict(zip(parameters, argument_types))
+            try:
+                self._emit("LABEL", entry)
+                self._lower_calls(statement_calls(ast))
+                r_value, _ = self._lower_expression(body)
+                self._emit("ST", f"@{name}", r_value)
+                self._emit("RET")
+                self.entries[(name, argument_types)] = entry
+            except Exception as e:
+                del self.program.instructions[start:]
+                self.program.append(
+                    Instruction(
+                        comment=f"ERROR: {str(e)} in {name}({', '.join(argument_types)})",
+                        line=self.current_line,
+                    )
+                )
+                self.error_encountered = True
+            finally:
+                self.parameters = None
+        self._emit("LABEL", skip_label)
+
+    def _lower_calls(self, call_list):
+        """
+        Make the calls of a statement before the rest of it (see calls),
+        so that no register is live across a CALL.
+
+        Each argument is stored to its parameter variable as soon as it is
+        computed; the function leaves its value in its own variable, which
+        is copied to a call_result if another call comes before it is read.
+        _lower_expression then takes the results in call order.
+        """
+        self.call_results = deque()
+        for index, (call, kept) in enumerate(call_list):
+            name, _, arguments, _ = call
+            line, parameters, _ = self.types.functions[name]
+            argument_types = []
+            for parameter, argument in zip(parameters, arguments):
+                r_argument, argument_type = self._lower_expression(argument)
+                self._emit("ST", f"@{parameter_variable(line, parameter)}", r_argument)
+                argument_types.append(argument_type)
+            entry = self.entries.get((name, tuple(argument_types)))
+            if entry is None:
+                raise ValueError(
+                    f"Function '{name}' did not compile for ({', '.join(argument_types)})"
+                )
+            self._emit("CALL", entry)
+            result = f"@{name}"
+            if kept:
+                r_result = self._load(result, self._expression_type(call))
+                result = f"@{call_result(self.current_line, index)}"
+                self._emit("ST", result, r_result)
+            self.call_results.append(result)
+
+    def _expression_type(self, expr):
+        """Type of an expression on the current line, or in the function body being lowered."""
+        return self.types.expression_type(expr, self.current_line, self.parameters)
+
+    def _lower_expression(self, expr):
+        """
+        Lower an expression tree.
+
+        :return: (register holding the value, "INT" or "REAL")
+        """
+        if isinstance(expr, bool):
+            raise ValueError(f"Unsupported expression {expr}")
+        if isinstance(expr, int):
+            return self._load(f"#{expr}", "INT"), "INT"
+        if isinstance(expr, float):
+            return self._load(f"#{expr}", "REAL"), "REAL"
+        if isinstance(expr, str):
+            if self.parameters is not None:
+                value_type = self.parameters[expr]
+                variable = parameter_variable(self.current_line, expr)
+                return self._load(f"@{variable}", value_type), value_type
+            if self.types.is_list(expr, self.current_line):
+                # A list reads as its base address
+                return self._load(f"#{self.program.layout.list_address(expr)}", "INT"), "INT"
+            value_type = self.types.variable_type(expr, self.current_line)
+            return self._load(f"@{expr}", value_type), value_type
+        if isinstance(expr, tuple) and len(expr) == 4 and expr[1] == "[":
+            return self._lower_list_access(expr[0], expr[2])
+        if isinstance(expr, tuple) and len(expr) == 4 and expr[1] == "(":
+            # The call was made before the statement (see _lower_calls)
+            value_type = self._expression_type(expr)
+            return self._load(self.call_results.popleft(), value_type), value_type
+        if isinstance(expr, tuple) and len(expr) == 3:
+            return self._lower_binary(*expr)
+        raise ValueError(f"Unsupported expression {expr}")
+
+    def _load(self, source, value_type):
+        r_value = self.get_register()
+        self._emit("LD", r_value, source)
+        self.program.register_types[r_value] = value_type
+        return r_value
+
+    def _lower_operand(self, expr, operand_type):
+        """
+        Lower an operand of an operation done in `operand_type`.
+
+        Integer literals used as reals are converted at compile time, so
+        only values that are integers at run time need an FL.i.
+        """
+        if operand_type == "REAL" and isinstance(expr, int) and not isinstance(expr, bool):
+            return self._load(format_immediate(to_float32(expr)), "REAL")
+        r_value, value_type = self._lower_expression(expr)
+        if operand_type == "REAL":
+            return self._to_real(r_value, value_type)
+        return r_value
+
+    def _lower_binary(self, operator, left, right):
+        left_type = self._expression_type(left)
+        right_type = self._expression_type(right)
+        operand_type = "REAL" if "REAL" in (left_type, right_type) else "INT"
+        suffix = ".f" if operand_type == "REAL" else ".i"
+
+        if operator == "//":
+            # DIV.i truncates whatever its operands are, so no conversion is needed
+            r_left, _ = self._lower_expression(left)
+            r_right, _ = self._lower_expression(right)
+            return self._operation("DIV.i", r_left, r_right, "INT"), "INT"
+
+        if operator in COMPARISON_OPCODES:
+            if not self.target.has(COMPARISON_OPCODES[operator] + suffix):
+                # Integers compare exactly as reals on targets without .i comparisons
+                operand_type, suffix = "REAL", ".f"
+            opcode = COMPARISON_OPCODES[operator] + suffix
+            result_type = "INT"
+        elif operator in ARITHMETIC_OPCODES:
+            opcode = ARITHMETIC_OPCODES[operator] + suffix
+            result_type = operand_type
         else:
-            self.assembly_code.append(f"DIV.i {r_result} {r_left} {r_right}")
+            raise ValueError(f"Unsupported operator '{operator}'")
 
-        self.assembly_code.append(f"ST @print {r_result}")
+        r_left = self._lower_operand(left, operand_type)
+        r_right = self._lower_operand(right, operand_type)
+        return self._operation(opcode, r_left, r_right, result_type), result_type
 
-    def _handle_not_equal(self, tokens):
-        """
-        Handle not equal (!=) operations.
-        LD R1 @x
-        FL.i R0 R0
-        FL.i R1 R1
-        NE.f R2 R0 R1
-        ST @print R2
-        """
-        left_val, left_type = tokens[0].split("/")[0], tokens[0].split("/")[1]
-        right_val, right_type = tokens[2].split("/")[0], tokens[2].split("/")[1]
-
-        r_left = self.get_register()
-        r_right = self.get_register()
+    def _operation(self, opcode, r_left, r_right, result_type):
         r_result = self.get_register()
+        self._emit(opcode, r_result, r_left, r_right)
+        self.program.register_types[r_result] = result_type
+        return r_result
+
+    def _to_real(self, register, value_type):
+        """Convert an integer register to a real with FL.i."""
+        if value_type == "REAL":
+            return register
+        r_real = self.get_register()
+        self._emit("FL.i", r_real, register)
+        self.program.register_types[r_real] = "REAL"
+        return r_real
+
+    def _element_width(self, var_name):
+        """Bytes per element of the list the variable names on the current line."""
+        element_type = self.types.element_type(var_name, self.current_line)
+        return self.target.element_width(element_type or DEFAULT_ELEMENT_TYPE)
+
+    def _memory_opcode(self, opcode, var_name):
+        """LD, ST or FILL for the list's elements; byte-wide elements use the .b forms."""
+        return f"{opcode}.b" if self._element_width(var_name) == 1 else opcode
+
+    def _element_address(self, var_name, index, size=None):
+        """
+        Build the address operand of element `index` of a list.
+
+        Lists have static addresses (see DataLayout), so the operand names
+        the list and the emitter resolves it: literal indices (already
+        bounds-checked by the parser) fold into a displacement, [@x+8]; an
+        index held in a register uses the scaled form, [@x+R1*4]. The
+        stride is the width of the list's elements (`size` bytes, by default
+        looked up for the current line). Where the target lacks the mode,
+        the address is computed into a register and used register-indirect.
+        """
+        if size is None:
+            size = self._element_width(var_name)
+        base = self.program.layout.list_address(var_name)
+        if isinstance(index, int):
+            if self.target.supports("displacement"):
+                return f"[@{var_name}+{index * size}]"
+            r_address = self._load(f"#{base + index * size}", "INT")
+        elif self.target.supports("scaled_index"):
+            return f"[@{var_name}+{index}*{size}]"
+        else:
+            r_offset = self._operation("MUL.i", index, self._load(f"#{size}", "INT"), "INT")
+            r_address = self._operation(
+                "ADD.i", self._load(f"#{base}", "INT"), r_offset, "INT"
+            )
+        if not self.target.supports("register"):
+            raise ValueError(f"Target '{self.target.name}' cannot address list elements")
+        return r_address
 
-        self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-        self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-
-        if left_type == "INT" or left_type == "VAR":
-            self.assembly_code.append(f"FL.i {r_left} {r_left}")
-        if right_type == "INT" or right_type == "VAR":
-            self.assembly_code.append(f"FL.i {r_right} {r_right}")
-        self.assembly_code.append(f"NE.f {r_result} {r_left} {r_right}")
-
-        self.assembly_code.append(f"ST @print {r_result}")
-
-    def _handle_less_than(self, tokens):
-        """
-        Handle less than (<) operations.
-        """
-        left_val, left_type = tokens[0].split("/")[0], tokens[0].split("/")[1]
-        right_val, right_type = tokens[2].split("/")[0], tokens[2].split("/")[1]
-
-        r_left = self.get_register()
-        r_right = self.get_register()
-        r_result = self.get_register()
-
-        self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-        self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-
-        if left_type == "INT" or left_type == "VAR":
-            self.assembly_code.append(f"FL.i {r_left} {r_left}")
-        if right_type == "INT" or right_type == "VAR":
-            self.assembly_code.append(f"FL.i {r_right} {r_right}")
-        self.assembly_code.append(f"LT.f {r_result} {r_left} {r_right}")
-
-        self.assembly_code.append(f"ST @print {r_result}")
-
-    def _handle_greater_than(self, tokens):
-        """
-        Handle greater than (>) operations.
-        """
-        left_val, left_type = tokens[0].split("/")[0], tokens[0].split("/")[1]
-        right_val, right_type = tokens[2].split("/")[0], tokens[2].split("/")[1]
-
-        r_left = self.get_register()
-        r_right = self.get_register()
-        r_result = self.get_register()
-
-        self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-        self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-
-        if left_type == "INT" or left_type == "VAR":
-            self.assembly_code.append(f"FL.i {r_left} {r_left}")
-        if right_type == "INT" or right_type == "VAR":
-            self.assembly_code.append(f"FL.i {r_right} {r_right}")
-        self.assembly_code.append(f"GT.f {r_result} {r_left} {r_right}")
-
-        self.assembly_code.append(f"ST @print {r_result}")
-
-    def _handle_less_than_equal(self, tokens):
-        """
-        Handle less than or equal (<=) operations.
-        """
-        left_val, left_type = tokens[0].split("/")[0], tokens[0].split("/")[1]
-        right_val, right_type = tokens[2].split("/")[0], tokens[2].split("/")[1]
-
-        r_left = self.get_register()
-        r_right = self.get_register()
-        r_result = self.get_register()
-
-        self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-        self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-
-        if left_type == "INT" or left_type == "VAR":
-            self.assembly_code.append(f"FL.i {r_left} {r_left}")
-        if right_type == "INT" or right_type == "VAR":
-            self.assembly_code.append(f"FL.i {r_right} {r_right}")
-        self.assembly_code.append(f"LE.f {r_result} {r_left} {r_right}")
+    def _element_index(self, index):
+        """A literal index as it is; a loop variable (x[i]) is loaded into a register."""
+        if isinstance(index, str):
+            return self._load(f"@{index}", "INT")
+        return index
 
-        self.assembly_code.append(f"ST @print {r_result}")
+    def _element_type(self, var_name):
+        """INT or REAL, the type of the list's elements on the current line."""
+        element_type = self.types.element_type(var_name, self.current_line)
+        return "REAL" if element_type == "real" else "INT"
 
-    def _handle_greater_than_equal(self, tokens):
+    def _lower_list_initialization(self, var_name, size, element_type):
         """
-        Handle greater than or equal (>=) operations.
-        """
-        left_val, left_type = tokens[0].split("/")[0], tokens[0].split("/")[1]
-        right_val, right_type = tokens[2].split("/")[0], tokens[2].split("/")[1]
-
-        r_left = self.get_register()
-        r_right = self.get_register()
-        r_result = self.get_register()
-
-        self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-        self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
+        Handle list initialization (x = list[2], x = list[2] of int8)
 
-        if left_type == "INT" or left_type == "VAR":
-            self.assembly_code.append(f"FL.i {r_left} {r_left}")
-        if right_type == "INT" or right_type == "VAR":
-            self.assembly_code.append(f"FL.i {r_right} {r_right}")
-        self.assembly_code.append(f"GE.f {r_result} {r_left} {r_right}")
-
-        self.assembly_code.append(f"ST @print {r_result}")
-
-    def _handle_equal(self, tokens):
+        FILL [@x] Rv Rn stores Rv into Rn consecutive elements starting
+        at the list's address, so the code size does not depend on the list
+        size; FILL.b does the same for byte-wide elements. Targets without
+        the fill get one store per element.
         """
-        Handle equal (==) operations.
-        """
-        left_val, left_type = tokens[0].split("/")[0], tokens[0].split("/")[1]
-        right_val, right_type = tokens[2].split("/")[0], tokens[2].split("/")[1]
-
-        r_left = self.get_register()
-        r_right = self.get_register()
-        r_result = self.get_register()
-
-        self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-        self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-
-        if left_type == "INT" or left_type == "VAR":
-            self.assembly_code.append(f"FL.i {r_left} {r_left}")
-        if right_type == "INT" or right_type == "VAR":
-            self.assembly_code.append(f"FL.i {r_right} {r_right}")
-        self.assembly_code.append(f"EQ.f {r_result} {r_left} {r_right}")
-
-        self.assembly_code.append(f"ST @print {r_result}")
-
-    def _handle_integer_division(self, tokens):
-        # //
-        left_val, left_type = tokens[0].split("/")[0], tokens[0].split("/")[1]
-        right_val, right_type = tokens[2].split("/")[0], tokens[2].split("/")[1]
-
-        r_left = self.get_register()
-        r_right = self.get_register()
-        r_result = self.get_register()
-
-        self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-        self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-
-        if left_type == "REAL" or right_type == "REAL":
-            if left_type == "INT":
-                self.assembly_code.append(f"FL.i {r_left} {r_left}")
-            if right_type == "INT":
-                self.assembly_code.append(f"FL.i {r_right} {r_right}")
-            self.assembly_code.append(f"DIV.i {r_result} {r_left} {r_right}")
-        else:
-            self.assembly_code.append(f"DIV.i {r_result} {r_left} {r_right}")
-
-        self.assembly_code.append(f"ST @print {r_result}")
-
-    def _handle_exponentiation(self, tokens):
-        # ^
-        left_val, left_type = tokens[0].split("/")[0], tokens[0].split("/")[1]
-        right_val, right_type = tokens[2].split("/")[0], tokens[2].split("/")[1]
-
-        r_left = self.get_register()
-        r_right = self.get_register()
-        r_result = self.get_register()
-
-        self.assembly_code.append(f"LD {r_left} {self._load_value(left_val)}")
-        self.assembly_code.append(f"LD {r_right} {self._load_value(right_val)}")
-
-        if left_type == "REAL" or right_type == "REAL":
-            if left_type == "INT":
-                self.assembly_code.append(f"FL.i {r_left} {r_left}")
-            if right_type == "INT":
-                self.assembly_code.append(f"FL.i {r_right} {r_right}")
-            self.assembly_code.append(f"EXP.f {r_result} {r_left} {r_right}")
-        else:
-            self.assembly_code.append(f"EXP.i {r_result} {r_left} {r_right}")
-
-    def _handle_list_operation(self, tokens):
-        """
-        Handle all list operations including:
-        1. List initialization: x = list[2]
-        2. List element access: x[1]
-        3. List element assignment: x[1] = 2
-        4. List element arithmetic: x[0] + x[1], x[0] + 2
-        """
-        token_str = " ".join(tokens)
-
-        if "ASSIGNMENT" in token_str and "list" in token_str:
-            # Case 1: List initialization
-            self._handle_list_initialization(tokens)
-        elif "ASSIGNMENT" in token_str and "[" in token_str:
-            # Case 3: List element assignment
-            self._handle_list_element_assignment(tokens)
-        elif "PLUS" in token_str and "[" in token_str:
-            # Case 4: List element arithmetic
-            if token_str.count("[") == 2:
-                # Case: x[0] + x[1]
-                self._handle_list_element_addition(tokens)
-            else:
-                # Case: x[0] + 2
-                self._handle_list_scalar_addition(tokens)
+        # The declaration itself is on this line, so the list type is not in effect yet
+        if element_type == "real":
+            r_value = self._load("#0.0", "REAL")
         else:
-            # Case 2: Simple list element access
-            self._handle_list_access(tokens)
-
-    def _handle_list_initialization(self, tokens):
-        """Handle list initialization (x = list[2])"""
-        var_name = tokens[0].split("/")[0]
-        size = tokens[4].split("/")[0]
+            r_value = self._load("#0", "INT")
+        width = self.target.element_width(element_type)
+        fill, store = ("FILL.b", "ST.b") if width == 1 else ("FILL", "ST")
+        if not self.target.has(fill):
+            for index in range(size):
+                address = self._element_address(var_name, index, width)
+                self._emit(store, address, r_value)
+            return
+        r_count = self._load(f"#{size}", "INT")
+        self._emit(fill, f"[@{var_name}]", r_value, r_count)
 
-        r_value = self.get_register()
-        r_base = self.get_register()
-        r_index = self.get_register()
-        r_size = self.get_register()
-        r_offset = self.get_register()
-        r_addr = self.get_register()
-
-        self.assembly_code.append(f"LD {r_value} #0")
-        self.assembly_code.append(f"LD {r_base} @{var_name}")
-
-        for i in range(int(size)):
-            self.assembly_code.append(f"LD {r_index} #{i}")
-            self.assembly_code.append(f"LD {r_size} #4")
-            self.assembly_code.append(f"MUL.i {r_offset} {r_index} {r_size}")
-            self.assembly_code.append(f"ADD.i {r_addr} {r_base} {r_offset}")
-            self.assembly_code.append(f"ST {r_addr} {r_value}")
-
-    def _handle_list_access(self, tokens):
+    def _lower_list_access(self, var_name, index):
         """Handle list element access (x[1])"""
-        var_name = tokens[0].split("/")[0]
-        index = tokens[2].split("/")[0]
-
-        r_base = self.get_register()
-        r_index = self.get_register()
-        r_size = self.get_register()
-        r_offset = self.get_register()
-        r_addr = self.get_register()
+        value_type = self._element_type(var_name)
         r_value = self.get_register()
+        address = self._element_address(var_name, self._element_index(index))
+        self._emit(self._memory_opcode("LD", var_name), r_value, address)
+        self.program.register_types[r_value] = value_type
+        return r_value, value_type
 
-        self.assembly_code.append(f"LD {r_base} @{var_name}")
-        self.assembly_code.append(f"LD {r_index} #{index}")
-        self.assembly_code.append(f"LD {r_size} #4")
-        self.assembly_code.append(f"MUL.i {r_offset} {r_index} {r_size}")
-        self.assembly_code.append(f"ADD.i {r_addr} {r_base} {r_offset}")
-        self.assembly_code.append(f"LD {r_value} {r_addr}")
-        self.assembly_code.append(f"ST @print {r_value}")
-
-    def _handle_list_element_assignment(self, tokens):
+    def _lower_list_element_assignment(self, ast):
         """Handle list element assignment (x[1] = 2)"""
-        var_name = tokens[0].split("/")[0]
-        index = tokens[2].split("/")[0]
-        value = tokens[-1].split("/")[0]
-
-        r_base = self.get_register()
-        r_index = self.get_register()
-        r_size = self.get_register()
-        r_offset = self.get_register()
-        r_addr = self.get_register()
-        r_value = self.get_register()
+        _, var_name, index, value = ast
+
+        r_value = self._lower_operand(value, self._element_type(var_name))
+        address = self._element_address(var_name, self._element_index(index))
+        self._emit(self._memory_opcode("ST", var_name), address, r_value)
+
+    def _lower_list_operation(self, var_name, operator, left, right, size, element_type):
+        """
+        Handle whole-list arithmetic (z = x + y, z = x * 2)
+
+        Word elements go through the target's vector opcodes, vector_lanes
+        elements per instruction, with the remaining elements done one by
+        one. Numbers are loaded once and used in every lane. Byte elements
+        and targets without the vector opcode (or displacement addressing)
+        only get the element-by-element code. Where int8 elements take a
+        word (see Target.element_width), each result is wrapped to int8 before
+        it is stored, as ST.b would.
+        """
+        value_type = "REAL" if element_type == "real" else "INT"
+        opcode = ARITHMETIC_OPCODES[operator] + (".f" if value_type == "REAL" else ".i")
+        width = self.target.element_width(element_type)
+        load, store = ("LD.b", "ST.b") if width == 1 else ("LD", "ST")
+        # (list name, None) or (None, register holding the number)
+        operands = [
+            (operand, None) if isinstance(operand, str)
+            else (None, self._lower_operand(operand, value_type))
+            for operand in (left, right)
+        ]
 
-        self.assembly_code.append(f"LD {r_base} @{var_name}")
-        self.assembly_code.append(f"LD {r_index} #{index}")
-        self.assembly_code.append(f"LD {r_size} #4")
-        self.assembly_code.append(f"MUL.i {r_offset} {r_index} {r_size}")
-        self.assembly_code.append(f"ADD.i {r_addr} {r_base} {r_offset}")
-        self.assembly_code.append(f"LD {r_value} #{value}")
-        self.assembly_code.append(f"ST {r_addr} {r_value}")
-
-    def _handle_list_element_addition(self, tokens):
-        """Handle addition of two list elements (x[0] + x[1])"""
-        var_name = tokens[0].split("/")[0]
-
-        # Parse indices correctly from tokens
-        # Find the indices by looking for the INT tokens that follow LBRACKET
-        indices = []
-        for i, token in enumerate(tokens):
-            if "/LBRACKET" in token and i + 1 < len(tokens):
-                next_token = tokens[i + 1]
-                if "/INT" in next_token:
-                    indices.append(next_token.split("/")[0])
-
-        if len(indices) != 2:
-            self.assembly_code.append("# ERROR: Invalid list indices")
+        lanes = self.target.vector_lanes
+        vectorized = 0
+        if (
+            width == ELEMENT_WIDTHS["int32"]
+            and self.target.has(f"V{opcode}")
+            and self.target.supports("displacement")
+        ):
+            vectorized = size - size % lanes
+        for index in range(0, vectorized, lanes):
+            sources = [
+                f"[@{name}+{index * width}]" if name is not None else register
+                for name, register in operands
+            ]
+            self._emit(f"V{opcode}", f"[@{var_name}+{index * width}]", *sources, f"#{lanes}")
+
+        for index in range(vectorized, size):
+            sources = []
+            for name, register in operands:
+                if name is not None:
+                    register = self.get_register()
+                    self._emit(load, register, self._element_address(name, index, width))
+                    self.program.register_types[register] = value_type
+                sources.append(register)
+            r_result = self._operation(opcode, *sources, value_type)
+            if element_type == "int8" and width != 1:
+                r_result = self._wrap_int8(r_result)
+            self._emit(store, self._element_address(var_name, index, width), r_result)
+
+    def _wrap_int8(self, register):
+        """
+        Keep the low 8 bits of an integer register, sign-extended.
+
+        MUL.i by 2^24 wraps everything above them away, and the exact DIV.i
+        by 2^24 brings them back down with their sign.
+        """
+        r_scale = self._load(f"#{1 << 24}", "INT")
+        r_high = self._operation("MUL.i", register, r_scale, "INT")
+        return self._operation("DIV.i", r_high, r_scale, "INT")
+
+    def _lower_list_slice(self, var_name, source, start, end, size, element_type):
+        """
+        Handle list slicing (y = x[2:10])
+
+        COPY [@y] [@x+8] Rn moves the Rn elements from index `start` on in
+        one instruction, whatever the slice's length; COPY.b moves
+        byte-wide elements. Targets without the block move get a load and
+        a store per element, in index order, so a list sliced into itself
+        (x = x[1:4]) reads each element before it is overwritten.
+        """
+        width = self.target.element_width(element_type)
+        copy, load, store = ("COPY.b", "LD.b", "ST.b") if width == 1 else ("COPY", "LD", "ST")
+        if self.target.has(copy):
+            r_count = self._load(f"#{size}", "INT")
+            self._emit(copy, f"[@{var_name}]", f"[@{source}+{start * width}]", r_count)
             return
-
-        index1, index2 = indices
-
-        # First element
-        r_base1 = self.get_register()
-        r_index1 = self.get_register()
-        r_size1 = self.get_register()
-        r_offset1 = self.get_register()
-        r_addr1 = self.get_register()
-        r_value1 = self.get_register()
-
-        # Second element
-        r_base2 = self.get_register()
-        r_index2 = self.get_register()
-        r_size2 = self.get_register()
-        r_offset2 = self.get_register()
-        r_addr2 = self.get_register()
-        r_value2 = self.get_register()
-
-        # Result
-        r_result = self.get_register()
-
-        # Load first element
-        self.assembly_code.append(f"LD {r_base1} @{var_name}")
-        self.assembly_code.append(f"LD {r_index1} #{index1}")
-        self.assembly_code.append(f"LD {r_size1} #4")
-        self.assembly_code.append(f"MUL.i {r_offset1} {r_index1} {r_size1}")
-        self.assembly_code.append(f"ADD.i {r_addr1} {r_base1} {r_offset1}")
-        self.assembly_code.append(f"LD {r_value1} {r_addr1}")
-
-        # Load second element
-        self.assembly_code.append(f"LD {r_base2} @{var_name}")
-        self.assembly_code.append(f"LD {r_index2} #{index2}")
-        self.assembly_code.append(f"LD {r_size2} #4")
-        self.assembly_code.append(f"MUL.i {r_offset2} {r_index2} {r_size2}")
-        self.assembly_code.append(f"ADD.i {r_addr2} {r_base2} {r_offset2}")
-        self.assembly_code.append(f"LD {r_value2} {r_addr2}")
-
-        # Add elements
-        self.assembly_code.append(f"ADD.i {r_result} {r_value1} {r_value2}")
-        self.assembly_code.append(f"ST @print {r_result}")
-
-    def _handle_list_scalar_addition(self, tokens):
-        """Handle addition of list element and scalar (x[0] + 2)"""
-        var_name = tokens[0].split("/")[0]
-        index = tokens[2].split("/")[0]
-        scalar = tokens[-1].split("/")[0]
-
-        # List element
-        r_base = self.get_register()
-        r_index = self.get_register()
-        r_size = self.get_register()
-        r_offset = self.get_register()
-        r_addr = self.get_register()
-        r_value = self.get_register()
-
-        # Scalar and result
-        r_scalar = self.get_register()
-        r_result = self.get_register()
-
-        # Load list element
-        self.assembly_code.append(f"LD {r_base} @{var_name}")
-        self.assembly_code.append(f"LD {r_index} #{index}")
-        self.assembly_code.append(f"LD {r_size} #4")
-        self.assembly_code.append(f"MUL.i {r_offset} {r_index} {r_size}")
-        self.assembly_code.append(f"ADD.i {r_addr} {r_base} {r_offset}")
-        self.assembly_code.append(f"LD {r_value} {r_addr}")
-
-        # Load scalar and add
-        self.assembly_code.append(f"LD {r_scalar} #{scalar}")
-        self.assembly_code.append(f"ADD.i {r_result} {r_value} {r_scalar}")
-        self.assembly_code.append(f"ST @print {r_result}")
+        value_type = "REAL" if element_type == "real" else "INT"
+        for index in range(size):
+            r_value = self.get_register()
+            self._emit(load, r_value, self._element_address(source, start + index, width))
+            self.program.register_types[r_value] = value_type
+            self._emit(store, self._element_address(var_name, index, width), r_value)
 
     def save_assembly(self, filename):
         """Save generated assembly code to a file."""
         with open(filename, "w") as f:
             for line in self.assembly_code:
                 f.write(f"{line}\n")
-
-
-# # Example usage
-# symbol_table = {"x": "LIST", "z": "VAR", "d": "VAR", "e": "VAR", "g": "VAR"}
-# parsed_output = """
-#     (23+8)
-#     (2.5*0)
-#     SyntaxError at line 3, pos 2
-#     (x=5)
-#     (10*x)
-#     Undefined variable 'y' at line 6, pos 3
-#     (x!=5)
-#     (2+5)
-#     (x=(list[(2)]))
-#     (x[(1)])
-#     ((x[(0)])+(x[(1)]))
-#     Index 4 out of range for list 'x' of size 2 at line 11, pos 1
-#     ((x[(1)])=2)
-#     ((x[(0)])+2)
-#     (z=(3+2))
-#     (d=(3*2))
-#     (e=(3/2))
-#     SyntaxError at line 17, pos 7
-#     (g=2)
-#     (g=(((1+2)+3)+4))
-# """
-
-# tokenized_output = [
-#     "23/INT +/PLUS 8/INT",
-#     "2.5/REAL */TIMES 0/INT",
-#     "5/INT NUM/VAR ^/POW 3.0/REAL",
-#     "x/VAR =/ASSIGNMENT 5/INT",
-#     "10/INT */TIMES x/VAR",
-#     "x/VAR =/ASSIGNMENT y/VAR",
-#     "x/VAR !=/NOT_EQUAL 5/INT",
-#     "(/LPAREN 2/INT +/PLUS 5/INT )/RPAREN",
-#     "x/VAR =/ASSIGNMENT list/LIST [/LBRACKET 2/INT ]/RBRACKET",
-#     "x/VAR [/LBRACKET 1/INT ]/RBRACKET",
-#     "x/VAR [/LBRACKET 0/INT ]/RBRACKET +/PLUS x/VAR [/LBRACKET 1/INT ]/RBRACKET",
-#     "x/VAR [/LBRACKET 4/INT ]/RBRACKET",
-#     "x/VAR [/LBRACKET 1/INT ]/RBRACKET =/ASSIGNMENT 2/INT",
-#     "x/VAR [/LBRACKET 0/INT ]/RBRACKET +/PLUS 2/INT",
-#     "z/VAR =/ASSIGNMENT 3/INT +/PLUS 2/INT",
-#     "d/VAR =/ASSIGNMENT 3/INT */TIMES 2/INT",
-#     "e/VAR =/ASSIGNMENT 3/INT //DIVIDE 2/INT",
-#     "f/VAR =/ASSIGNMENT 3/INT %/ERR 2/INT",
-#     "g/VAR =/ASSIGNMENT 2/INT",
-#     "g/VAR =/ASSIGNMENT 1/INT +/PLUS 2/INT +/PLUS 3/INT +/PLUS 4/INT"
-
-# ]
-
-# parsed_output_test = """
-#     (g=(((1+2)+3)+4))
-# """
-
-# tokenized_output_test = [
-#     "g/VAR =/ASSIGNMENT 1/INT +/PLUS 2/INT +/PLUS 3/INT +/PLUS 4/INT"
-# ]
-
-# generator = CodeGenerator(symbol_table)
-# assembly = generator.generate(parsed_output_test, tokenized_output_test)
-# # assembly = generator.generate(parsed_output, tokenized_output)
-# print("\n".join(assembly))
@@ -0,0 +1,61 @@
+"""
+Cycle costs of laika instructions.
+
+The numbers are the model the optimizer uses to decide whether a rewrite
+pays off and to report what it saved. They come from the target
+description (src/code_generator/targets/laika.json by default), which
+describes a simple in-order core where memory and division are slow and
+shifts are as cheap as an add.
+"""
+
+from src.code_generator.target import default_target
+
+
+def cycles(instruction, target=None):
+    """Cycles one execution of the instruction takes; 0 for markers and comments."""
+    return (target or default_target()).latency(instruction)
+
+
+def total_cycles(instructions, target=None):
+    return sum(cycles(instruction, target) for instruction in instructions)
+
+
+def schedule_length(instructions, target=None):
+    """
+    Modeled cycles to run the instructions in order on the target.
+
+    Up to ``issue_width`` instructions start per cycle, never ahead of an
+    earlier one, and each waits until the registers it reads are ready.
+    """
+    schedule = Schedule(target)
+    schedule.add(instructions)
+    return schedule.length
+
+
+class Schedule:
+    """schedule_length of a program handed over a few instructions at a time."""
+
+    def __init__(self, target=None):
+        self.target = target or default_target()
+        self.ready = {}
+        self.cycle = 0
+        self.issued = 0
+        self.length = 0
+
+    def add(self, instructions):
+        """Issue the instructions after those added before."""
+        for instruction in instructions:
+            if not instruction.is_code:
+                continue
+            start = max(
+                [self.cycle] + [self.ready.get(register, 0) for register in instruction.uses()]
+            )
+            if start == self.cycle and self.issued == self.target.issue_width:
+                start += 1
+            if start > self.cycle:
+                self.cycle, self.issued = start, 0
+            self.issued += 1
+            done = self.cycle + self.target.latency(instruction)
+            for register in instruction.defs():
+                self.ready[register] = done
+            self.length = max(self.length, done)
@@ -0,0 +1,248 @@
+from src.code_generator.instruction import is_address, is_memory, parse_address
+from src.code_generator.target import default_target
+
+
+# Bytes per scalar variable: one int32 or float32
+WORD_SIZE = 4
+
+# Lists start on this boundary so that a block of elements never straddles it
+LIST_ALIGNMENT = 16
+
+
+def loop_counter(line):
+    """
+    Hidden variable counting down the iterations left of the loop opened on
+    `line`. Its name starts with a digit, so no laika variable has it.
+    """
+    return f"{line}_count"
+
+
+def parameter_variable(line, name):
+    """Hidden variable passing argument `name` to the function defined on `line`."""
+    return f"{line}_{name}"
+
+
+def call_result(line, index):
+    """Hidden variable keeping the result of call `index` (see calls) made on `line`."""
+    return f"{line}_{index}"
+
+
+def spill_slot(index):
+    """
+    Hidden variable the emitter keeps a spilled register in (see
+    Emitter.spill). Line 0 is no source line, so no other hidden variable
+    has the name.
+    """
+    return f"0_spill{index}"
+
+
+def calls(*expressions):
+    """
+    The calls in the expressions in the order they are made: arguments
+    first, so innermost calls before the ones they are passed to, and
+    otherwise from left to right.
+
+    :return: [(call, kept)]; a kept result is copied to a call_result, as
+        another call comes before it is read and may overwrite the
+        function's own result variable
+    """
+    order = []
+    # call index -> index of the call its result is passed to
+    readers = {}
+
+    def visit(expr):
+        """Indices of the outermost calls in expr."""
+        if isinstance(expr, tuple) and len(expr) == 4 and expr[1] == "(":
+            inner = [index for argument in expr[2] for index in visit(argument)]
+            for index in inner:
+                readers[index] = len(order)
+            order.append(expr)
+            return [len(order) - 1]
+        if isinstance(expr, tuple) and len(expr) == 3:
+            return visit(expr[1]) + visit(expr[2])
+        return []
+
+    outermost = [index for expr in expressions for index in visit(expr)]
+    # The statement itself reads after the last call
+    for index in outermost:
+        readers[index] = len(order)
+    return [(call, readers[index] != index + 1) for index, call in enumerate(order)]
+
+
+def statement_calls(ast):
+    """calls() of what the statement evaluates; for a definition, its body."""
+    if not isinstance(ast, tuple):
+        return []
+    if ast[0] == "=":
+        return [] if _is_list_decl(ast[2]) else calls(ast[2])
+    if ast[0] == "repeat":
+        return calls(ast[1])
+    if ast[0] == "for":
+        return calls(ast[2], ast[3])
+    if ast[0] == "def":
+        return calls(ast[3])
+    if ast[0] in ("list_assign", "end"):
+        return []
+    return calls(ast)
+
+
+def _align(address, alignment):
+    return (address + alignment - 1) // alignment * alignment
+
+
+class DataLayout:
+    """
+    Static addresses of a program's variables in one data segment.
+
+    Lists come first, each aligned to LIST_ALIGNMENT and sized for the
+    largest declaration of it (elements take the width of their type on the
+    target); every scalar variable then gets one word. A name used both
+    ways (``x = 5`` and later ``x = list[2]``) gets both, the scalar word
+    and the list. A function's result is its name's word; loop counters,
+    parameters and kept call results are words of the compiler's own, named
+    so that no laika variable has them (loop_counter, parameter_variable,
+    call_result), and so are the words registers are spilled to (spill_slot).
+
+    The IR names memory symbolically, ``@x`` for a variable and ``[@x+8]``
+    or ``[@x+v1*4]`` for list elements, so the optimizer can tell lists
+    apart; ``resolve`` turns those into the absolute addresses emitted,
+    ``[16]``, ``[24]`` and ``[16+R1*4]``.
+    """
+
+    def __init__(self):
+        # name -> (address, size in bytes)
+        self.lists = {}
+        # name -> address
+        self.scalars = {}
+        self.size = 0
+
+    @classmethod
+    def build(cls, symbol_table, asts, types, target=None):
+        """
+        Lay out the lists declared in the ASTs and every scalar variable.
+
+        :param symbol_table: Variable name -> token type (VAR or LIST)
+        :param asts: One AST per source line, None for lines that failed to parse
+        :param types: TypeInference over the same ASTs, to tell list reads apart
+        :param target: Target giving the element widths (None for the default)
+        """
+        target = target if target is not None else default_target()
+        layout = cls()
+        sizes = {}
+        for ast in asts:
+            if isinstance(ast, tuple) and ast[0] == "=" and _is_list_decl(ast[2]):
+                count, element_type = ast[2][-2:]
+                size = count * target.element_width(element_type)
+                sizes[ast[1]] = max(size, sizes.get(ast[1], 0))
+        for name, size in sizes.items():
+            layout.add_list(name, size)
+
+        for name, token_type in symbol_table.items():
+            if token_type != "LIST":
+                layout.add_scalar(name)
+        for line, ast in enumerate(asts, 1):
+            for name in _scalars(ast, line, types) + _call_results(ast, line):
+                layout.add_scalar(name)
+        return layout
+
+    def add_list(self, name, size):
+        if self.scalars:
+            raise ValueError(f"List '{name}' laid out after the scalar variables")
+        address = _align(self.size, LIST_ALIGNMENT)
+        self.lists[name] = (address, size)
+        self.size = address + size
+
+    def add_scalar(self, name):
+        if name not in self.scalars:
+            self.scalars[name] = _align(self.size, WORD_SIZE)
+            self.size = self.scalars[name] + WORD_SIZE
+
+    def list_address(self, name):
+        if name not in self.lists:
+            raise ValueError(f"No list '{name}' in the data layout")
+        return self.lists[name][0]
+
+    def resolve(self, operand):
+        """
+        Replace the symbols in a memory operand by their addresses.
+
+        ``@print`` and operands without symbols are returned unchanged.
+        """
+        if is_memory(operand):
+            if operand == "@print":
+                return operand
+            name = operand[1:]
+            if name not in self.scalars:
+                raise ValueError(f"No variable '{name}' in the data layout")
+            return f"[{self.scalars[name]}]"
+        if not is_address(operand):
+            return operand
+        base, index, scale, displacement = parse_address(operand)
+        if not is_memory(base):
+            return operand
+        address = self.list_address(base[1:]) + displacement
+        if index is None:
+            return f"[{address}]"
+        return f"[{address}+{index}*{scale}]"
+
+    def lines(self):
+        """The data map: address, size in bytes, kind and name of every symbol."""
+        lines = [f"# data segment: {self.size} bytes", "# address size kind name"]
+        for name, (address, size) in self.lists.items():
+            lines.append(f"{address} {size} list {name}")
+        for name, address in self.scalars.items():
+            lines.append(f"{address} {WORD_SIZE} word {name}")
+        return lines
+
+    def save(self, filename):
+        with open(filename, "w") as f:
+            for line in self.lines():
+                f.write(f"{line}\n")
+
+
+def _is_list_decl(expr):
+    """List declarations, whole-list operations and slices all (re)define a list."""
+    return isinstance(expr, tuple) and expr[0] in ("list_decl", "list_op", "list_slice")
+
+
+def _scalars(ast, line, types):
+    """Names the statement on `line` stores to or reads as scalar variables."""
+    if not isinstance(ast, tuple):
+        return _reads(ast, line, types)
+    if ast[0] == "=":
+        _, name, expr = ast
+        if _is_list_decl(expr):
+            return []
+        return [name] + _reads(expr, line, types)
+    if ast[0] == "list_assign":
+        return _reads(ast[3], line, types)
+    if ast[0] == "repeat":
+        return [loop_counter(line)] + _reads(ast[1], line, types)
+    if ast[0] == "for":
+        _, name, start, end = ast
+        return [name, loop_counter(line)] + _reads(start, line, types) + _reads(end, line, types)
+    if ast[0] == "end":
+        return []
+    if ast[0] == "def":
+        # The body only reads the parameters, through their hidden variables
+        return [parameter_variable(line, name) for name in ast[2]]
+    return _reads(ast, line, types)
+
+
+def _reads(expr, line, types):
+    if isinstance(expr, str):
+        return [] if types.is_list(expr, line) else [expr]
+    if isinstance(expr, tuple) and len(expr) == 3:
+        return _reads(expr[1], line, types) + _reads(expr[2], line, types)
+    if isinstance(expr, tuple) and len(expr) == 4 and expr[1] == "(":
+        return [name for argument in expr[2] for name in _reads(argument, line, types)]
+    # Literals and list elements
+    return []
+
+
+def _call_results(ast, line):
+    return [
+        call_result(line, index)
+        for index, (_, kept) in enumerate(statement_calls(ast))
+        if kept
+    ]
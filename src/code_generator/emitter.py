@@ -0,0 +1,237 @@
+from bisect import bisect_right
+from collections import defaultdict
+import heapq
+
+from src.code_generator.data_layout import spill_slot
+from src.code_generator.instruction import (
+    VIRTUAL_REGISTER_PATTERN,
+    Instruction,
+    is_immediate,
+    is_memory,
+)
+from src.code_generator.target import default_target
+
+
+class Emitter:
+    def __init__(self, num_registers=None, target=None):
+        """
+        Initialize the Emitter, the final stage that turns IR into laika.asm text.
+
+        :param num_registers: Size of the physical register file (None for unlimited)
+        :param target: Machine description giving the assembly syntax (None for the default)
+        """
+        self.num_registers = num_registers
+        self.target = target
+
+    def allocate_registers(self, instructions):
+        """
+        Map virtual registers to physical ones with a linear scan.
+
+        A register is released after the last instruction that reads it, so the
+        destination of that same instruction may reuse it.
+
+        :return: Dictionary mapping each virtual register to a physical name, e.g. 'R0'
+        """
+        last_use = {}
+        for index, instruction in enumerate(instructions):
+            for register in instruction.uses() + instruction.defs():
+                last_use[register] = index
+
+        mapping = {}
+        free = []
+        next_register = 0
+
+        for index, instruction in enumerate(instructions):
+            for register in set(instruction.uses()):
+                if last_use[register] == index and register in mapping:
+                    heapq.heappush(free, mapping[register])
+
+            for register in instruction.defs():
+                if register in mapping:
+                    continue
+                if free:
+                    mapping[register] = heapq.heappop(free)
+                elif self.num_registers is None or next_register < self.num_registers:
+                    mapping[register] = next_register
+                    next_register += 1
+                else:
+                    raise ValueError(
+                        f"Register budget of {self.num_registers} exceeded at line {instruction.line}"
+                    )
+                if last_use[register] == index:
+                    heapq.heappush(free, mapping[register])
+
+        prefix = (self.target or default_target()).register_prefix
+        return {
+            register: f"{prefix}{physical}"
+            for register, physical in mapping.items()
+            if VIRTUAL_REGISTER_PATTERN.fullmatch(register)
+        }
+
+    def fits(self, instructions):
+        """True if the instructions can be allocated within the register budget."""
+        try:
+            self.allocate_registers(instructions)
+        except ValueError:
+            return False
+        return True
+
+    def spill(self, program):
+        """
+        Make the program fit the register budget by keeping values in memory.
+
+        The instructions are walked the way allocate_registers walks them.
+        Where a register is needed and all are taken, the value read
+        furthest ahead is stored to a spill_slot word of program.layout
+        (ST @0_spill0 v3) and every later read of it loads the word into a
+        register of its own just before (LD v9 @0_spill0); a later write
+        goes through such a register and a store. A value the instruction
+        itself reads may be spilled to make room for its result. Slots are
+        reused once the value in them is dead. No register is live across a
+        LABEL or CALL, so the straight-line walk is enough.
+
+        :return: Number of registers spilled (0 if the program already fits)
+        :raises ValueError: If an instruction needs more registers than the budget
+        """
+        if self.num_registers is None or self.fits(program.instructions):
+            return 0
+
+        # Where each register is read or written, in instruction order
+        positions = defaultdict(list)
+        for index, instruction in enumerate(program.instructions):
+            for register in dict.fromkeys(instruction.uses() + instruction.defs()):
+                positions[register].append(index)
+        types = program.value_types()
+
+        live = set()
+        # Spilled register -> its slot; (last position, slot) of the slots in use
+        slots = {}
+        taken = []
+        free_slots = []
+        slot_count = 0
+        output = []
+
+        def temporary(register):
+            r_temporary = program.new_register()
+            value_type = types.get(register, program.register_types.get(register, "INT"))
+            program.register_types[r_temporary] = value_type
+            return r_temporary
+
+        def make_room(index, instruction, before, protected):
+            """Free a register for the instruction, spilling a live value if needed."""
+            nonlocal slot_count
+            if len(live) < self.num_registers:
+                return
+            candidates = [register for register in live if register not in protected]
+            if not candidates:
+                raise ValueError(
+                    f"Register budget of {self.num_registers} is too small for line {instruction.line}"
+                )
+
+            def next_position(register):
+                position = bisect_right(positions[register], index)
+                return positions[register][position] if position < len(positions[register]) else index
+
+            victim = max(candidates, key=next_position)
+            if free_slots:
+                slot = heapq.heappop(free_slots)
+            else:
+                slot = spill_slot(slot_count)
+                slot_count += 1
+                program.layout.add_scalar(slot)
+            heapq.heappush(taken, (positions[victim][-1], slot))
+            slots[victim] = slot
+            live.discard(victim)
+            before.append(Instruction("ST", [f"@{slot}", victim], line=instruction.line))
+
+        for index, instruction in enumerate(program.instructions):
+            while taken and taken[0][0] < index:
+                heapq.heappush(free_slots, heapq.heappop(taken)[1])
+            before, after = [], []
+            uses = list(dict.fromkeys(instruction.uses()))
+            protected = set(uses)
+
+            for register in uses:
+                if register in slots:
+                    r_temporary = temporary(register)
+                    make_room(index, instruction, before, protected)
+                    before.append(
+                        Instruction("LD", [r_temporary, f"@{slots[register]}"], line=instruction.line)
+                    )
+                    instruction.replace_use(register, r_temporary)
+                    protected.add(r_temporary)
+                    live.add(r_temporary)
+            # Reloaded values and values read for the last time free their registers
+            for register in protected:
+                if register not in positions or positions[register][-1] == index:
+                    live.discard(register)
+
+            for register in instruction.defs():
+                if register in live:
+                    continue
+                make_room(index, instruction, before, set())
+                if register in slots:
+                    # Written again after it was spilled: through a register of its own
+                    r_temporary = temporary(register)
+                    instruction.operands[0] = r_temporary
+                    after.append(
+                        Instruction("ST", [f"@{slots[register]}", r_temporary], line=instruction.line)
+                    )
+                elif positions[register][-1] != index:
+                    live.add(register)
+
+            output.extend(before)
+            output.append(instruction)
+            output.extend(after)
+
+        program.instructions[:] = output
+        if not self.fits(program.instructions):
+            raise ValueError(f"Register budget of {self.num_registers} exceeded after spilling")
+        return len(slots)
+
+    def emit(self, program):
+        """Render an IRProgram as a list of assembly lines (see lines)."""
+        return list(self.lines(program))
+
+    def lines(self, program):
+        """
+        Generate the assembly lines of an IRProgram one at a time.
+
+        Every statement is followed by a blank line, as laika.asm always was.
+        Opcodes and operands are written in the target's syntax, with
+        variables and list elements at their addresses in program.layout.
+        """
+        mapping = self.allocate_registers(program.instructions)
+        for _, instructions in program.statements():
+            yield from self._render(instructions, mapping, program.layout)
+
+    def statement_lines(self, instructions, layout):
+        """
+        The assembly lines of one statement, allocated registers on its own
+        (see CodeGenerator.stream), followed by its blank line.
+        """
+        mapping = self.allocate_registers(instructions)
+        return self._render(instructions, mapping, layout)
+
+    def _render(self, instructions, mapping, layout):
+        target = self.target or default_target()
+
+        def rename(operand):
+            if layout is not None:
+                operand = layout.resolve(operand)
+            if is_immediate(operand):
+                return target.immediate_prefix + operand[1:]
+            if is_memory(operand):
+                return target.memory_prefix + operand[1:]
+            return VIRTUAL_REGISTER_PATTERN.sub(
+                lambda match: mapping.get(match.group(0), match.group(0)), operand
+            )
+
+        for instruction in instructions:
+            if instruction.opcode is None:
+                yield str(instruction)
+            else:
+                operands = [rename(operand) for operand in instruction.operands]
+                opcode = target.mnemonic(instruction.opcode)
+                yield " ".join([opcode, *operands])
+        yield ""
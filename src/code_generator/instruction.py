@@ -0,0 +1,176 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+import re
+
+
+# Physical registers are R<n>, virtual registers used by the IR are v<n>
+REGISTER_PATTERN = re.compile(r"^[Rv]\d+$")
+VIRTUAL_REGISTER_PATTERN = re.compile(r"(?<!@)\bv\d+\b")
+
+# Memory operands: [base+disp] or [base+index*scale]. The base is a register,
+# a list (@x, resolved by the data layout) or an absolute address
+ADDRESS_PATTERN = re.compile(
+    r"^\[([Rv]\d+|@\w+|\d+)(?:\+(?:([Rv]\d+)\*(\d+)|(-?\d+)))?\]$"
+)
+
+# Pseudo-instructions that do not touch registers or memory. LABEL L1 marks
+# the place the branches to L1 continue at
+MARKERS = ("ERROR", "LABEL")
+
+# Branches: BR L1 always continues at LABEL L1, BZ R1 L1 only when R1 is zero.
+# CALL L1 continues at LABEL L1 until a RET returns to the instruction after
+# the CALL. No virtual register is live across a LABEL or CALL (see IRProgram)
+BRANCH_OPCODES = ("BR", "BZ", "CALL", "RET")
+
+# Where code goes on with memory in any state: at a LABEL, reached from a
+# branch, and after a CALL, once the function has run
+BARRIER_OPCODES = ("LABEL", "CALL")
+
+# Whole-list operations and the scalar operation each lane performs.
+# VADD.i [@z] [@x] [@y] #4 adds four elements of x and y into z; either
+# source may instead be a register, whose value is used in every lane
+VECTOR_OPCODES = {
+    "VADD.i": "ADD.i",
+    "VSUB.i": "SUB.i",
+    "VMUL.i": "MUL.i",
+    "VADD.f": "ADD.f",
+    "VSUB.f": "SUB.f",
+    "VMUL.f": "MUL.f",
+}
+
+# Block moves: COPY [@y] [@x+8] Rn copies Rn elements of x, from the one at
+# byte offset 8, to the start of y. The elements are read before any is
+# written, so the two blocks may overlap
+BLOCK_OPCODES = ("COPY", "COPY.b")
+
+# Instructions whose first operand is a memory destination rather than a register
+STORE_OPCODES = ("ST", "FILL", "ST.b", "FILL.b", *VECTOR_OPCODES, *BLOCK_OPCODES)
+
+# Single-byte variants of the memory instructions, for int8 list elements
+BYTE_OPCODES = {"LD.b": "LD", "ST.b": "ST", "FILL.b": "FILL", "COPY.b": "COPY"}
+
+
+def memory_opcode(opcode):
+    """LD, ST, FILL or COPY for their byte variants; other opcodes are returned as they are."""
+    return BYTE_OPCODES.get(opcode, opcode)
+
+
+def is_register(operand):
+    return bool(REGISTER_PATTERN.match(operand))
+
+
+def is_immediate(operand):
+    return operand.startswith("#")
+
+
+def is_memory(operand):
+    return operand.startswith("@")
+
+
+def is_address(operand):
+    return operand.startswith("[")
+
+
+def parse_address(operand):
+    """
+    Split a memory operand into (base, index, scale, displacement).
+
+    A bare register is treated as [base+0], which is how element loads and
+    stores addressed through a register were written before.
+    """
+    if is_register(operand):
+        return operand, None, 1, 0
+    match = ADDRESS_PATTERN.match(operand)
+    if not match:
+        raise ValueError(f"Invalid address operand '{operand}'")
+    base, index, scale, displacement = match.groups()
+    return base, index, int(scale or 1), int(displacement or 0)
+
+
+def operand_registers(operand):
+    """Registers read when evaluating an operand (including inside an address)."""
+    if is_register(operand):
+        return [operand]
+    if is_address(operand):
+        base, index, _, _ = parse_address(operand)
+        return [
+            register
+            for register in (base, index)
+            if register is not None and is_register(register)
+        ]
+    return []
+
+
+@dataclass
+class Instruction:
+    """
+    A single line of laika assembly in structured form.
+
+    Blank separator lines and ``# ...`` comment lines are kept as instructions
+    without an opcode so the original layout survives a round trip. ``line``
+    is the source line the instruction was generated for, if known.
+    """
+
+    opcode: Optional[str] = None
+    operands: List[str] = field(default_factory=list)
+    comment: Optional[str] = None
+    line: Optional[int] = None
+
+    @classmethod
+    def parse(cls, line):
+        line = line.strip()
+        if not line:
+            return cls()
+        if line.startswith("#"):
+            return cls(comment=line[1:].strip())
+        opcode, *operands = line.split()
+        return cls(opcode=opcode, operands=operands)
+
+    @property
+    def is_code(self):
+        """True for instructions that are executed (not blanks, comments or markers)."""
+        return self.opcode is not None and self.opcode not in MARKERS
+
+    def defs(self):
+        """Registers written by this instruction."""
+        if not self.is_code or self.opcode in (*STORE_OPCODES, *BRANCH_OPCODES):
+            return []
+        return [self.operands[0]] if is_register(self.operands[0]) else []
+
+    def uses(self):
+        """Registers read by this instruction."""
+        if not self.is_code:
+            return []
+        start = 0 if self.opcode in (*STORE_OPCODES, *BRANCH_OPCODES) else 1
+        return [reg for op in self.operands[start:] for reg in operand_registers(op)]
+
+    def replace_use(self, old, new):
+        """Rewrite every read of register ``old`` to ``new``."""
+        start = 0 if self.opcode in (*STORE_OPCODES, *BRANCH_OPCODES) else 1
+        for i in range(start, len(self.operands)):
+            if self.operands[i] == old:
+                self.operands[i] = new
+            elif is_address(self.operands[i]):
+                self.operands[i] = re.sub(rf"(?<!@)\b{old}\b", new, self.operands[i])
+
+    def __str__(self):
+        if self.opcode is None:
+            return f"# {self.comment}" if self.comment is not None else ""
+        return " ".join([self.opcode, *self.operands])
+
+
+def parse_assembly(assembly_code):
+    """
+    Convert the generator's list of assembly strings into Instructions.
+
+    Entries may hold several lines (e.g. ``"ERROR\\n"``), so they are split first.
+    """
+    instructions = []
+    for entry in assembly_code:
+        for line in entry.split("\n"):
+            instructions.append(Instruction.parse(line))
+    return instructions
+
+
+def format_assembly(instructions):
+    return [str(instruction) for instruction in instructions]
@@ -0,0 +1,91 @@
+from itertools import groupby
+
+from src.code_generator.instruction import VIRTUAL_REGISTER_PATTERN, is_immediate
+from src.code_generator.semantics import INT_RESULTS, REAL_RESULTS, parse_immediate
+
+
+class IRProgram:
+    """
+    Three-address intermediate representation of a whole program.
+
+    Instructions are laika instructions over virtual registers (v0, v1, ...)
+    with explicit LD/ST for every memory access. Each instruction remembers
+    the source line it came from, which is how statements are delimited.
+    ``symbol_table`` maps the program's variables to their token types and
+    ``register_types`` the virtual registers set by lowering to INT or REAL.
+    ``layout`` is the DataLayout giving every variable and list its static
+    address.
+
+    Loops are LABEL markers and BR/BZ branches between them. Functions are
+    compiled where they are defined, jumped over with BR, and entered with
+    CALL at their LABEL; RET returns. Lowering never keeps a value in a
+    virtual register across a LABEL or CALL, everything reaching a loop or
+    passed to and from a function goes through memory, so passes may treat
+    the code between two such points as straight-line and only have to
+    forget what they know about memory there (BARRIER_OPCODES).
+    """
+
+    def __init__(self, instructions=None, symbol_table=None):
+        self.instructions = instructions if instructions is not None else []
+        self.symbol_table = symbol_table if symbol_table is not None else {}
+        self.register_types = {}
+        self.layout = None
+        self._next_register = None
+
+    def append(self, instruction):
+        self.instructions.append(instruction)
+
+    def new_register(self):
+        """A virtual register not used anywhere in the program yet, for passes."""
+        if self._next_register is None:
+            numbers = [
+                int(match.group(0)[1:])
+                for instruction in self.instructions
+                for operand in instruction.operands
+                for match in VIRTUAL_REGISTER_PATTERN.finditer(operand)
+            ]
+            self._next_register = max(numbers, default=-1) + 1
+        register = f"v{self._next_register}"
+        self._next_register += 1
+        return register
+
+    def count(self):
+        """Number of executable instructions (markers and comments excluded)."""
+        return sum(1 for instruction in self.instructions if instruction.is_code)
+
+    def statements(self):
+        """Group instructions into (line, [instructions]) per source statement."""
+        return [
+            (line, list(instructions))
+            for line, instructions in groupby(
+                self.instructions, key=lambda instruction: instruction.line
+            )
+        ]
+
+    def value_types(self):
+        """INT or REAL for every virtual register the program defines."""
+        types = {}
+        for instruction in self.instructions:
+            for register in instruction.defs():
+                opcode = instruction.opcode
+                if opcode in INT_RESULTS:
+                    value_type = "INT"
+                elif opcode in REAL_RESULTS:
+                    value_type = "REAL"
+                elif opcode == "MOV":
+                    value_type = types.get(instruction.operands[1], "INT")
+                elif is_immediate(instruction.operands[1]):
+                    value = parse_immediate(instruction.operands[1])
+                    value_type = "REAL" if isinstance(value, float) else "INT"
+                else:
+                    # Variables and list elements, typed by the lowering
+                    value_type = self.register_types.get(register, "INT")
+                if types.setdefault(register, value_type) != value_type:
+                    raise ValueError(f"Register {register} holds both INT and REAL values")
+        return types
+
+    def __iter__(self):
+        return iter(self.instructions)
+
+    def __len__(self):
+        return len(self.instructions)
@@ -0,0 +1,158 @@
+"""
+Arithmetic semantics of the laika target.
+
+Registers are 4 bytes wide: integers are 32-bit two's complement and wrap
+on overflow, reals are IEEE-754 single precision. List elements take
+ELEMENT_WIDTHS bytes of their type; int8 elements keep the low 8 bits of
+what is stored and read back sign-extended.
+``.i`` ops work on integers, ``.f`` ops on reals, comparisons (of either
+kind) yield the integer 1 or 0.
+DIV.i truncates toward zero whatever its operands hold. SHL and SHR shift
+integers by the low 5 bits of their second operand; SHR is arithmetic.
+
+Anything that computes values at compile time (constant folding) or at run
+time (the VM) goes through ``evaluate`` so both agree.
+"""
+
+import math
+import struct
+
+
+def to_int32(value):
+    value = int(value) & 0xFFFFFFFF
+    return value - 0x100000000 if value & 0x80000000 else value
+
+
+def to_int8(value):
+    value = int(value) & 0xFF
+    return value - 0x100 if value & 0x80 else value
+
+
+def to_float32(value):
+    return struct.unpack("<f", struct.pack("<f", float(value)))[0]
+
+
+def parse_immediate(operand):
+    """Value of an immediate operand such as '#5' or '#2.5'."""
+    text = operand[1:] if operand.startswith("#") else operand
+    try:
+        return to_int32(int(text))
+    except ValueError:
+        return to_float32(float(text))
+
+
+def format_immediate(value):
+    """Shortest immediate operand that loads back to exactly this value."""
+    if isinstance(value, int):
+        return f"#{value}"
+    for digits in range(1, 18):
+        text = f"{value:.{digits}g}"
+        if to_float32(float(text)) == value:
+            break
+    if not any(c in text for c in ".en"):
+        text += ".0"
+    return f"#{text}"
+
+
+def _divide_int(left, right):
+    if right == 0:
+        raise ZeroDivisionError("integer division by zero")
+    if isinstance(left, int) and isinstance(right, int):
+        quotient = abs(left) // abs(right)
+        return to_int32(quotient if (left < 0) == (right < 0) else -quotient)
+    return to_int32(math.trunc(left / right))
+
+
+def _power_int(base, exponent):
+    exponent = int(exponent)
+    if exponent >= 0:
+        return to_int32(pow(int(base), exponent, 1 << 32))
+    if base == 0:
+        raise ZeroDivisionError("zero raised to a negative power")
+    # 1 / base^n truncates to 0 unless base is 1 or -1
+    if abs(base) != 1:
+        return 0
+    return -1 if base == -1 and exponent % 2 else 1
+
+
+def _real(function):
+    def wrapper(*values):
+        result = to_float32(function(*values))
+        if not math.isfinite(result):
+            raise OverflowError("real result is not finite")
+        return result
+
+    return wrapper
+
+
+def _divide_real(left, right):
+    if right == 0:
+        raise ZeroDivisionError("real division by zero")
+    return left / right
+
+
+def _power_real(base, exponent):
+    if base == 0 and exponent < 0:
+        raise ZeroDivisionError("zero raised to a negative power")
+    result = base**exponent
+    if isinstance(result, complex):
+        raise ValueError("negative base with a fractional exponent")
+    return result
+
+
+OPERATIONS = {
+    "ADD.i": lambda a, b: to_int32(a + b),
+    "SUB.i": lambda a, b: to_int32(a - b),
+    "MUL.i": lambda a, b: to_int32(a * b),
+    "DIV.i": _divide_int,
+    "EXP.i": _power_int,
+    "ADD.f": _real(lambda a, b: a + b),
+    "SUB.f": _real(lambda a, b: a - b),
+    "MUL.f": _real(lambda a, b: a * b),
+    "DIV.f": _real(_divide_real),
+    "EXP.f": _real(_power_real),
+    "SHL": lambda a, b: to_int32(a << (b & 31)),
+    "SHR": lambda a, b: to_int32(a >> (b & 31)),
+    "FL.i": _real(float),
+    "EQ.i": lambda a, b: int(a == b),
+    "NE.i": lambda a, b: int(a != b),
+    "LT.i": lambda a, b: int(a < b),
+    "GT.i": lambda a, b: int(a > b),
+    "LE.i": lambda a, b: int(a <= b),
+    "GE.i": lambda a, b: int(a >= b),
+    "EQ.f": lambda a, b: int(a == b),
+    "NE.f": lambda a, b: int(a != b),
+    "LT.f": lambda a, b: int(a < b),
+    "GT.f": lambda a, b: int(a > b),
+    "LE.f": lambda a, b: int(a <= b),
+    "GE.f": lambda a, b: int(a >= b),
+}
+
+
+# List element types and their width in bytes; untyped lists are int32
+ELEMENT_WIDTHS = {"int8": 1, "int32": 4, "real": 4}
+DEFAULT_ELEMENT_TYPE = "int32"
+
+
+# Opcodes whose result is always an integer / always a real
+INT_RESULTS = (
+    "ADD.i", "SUB.i", "MUL.i", "DIV.i", "EXP.i", "SHL", "SHR",
+    "EQ.i", "NE.i", "LT.i", "GT.i", "LE.i", "GE.i",
+    "EQ.f", "NE.f", "LT.f", "GT.f", "LE.f", "GE.f",
+)
+REAL_RESULTS = ("ADD.f", "SUB.f", "MUL.f", "DIV.f", "EXP.f", "FL.i")
+
+
+def format_value(value):
+    """How a printed value is written: 5, -2.5, 1e+10, 3.0."""
+    return format_immediate(value)[1:]
+
+
+def evaluate(opcode, *values):
+    """
+    Compute the result of a register-to-register instruction.
+
+    Raises ZeroDivisionError for division by zero, and ValueError or
+    OverflowError when the result is not representable.
+    """
+    return OPERATIONS[opcode](*values)
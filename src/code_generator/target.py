@@ -0,0 +1,136 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import json
+import os
+
+from src.code_generator.instruction import is_immediate
+from src.code_generator.semantics import ELEMENT_WIDTHS
+
+
+# Description used when no --target is given
+DEFAULT_TARGET_PATH = os.path.join(os.path.dirname(__file__), "targets", "laika.json")
+
+# Ways an element operand may be formed: R1 (register-indirect), [R1+8] and [R1+R2*4]
+ADDRESSING_MODES = ("register", "displacement", "scaled_index")
+
+# Registers an instruction may need at once: two operands, the result reusing one
+MIN_REGISTERS = 2
+
+# Opcodes every target has to provide (LD is costed by load/immediate_latency)
+REQUIRED_OPCODES = ("ST", "MOV")
+
+
+@dataclass
+class Target:
+    """
+    Machine description of the target the code is generated for.
+
+    Read from a JSON file (see targets/laika.json). The opcodes the target
+    has are the keys of ``latencies``, each with the cycles until its result
+    can be used; loads from memory take ``load_latency`` and immediate
+    loads ``immediate_latency``. ``issue_width`` instructions can start per
+    cycle.
+
+    ``registers`` is the size of the register file (None for unlimited) and
+    ``addressing_modes`` the subset of ADDRESSING_MODES element operands may
+    use. Byte-wide list elements need the LD.b and ST.b opcodes. Vector
+    opcodes (VADD.i, ...) work on ``vector_lanes`` word elements at once.
+    The rest describes the assembly syntax: ``mnemonics`` renames opcodes,
+    and registers, immediates and variables are written with
+    ``register_prefix``, ``immediate_prefix`` and ``memory_prefix``.
+    """
+
+    name: str
+    issue_width: int
+    load_latency: int
+    immediate_latency: int = 1
+    latencies: Dict[str, int] = field(default_factory=dict)
+    registers: Optional[int] = None
+    addressing_modes: List[str] = field(default_factory=lambda: list(ADDRESSING_MODES))
+    vector_lanes: int = 1
+    mnemonics: Dict[str, str] = field(default_factory=dict)
+    register_prefix: str = "R"
+    immediate_prefix: str = "#"
+    memory_prefix: str = "@"
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            description = json.load(f)
+        try:
+            target = cls(**description)
+        except TypeError as e:
+            raise ValueError(f"Invalid target description {path}: {str(e)}")
+        target.validate(path)
+        return target
+
+    def validate(self, path):
+        missing = [opcode for opcode in REQUIRED_OPCODES if not self.has(opcode)]
+        if missing:
+            raise ValueError(
+                f"Invalid target description {path}: missing {', '.join(missing)}"
+            )
+        unknown = [mode for mode in self.addressing_modes if mode not in ADDRESSING_MODES]
+        if unknown:
+            raise ValueError(
+                f"Invalid target description {path}: unknown addressing mode(s) "
+                f"{', '.join(unknown)}"
+            )
+        if "register" not in self.addressing_modes and "displacement" not in self.addressing_modes:
+            raise ValueError(
+                f"Invalid target description {path}: needs the register or "
+                "displacement addressing mode"
+            )
+        if self.registers is not None and self.registers < MIN_REGISTERS:
+            raise ValueError(
+                f"Invalid target description {path}: registers must be at least {MIN_REGISTERS}"
+            )
+        if self.vector_lanes < 1:
+            raise ValueError(
+                f"Invalid target description {path}: vector_lanes must be positive"
+            )
+
+    def has(self, opcode):
+        """True if the target provides the opcode."""
+        return opcode == "LD" or opcode in self.latencies
+
+    def element_width(self, element_type):
+        """
+        Bytes a list element of the type takes on this target.
+
+        Without byte loads and stores int8 elements are kept in full words.
+        """
+        width = ELEMENT_WIDTHS[element_type]
+        if width == 1 and not (self.has("LD.b") and self.has("ST.b")):
+            return ELEMENT_WIDTHS["int32"]
+        return width
+
+    def supports(self, mode):
+        """True if element operands may use the addressing mode."""
+        return mode in self.addressing_modes
+
+    def mnemonic(self, opcode):
+        """How the opcode is written in the target's assembly."""
+        return self.mnemonics.get(opcode, opcode)
+
+    def latency(self, instruction):
+        """Cycles until the instruction's result can be used; 0 for markers and comments."""
+        if not instruction.is_code:
+            return 0
+        if instruction.opcode == "LD":
+            if is_immediate(instruction.operands[1]):
+                return self.immediate_latency
+            return self.load_latency
+        if instruction.opcode not in self.latencies:
+            raise ValueError(f"Target '{self.name}' has no latency for {instruction.opcode}")
+        return self.latencies[instruction.opcode]
+
+
+_default_target = None
+
+
+def default_target():
+    global _default_target
+    if _default_target is None:
+        _default_target = Target.load(DEFAULT_TARGET_PATH)
+    return _default_target
@@ -0,0 +1,198 @@
+from bisect import bisect_left
+from operator import itemgetter
+
+
+COMPARISON_OPERATORS = ("==", "!=", "<", ">", "<=", ">=")
+
+
+class TypeInference:
+    """
+    INT/REAL types of variables and expressions, statement by statement.
+
+    A variable has the type of the value it was last assigned, so the same
+    name can be INT on one line and REAL a few lines later; the history of
+    assignments is kept per variable. List elements are REAL in lists of
+    reals and INT otherwise; a list variable itself is INT, it reads as the
+    list's base address. Variables never assigned in the program default to
+    INT.
+
+    A value assigned in a loop is still there when the loop body starts
+    over, so a variable assigned in a loop keeps one type through it (and,
+    for lists, one element type and size): the one it has on entering the
+    loop, or that of its first assignment in the loop if it had none. An
+    assignment breaking this is an error and left out of the history, as
+    is a loop never closed. The variable of a for loop is INT from its
+    header on.
+
+    A call has the type of its function's body with the parameters typed
+    as the arguments, so a function is typed anew for each combination of
+    argument types it is called with.
+    """
+
+    def __init__(self):
+        # variable -> [(line, type, element type or None for scalars)] in line order
+        self.history = {}
+        # line of a loop header -> line of the brace closing it
+        self.loops = {}
+        # line -> why the statement on it cannot be compiled
+        self.errors = {}
+        # function name -> (line of its definition, parameters, body)
+        self.functions = {}
+        # (function name, argument types) -> type of the call
+        self._call_types = {}
+
+    def infer(self, asts):
+        """Record the type assigned to each variable on each line (1-based)."""
+        self.loops, self.errors = _match_loops(asts)
+        self.functions = {
+            ast[1]: (line, ast[2], ast[3])
+            for line, ast in enumerate(asts, 1)
+            if isinstance(ast, tuple) and ast[0] == "def"
+        }
+        self._call_types = {}
+        # Leaving out an assignment changes the types computed from it, which
+        # can break another loop, so check again until no loop is broken
+        while True:
+            self._record(asts)
+            conflicts = self._loop_conflicts(asts)
+            if not conflicts:
+                return self
+            self.errors.update(conflicts)
+
+    def first_assigned(self, header):
+        """Scalar variables first assigned inside the loop opened on `header`, with their types."""
+        end = self.loops[header]
+        return {
+            var_name: history[0][1]
+            for var_name, history in self.history.items()
+            if header < history[0][0] < end and history[0][2] is None
+        }
+
+    def _record(self, asts):
+        self.history = {}
+        for line, ast in enumerate(asts, 1):
+            if line in self.errors or not isinstance(ast, tuple):
+                continue
+            if ast[0] == "=":
+                _, var_name, expr = ast
+                if isinstance(expr, tuple) and expr[0] in ("list_decl", "list_op", "list_slice"):
+                    assignment = (line, "INT", expr[-1])
+                else:
+                    assignment = (line, self.expression_type(expr, line), None)
+                self.history.setdefault(var_name, []).append(assignment)
+            elif ast[0] == "for":
+                self.history.setdefault(ast[1], []).append((line, "INT", None))
+
+    def _loop_conflicts(self, asts):
+        """Line -> error of the assignments in loops that change a variable's type."""
+        conflicts = {}
+        for header, end in self.loops.items():
+            shapes = {}
+            for line in range(header + 1, end):
+                ast = asts[line - 1]
+                if line in self.errors or not isinstance(ast, tuple):
+                    continue
+                # A nested for loop assigns its variable too
+                if ast[0] not in ("=", "for"):
+                    continue
+                var_name = ast[1]
+                shape = self._shape(asts, self._assignment(var_name, line + 1))
+                if var_name not in shapes:
+                    entry = self._assignment(var_name, header + 1)
+                    shapes[var_name] = shape if entry is None else self._shape(asts, entry)
+                if shape != shapes[var_name]:
+                    conflicts[line] = f"Variable '{var_name}' cannot change type inside a loop"
+        return conflicts
+
+    def _shape(self, asts, assignment):
+        """(type, element type, list size) an assignment gives its variable."""
+        line, value_type, element_type = assignment
+        if element_type is None:
+            return value_type, None, None
+        return value_type, element_type, asts[line - 1][2][-2]
+
+    def _assignment(self, var_name, line):
+        """(line, type, element type) of the last assignment before `line`, or None."""
+        history = self.history.get(var_name, ())
+        # The history is in line order, so a binary search finds it
+        index = bisect_left(history, line, key=itemgetter(0))
+        return history[index - 1] if index else None
+
+    def variable_type(self, var_name, line):
+        """Type of the variable as read on `line`, before that line's own assignment."""
+        assignment = self._assignment(var_name, line)
+        return assignment[1] if assignment is not None else "INT"
+
+    def is_list(self, var_name, line):
+        """Whether the variable names a list when read on `line`."""
+        return self.element_type(var_name, line) is not None
+
+    def element_type(self, var_name, line):
+        """Element type of the list the variable names on `line`, None for scalars."""
+        assignment = self._assignment(var_name, line)
+        return assignment[2] if assignment is not None else None
+
+    def expression_type(self, expr, line, parameters=None):
+        """
+        'INT' or 'REAL' for an expression on `line`.
+
+        :param parameters: Parameter -> type, for the body of a function
+        """
+        if isinstance(expr, float):
+            return "REAL"
+        if isinstance(expr, str):
+            if parameters is not None:
+                return parameters[expr]
+            return self.variable_type(expr, line)
+        if isinstance(expr, tuple) and len(expr) == 4 and expr[1] == "[":
+            return "REAL" if self.element_type(expr[0], line) == "real" else "INT"
+        if isinstance(expr, tuple) and len(expr) == 4 and expr[1] == "(":
+            argument_types = tuple(
+                self.expression_type(argument, line, parameters) for argument in expr[2]
+            )
+            return self.call_type(expr[0], argument_types)
+        if not isinstance(expr, tuple) or len(expr) != 3:
+            # Integer literals
+            return "INT"
+        operator, left, right = expr
+        if operator in COMPARISON_OPERATORS or operator == "//":
+            return "INT"
+        operand_types = (
+            self.expression_type(left, line, parameters),
+            self.expression_type(right, line, parameters),
+        )
+        return "REAL" if "REAL" in operand_types else "INT"
+
+    def call_type(self, name, argument_types):
+        """Type of a call to the function with arguments of the given types."""
+        key = (name, argument_types)
+        if key not in self._call_types:
+            if name not in self.functions:
+                raise ValueError(f"Undefined function '{name}'")
+            _, parameters, body = self.functions[name]
+            self._call_types[key] = self.expression_type(
+                body, None, dict(zip(parameters, argument_types))
+            )
+        return self._call_types[key]
+
+
+def _match_loops(asts):
+    """
+    Pair loop headers with the braces closing them.
+
+    :return: (header line -> closing line, line -> error for unmatched braces)
+    """
+    loops = {}
+    errors = {}
+    open_loops = []
+    for line, ast in enumerate(asts, 1):
+        if isinstance(ast, tuple) and ast[0] in ("repeat", "for"):
+            open_loops.append(line)
+        elif ast == ("end",):
+            if open_loops:
+                loops[open_loops.pop()] = line
+            else:
+                errors[line] = "Unmatched '}'"
+    for line in open_loops:
+        errors[line] = "Loop is never closed with '}'"
+    return loops, errors
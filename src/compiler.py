@@ -0,0 +1,56 @@
+"""
+Compile a program given as text in one call: the lexing, parsing,
+optimization and lowering of main.py, without its output files. For tools
+such as src/benchmark.py, and for the tests.
+"""
+
+from src.code_generator.code_generator_new import CodeGenerator
+from src.code_generator.emitter import Emitter
+from src.code_generator.target import default_target
+from src.lexical_analyzer.lexical_analyzer import LexicalAnalyzer
+from src.optimizer.pass_manager import PassManager
+from src.symbol_table.symbol_table import SymbolTable
+from src.syntax_analyzer.syntax_analyzer import SyntaxAnalyzer
+
+
+def parse_source(source):
+    """
+    Lex and parse a program line by line, skipping blank lines as main.py does.
+
+    :return: (one AST per non-blank line, symbol table as a dict, bracket forms)
+    """
+    symbol_table = SymbolTable()
+    lexer = LexicalAnalyzer(symbol_table)
+    parser = SyntaxAnalyzer(symbol_table, lexer, keep_output=False)
+    asts, brackets = [], []
+    for line_number, line in enumerate(source.splitlines(), 1):
+        if not line.strip():
+            continue
+        lexer.tokenize(line.strip(), line_number)
+        asts.append(parser.parse(line.strip()))
+        brackets.append(parser.last_output)
+    return asts, lexer.get_symbol_table_as_dict(), brackets
+
+
+def compile_source(source, optimization_level=0, target=None, num_registers="target"):
+    """
+    Compile a program given as text.
+
+    :param target: Target to generate code for (None for the default)
+    :param num_registers: Register budget; by default the target's register file
+    :return: The CodeGenerator, with the optimized IR in its program
+    """
+    target = target if target is not None else default_target()
+    if num_registers == "target":
+        num_registers = target.registers
+    asts, symbol_table, _ = parse_source(source)
+    code_generator = CodeGenerator(
+        symbol_table,
+        pass_manager=PassManager(
+            None, optimization_level, num_registers=num_registers, target=target
+        ),
+        emitter=Emitter(num_registers, target=target),
+        target=target,
+    )
+    code_generator.build(asts)
+    return code_generator
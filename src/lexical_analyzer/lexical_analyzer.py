@@ -1,6 +1,11 @@
 import ply.lex as lex
 
 
+# Words lexed as tokens of their own, so no variable or function can have them
+RESERVED_WORDS = ("list", "of", "int8", "int32", "real", "repeat", "for", "in", "def")
+RESERVED_TOKENS = ("LIST", "OF", "ELEMENT_TYPE", "REPEAT", "FOR", "IN", "DEF")
+
+
 class LexicalAnalyzer:
     tokens = (
         "INT",
@@ -22,8 +27,19 @@ class LexicalAnalyzer:
         "RPAREN",
         "LBRACKET",
         "RBRACKET",
+        "COLON",
+        "COMMA",
+        "RANGE",
+        "LBRACE",
+        "RBRACE",
+        "REPEAT",
+        "FOR",
+        "IN",
+        "DEF",
         "VAR",
         "LIST",
+        "OF",
+        "ELEMENT_TYPE",
         "ERR",
     )
 
@@ -44,6 +60,11 @@ class LexicalAnalyzer:
     t_RPAREN = r"\)"
     t_LBRACKET = r"\["
     t_RBRACKET = r"\]"
+    t_COLON = r":"
+    t_COMMA = r","
+    t_RANGE = r"\.\."
+    t_LBRACE = r"\{"
+    t_RBRACE = r"\}"
 
     t_ignore = " \t"
 
@@ -57,7 +78,7 @@ class LexicalAnalyzer:
         self.lexer = lex.lex(module=self, **kwargs)
 
     def t_REAL(self, t):
-        r"(0|[1-9][0-9]*)?\.([0-9]+)?([Ee][+-]?[0-9]+)?|[0-9]+[Ee][+-]?[0-9]+"
+        r"(0|[1-9][0-9]*)?\.(?!\.)([0-9]+)?([Ee][+-]?[0-9]+)?|[0-9]+[Ee][+-]?[0-9]+"
         t.value = float(t.value)
         return t
 
@@ -71,12 +92,36 @@ class LexicalAnalyzer:
         t.value = "list"
         return t
 
+    def t_OF(self, t):
+        r"of\b"
+        return t
+
+    def t_ELEMENT_TYPE(self, t):
+        r"(int8|int32|real)\b"
+        return t
+
+    def t_REPEAT(self, t):
+        r"repeat\b"
+        return t
+
+    def t_FOR(self, t):
+        r"for\b"
+        return t
+
+    def t_IN(self, t):
+        r"in\b"
+        return t
+
+    def t_DEF(self, t):
+        r"def\b"
+        return t
+
     def t_VAR(self, t):
         r"[a-zA-Z_][a-zA-Z0-9_]*"
         return t
 
     def t_ERR(self, t):
-        r"[^a-zA-Z0-9\+\-\*\/\^\=\!\(\)\[\]\s\.<>]+"
+        r"[^a-zA-Z0-9\+\-\*\/\^\=\!\(\)\[\]\{\}:,\s\.<>]+"
         return t
 
     def t_newline(self, t):
@@ -141,7 +186,7 @@ class LexicalAnalyzer:
                         has_value = True
                         value = tok.value
                 case "REAL":
-                    if is_assignment:
+                    if is_assignment and not is_list_access:
                         has_value = True
                         value = tok.value
                 case "LBRACKET":
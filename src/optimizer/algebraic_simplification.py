@@ -0,0 +1,220 @@
+from src.code_generator.semantics import evaluate, to_int32
+from src.code_generator.type_inference import TypeInference
+from src.optimizer.optimization_pass import OptimizationPass
+
+
+# Operators that may raise at run time (division by zero, 0 ^ -n); a subtree
+# containing one is never dropped or cancelled
+TRAPPING_OPERATORS = ("/", "//", "^")
+
+
+def can_trap(expr):
+    if isinstance(expr, tuple) and len(expr) == 4 and expr[1] == "(":
+        # The body of the function may
+        return True
+    if isinstance(expr, tuple) and len(expr) == 3:
+        operator, left, right = expr
+        return operator in TRAPPING_OPERATORS or can_trap(left) or can_trap(right)
+    return False
+
+
+def _is_literal(expr, value):
+    return not isinstance(expr, (bool, tuple, str)) and expr == value
+
+
+class AlgebraicSimplification(OptimizationPass):
+    """
+    Apply algebraic identities to the parser's ``(operator, left, right)`` trees.
+
+    Integer ``+``/``-`` and ``*`` chains are flattened and reassociated so their
+    constants group into one literal at the end: ``(x+1)+2`` becomes ``x+3``
+    and ``2*(3*x)`` becomes ``x*6``; ``x+0``, ``x*1``, ``x-x`` and ``x*0`` fall
+    out of the same step. Integers wrap at 32 bits, so this is exact.
+
+    Reals are float32 and not associative, so REAL subtrees only get the
+    identities that are exact for every value and keep the type (``x*1``,
+    ``x/1``, ``x-0``); variable types come from TypeInference. Subtrees that
+    could divide by zero, calls included, are never removed. Function bodies
+    are left alone, only the arguments of calls are simplified.
+    """
+
+    name = "algebraic_simplification"
+    stage = "ast"
+
+    def __init__(self):
+        super().__init__()
+        self.stats = {"reassociated": 0, "identities": 0, "cancelled": 0, "zeroed": 0}
+
+    def run(self, asts):
+        # Rewrites never change an expression's type, so the types inferred
+        # up front stay valid for the simplified program
+        self.types = TypeInference().infer(asts)
+        simplified = []
+        for self.line, ast in enumerate(asts, 1):
+            simplified.append(self._simplify_statement(ast))
+        return simplified
+
+    def expression_type(self, expr):
+        return self.types.expression_type(expr, self.line)
+
+    def _simplify_statement(self, ast):
+        if not isinstance(ast, tuple):
+            return self.simplify(ast)
+        if ast[0] == "def":
+            # The parameters have no types until the function is called
+            return ast
+        if ast[0] == "=":
+            _, var_name, expr = ast
+            if isinstance(expr, tuple) and expr[0] in ("list_decl", "list_op"):
+                return ast
+            return ("=", var_name, self.simplify(expr))
+        if ast[0] == "list_assign":
+            _, var_name, index, value = ast
+            return ("list_assign", var_name, index, self.simplify(value))
+        if ast[0] == "repeat":
+            return ("repeat", self.simplify(ast[1]))
+        if ast[0] == "for":
+            _, var_name, start, end = ast
+            return ("for", var_name, self.simplify(start), self.simplify(end))
+        return self.simplify(ast)
+
+    def simplify(self, expr):
+        """Return a simplified copy of an expression tree."""
+        if isinstance(expr, tuple) and len(expr) == 4 and expr[1] == "(":
+            name, _, arguments, _ = expr
+            return (name, "(", [self.simplify(argument) for argument in arguments], ")")
+        if not isinstance(expr, tuple) or len(expr) != 3:
+            return expr
+
+        operator, left, right = expr
+        if self.expression_type(expr) == "INT":
+            if operator in ("+", "-"):
+                return self._simplify_sum(expr)
+            if operator == "*":
+                return self._simplify_product(expr)
+
+        expr = (operator, self.simplify(left), self.simplify(right))
+        return self._apply_identities(expr)
+
+    def _flatten(self, expr, operators, sign=1):
+        """Split an integer chain of `operators` into [(sign, term)]."""
+        if (
+            isinstance(expr, tuple)
+            and len(expr) == 3
+            and expr[0] in operators
+            and self.expression_type(expr) == "INT"
+        ):
+            operator, left, right = expr
+            right_sign = -sign if operator == "-" else sign
+            return self._flatten(left, operators, sign) + self._flatten(
+                right, operators, right_sign
+            )
+        return [(sign, self.simplify(expr))]
+
+    def _simplify_sum(self, expr):
+        constant = 0
+        literals = 0
+        terms = []
+        for sign, term in self._flatten(expr, ("+", "-")):
+            if isinstance(term, int):
+                constant = to_int32(constant + sign * term)
+                literals += 1
+            else:
+                terms.append((sign, term))
+
+        # x - x: drop pairs of equal terms with opposite signs
+        remaining = []
+        for sign, term in terms:
+            match = next(
+                (
+                    i
+                    for i, (other_sign, other) in enumerate(remaining)
+                    if other_sign == -sign and repr(other) == repr(term)
+                ),
+                None,
+            )
+            if match is not None and not can_trap(term):
+                del remaining[match]
+                self.stats["cancelled"] += 1
+            else:
+                remaining.append((sign, term))
+
+        if literals > 1:
+            self.stats["reassociated"] += 1
+        elif literals == 1 and constant == 0 and any(s > 0 for s, _ in remaining):
+            self.stats["identities"] += 1
+
+        # Positive terms first; with none, the chain starts from the constant
+        remaining.sort(key=lambda signed: signed[0] < 0)
+        if not remaining:
+            return constant
+        sign, result = remaining[0]
+        if sign < 0:
+            result = ("-", constant, result)
+            constant = 0
+        for sign, term in remaining[1:]:
+            result = ("+" if sign > 0 else "-", result, term)
+        if constant > 0 or constant == -(2**31):
+            result = ("+", result, constant)
+        elif constant < 0:
+            result = ("-", result, -constant)
+        return result
+
+    def _simplify_product(self, expr):
+        constant = 1
+        literals = 0
+        factors = []
+        for _, factor in self._flatten(expr, ("*",)):
+            if isinstance(factor, int):
+                constant = evaluate("MUL.i", constant, factor)
+                literals += 1
+            else:
+                factors.append(factor)
+
+        if constant == 0 and not any(can_trap(factor) for factor in factors):
+            if factors:
+                self.stats["zeroed"] += 1
+            return 0
+
+        if literals > 1:
+            self.stats["reassociated"] += 1
+        elif literals == 1 and constant == 1 and factors:
+            self.stats["identities"] += 1
+
+        if not factors:
+            return constant
+        result = factors[0]
+        for factor in factors[1:]:
+            result = ("*", result, factor)
+        if constant != 1:
+            result = ("*", result, constant)
+        return result
+
+    def _apply_identities(self, expr):
+        """Identities that hold exactly for the expression's type."""
+        operator, left, right = expr
+        result = None
+
+        if operator in ("*", "/", "//", "^") and _is_literal(right, 1):
+            # x*1, x/1, x//1, x^1
+            result = left
+        elif operator == "*" and _is_literal(left, 1):
+            result = right
+        elif operator == "-" and _is_literal(right, 0):
+            # x - 0 is exact for reals too (-0.0 - 0 == -0.0), unlike x + 0
+            result = left
+        elif (
+            operator == "^"
+            and isinstance(right, int)
+            and right == 0
+            and self.expression_type(left) == "INT"
+            and not can_trap(left)
+        ):
+            result = 1
+
+        # Only rewrite when the type of the expression is unchanged, e.g.
+        # x//1 with a real x truncates and 2*1.0 is real, so neither is x
+        if result is None or self.expression_type(result) != self.expression_type(expr):
+            return expr
+        self.stats["identities"] += 1
+        return result
@@ -0,0 +1,86 @@
+from typing import Hashable, NamedTuple, Optional
+
+from src.code_generator.instruction import is_memory, parse_address
+
+
+class ElementLocation(NamedTuple):
+    """
+    A list element as far as it is known.
+
+    ``list_name`` is the list the address is relative to (``@x`` in
+    ``[@x+8]``), None if the base is a register holding a computed address.
+    ``offset`` is the byte offset from the base when it is a known constant,
+    otherwise any hashable description of the index such that equal
+    descriptions mean equal addresses (e.g. the value number of the index
+    register), or None.
+    """
+
+    list_name: Optional[str]
+    offset: Optional[Hashable]
+
+    @property
+    def is_precise(self):
+        """True if equal locations are guaranteed to be the same address."""
+        return self.list_name is not None and self.offset is not None
+
+
+def list_of(address):
+    """The list (``@x``) an address operand is relative to, None for a register base."""
+    base = parse_address(address)[0]
+    return base if is_memory(base) else None
+
+
+def may_alias(first, second):
+    """
+    Whether two element accesses can touch the same memory.
+
+    Distinct lists never alias; elements of the same list alias only if
+    their offsets are equal or one of them is not a constant.
+    """
+    if first.list_name is None or second.list_name is None:
+        return True
+    if first.list_name != second.list_name:
+        return False
+    if isinstance(first.offset, int) and isinstance(second.offset, int):
+        return first.offset == second.offset
+    return True
+
+
+class ElementMemory:
+    """
+    What is known about the contents of list elements during a forward walk.
+
+    Values are whatever the pass tracks (value numbers, constants, ...). A
+    store forgets every location it may alias and then records its own
+    location if that is precise; FILL forgets a whole list.
+    """
+
+    def __init__(self):
+        self.values = {}
+
+    def lookup(self, location):
+        return self.values.get(location) if location.is_precise else None
+
+    def store(self, location, value):
+        self.values = {
+            known: known_value
+            for known, known_value in self.values.items()
+            if not may_alias(known, location)
+        }
+        if location.is_precise and value is not None:
+            self.values[location] = value
+
+    def load(self, location, value):
+        """Remember that a load from a precise location produced `value`."""
+        if location.is_precise:
+            self.values[location] = value
+
+    def fill(self, list_name):
+        if list_name is None:
+            self.values = {}
+        else:
+            self.values = {
+                known: value
+                for known, value in self.values.items()
+                if known.list_name != list_name
+            }
@@ -0,0 +1,119 @@
+from src.code_generator.instruction import BARRIER_OPCODES, Instruction, is_immediate
+from src.code_generator.semantics import (
+    OPERATIONS,
+    evaluate,
+    format_immediate,
+    parse_immediate,
+)
+from src.optimizer.optimization_pass import OptimizationPass
+
+
+def remove_unused_immediates(instructions, registers=None):
+    """
+    Drop LD Rd #n whose destination is never read. Returns how many were removed.
+
+    :param registers: Only drop the loads of these registers (None for any)
+    """
+    used = {register for instruction in instructions for register in instruction.uses()}
+    kept = [
+        instruction
+        for instruction in instructions
+        if not (
+            instruction.opcode == "LD"
+            and is_immediate(instruction.operands[1])
+            and instruction.operands[0] not in used
+            and (registers is None or instruction.operands[0] in registers)
+        )
+    ]
+    removed = len(instructions) - len(kept)
+    instructions[:] = kept
+    return removed
+
+
+class ConstantFolding(OptimizationPass):
+    """
+    Evaluate instructions whose operands are all known immediates.
+
+    ``LD #3 / LD #2 / ADD.i`` becomes a single ``LD #5``. Results follow the
+    target semantics in src.code_generator.semantics; an operation that would
+    divide by zero is left in place and reported instead. Nothing known is
+    carried past a LABEL or a CALL.
+    """
+
+    name = "constant_folding"
+
+    def __init__(self):
+        super().__init__()
+        self.stats = {"folded": 0, "division_by_zero": 0}
+        self.diagnostics = []
+
+    def run(self, program):
+        instructions = program.instructions
+        constants = {}
+
+        for index, instruction in enumerate(instructions):
+            if instruction.opcode in BARRIER_OPCODES:
+                self._at_label(constants)
+            if not instruction.is_code:
+                continue
+
+            if instruction.opcode == "LD" and is_immediate(instruction.operands[1]):
+                constants[instruction.operands[0]] = parse_immediate(
+                    instruction.operands[1]
+                )
+                continue
+
+            if instruction.opcode == "MOV" and instruction.operands[1] in constants:
+                constants[instruction.operands[0]] = constants[instruction.operands[1]]
+                continue
+
+            if self._transfer(instructions, index, constants):
+                continue
+
+            if instruction.opcode in OPERATIONS:
+                dest, *sources = instruction.operands
+                if all(source in constants for source in sources):
+                    value = self._evaluate(instruction, [constants[s] for s in sources])
+                    if value is not None:
+                        instructions[index] = Instruction(
+                            "LD", [dest, format_immediate(value)], line=instruction.line
+                        )
+                        constants[dest] = value
+                        self.stats["folded"] += 1
+                        continue
+
+            for register in instruction.defs():
+                constants.pop(register, None)
+
+        remove_unused_immediates(instructions)
+        return program
+
+    def _transfer(self, instructions, index, constants):
+        """
+        Hook for subclasses that know more than register immediates.
+
+        May rewrite instructions[index]; returns True if it fully handled the
+        instruction (including the constants it defines).
+        """
+        return False
+
+    def _at_label(self, constants):
+        """
+        Forget what is known where a loop branches in: the values may come
+        from the end of the loop body as well as from before it. A called
+        function may have changed memory and registers as well.
+        """
+        constants.clear()
+
+    def _evaluate(self, instruction, values):
+        try:
+            return evaluate(instruction.opcode, *values)
+        except ZeroDivisionError as e:
+            self.stats["division_by_zero"] += 1
+            self.diagnostics.append(f"line {instruction.line}: {str(e)}, not folded")
+        except (ValueError, OverflowError):
+            pass
+        return None
+
+    def report(self):
+        return super().report() + self.diagnostics
@@ -0,0 +1,156 @@
+from src.code_generator.instruction import (
+    VECTOR_OPCODES,
+    Instruction,
+    is_address,
+    is_memory,
+    memory_opcode,
+    parse_address,
+)
+from src.code_generator.semantics import ELEMENT_WIDTHS, format_immediate, to_int8
+from src.optimizer.alias_analysis import list_of
+from src.optimizer.constant_folding import ConstantFolding
+
+
+class ConstantPropagation(ConstantFolding):
+    """
+    Constant folding extended across statements through memory.
+
+    A forward walk over the program tracks the value last stored to each
+    variable (``x = 5``) and to each list element (``x = list[3]``,
+    ``x[1] = 2``). Loads of known values become immediates and fold into the
+    expressions that use them; a store of an unknown value invalidates.
+    Elements are known at the width the list was filled with, so a byte
+    access to a list of words (or the reverse) forgets the list. At a LABEL
+    (a loop's start or end) or a CALL memory is forgotten as well.
+    """
+
+    name = "constant_propagation"
+
+    def __init__(self):
+        super().__init__()
+        self.stats["propagated"] = 0
+
+    def run(self, program):
+        # variable -> known value
+        self.memory = {}
+        # list (@x) -> {"fill", "count", "width", "elements": {offset: value}}
+        self.lists = {}
+        return super().run(program)
+
+    def _transfer(self, instructions, index, constants):
+        instruction = instructions[index]
+        opcode = memory_opcode(instruction.opcode)
+        width = _width(instruction.opcode)
+        if opcode == "LD":
+            dest, source = instruction.operands
+            value = self._known_value(source, constants, width)
+            if value is not None:
+                instructions[index] = Instruction(
+                    "LD", [dest, format_immediate(value)], line=instruction.line
+                )
+                constants[dest] = value
+                self.stats["propagated"] += 1
+                return True
+            return False
+
+        if opcode == "ST":
+            target, value = instruction.operands
+            value = constants.get(value)
+            if value is not None and width == 1:
+                value = to_int8(value)
+            if is_memory(target):
+                self._store_variable(target, value)
+            else:
+                self._store_element(target, value, constants, width)
+            return True
+
+        if instruction.opcode in VECTOR_OPCODES or opcode == "COPY":
+            name = list_of(instruction.operands[0])
+            if name is None:
+                self.lists.clear()
+            else:
+                self.lists.pop(name, None)
+            return True
+
+        if opcode == "FILL":
+            address, value, count = instruction.operands
+            name = list_of(address)
+            if name is None:
+                self.lists.clear()
+            elif value in constants and count in constants:
+                fill = constants[value]
+                self.lists[name] = {
+                    "fill": to_int8(fill) if width == 1 else fill,
+                    "count": constants[count],
+                    "width": width,
+                    "elements": {},
+                }
+            else:
+                self.lists.pop(name, None)
+            return True
+
+        return False
+
+    def _at_label(self, constants):
+        super()._at_label(constants)
+        self.memory.clear()
+        self.lists.clear()
+
+    def _known_value(self, source, constants, width):
+        if is_memory(source):
+            return self.memory.get(source)
+        if not is_address(source):
+            return None
+
+        location = self._element(source, constants)
+        if location is None or location[0] not in self.lists:
+            return None
+        name, offset = location
+        known = self.lists[name]
+        if offset is None or known["width"] != width:
+            return None
+        if offset in known["elements"]:
+            return known["elements"][offset]
+        if 0 <= offset < known["count"] * width:
+            return known["fill"]
+        return None
+
+    def _element(self, address, constants):
+        """Resolve an address to (list, byte offset) when both are known."""
+        _, index, scale, displacement = parse_address(address)
+        name = list_of(address)
+        if name is None:
+            return None
+        if index is None:
+            return name, displacement
+        if index in constants:
+            return name, constants[index] * scale + displacement
+        return name, None
+
+    def _store_variable(self, target, value):
+        if target == "@print":
+            return
+        if value is None:
+            self.memory.pop(target, None)
+        else:
+            self.memory[target] = value
+
+    def _store_element(self, target, value, constants, width):
+        location = self._element(target, constants)
+        if location is None:
+            # Unknown base: the store could land in any list
+            self.lists.clear()
+            return
+        name, offset = location
+        if name not in self.lists:
+            return
+        if offset is None or self.lists[name]["width"] != width:
+            del self.lists[name]
+        else:
+            # None records that the fill value no longer describes this element
+            self.lists[name]["elements"][offset] = value
+
+
+def _width(opcode):
+    """Bytes an element access of the opcode covers."""
+    return ELEMENT_WIDTHS["int8"] if opcode.endswith(".b") else ELEMENT_WIDTHS["int32"]
@@ -0,0 +1,154 @@
+from src.code_generator.instruction import (
+    BLOCK_OPCODES,
+    BRANCH_OPCODES,
+    STORE_OPCODES,
+    VECTOR_OPCODES,
+    is_immediate,
+    is_memory,
+    memory_opcode,
+)
+from src.code_generator.semantics import evaluate, parse_immediate
+from src.optimizer.optimization_pass import OptimizationPass
+
+
+# Opcodes that can raise at run time (see DeadCodeElimination._may_trap)
+TRAPPING_OPCODES = ("DIV.i", "EXP.i", "ADD.f", "SUB.f", "MUL.f", "DIV.f", "EXP.f")
+
+
+class DeadCodeElimination(OptimizationPass):
+    """
+    Remove stores nobody reads and the computations that only feed them.
+
+    A backward liveness walk over the statement sequence: ``ST @print`` is
+    the program's output and always live, a variable store is live only if
+    the variable is loaded again before the next store to it, and a
+    register definition is live only if a live instruction reads it.
+
+    List elements are not told apart, so element stores, FILL, COPY and
+    vector operations stay as long as any element load follows them; a
+    vector operation or COPY kept is itself such a load. Instructions that
+    may fail at run time (divisions, powers and real arithmetic, see
+    _may_trap) are kept even when their result is unused, so that the
+    program stops where it did unoptimized.
+
+    Branches stay, and where one leaves (to the start of a loop or past
+    its end, into a function or back from it) every variable and element
+    counts as live: the walk has not seen, or does not follow, the code on
+    the other side.
+
+    With ``keep_exported`` the variables of the symbol table (the ones
+    written to laika.csv) are live at the end of the program, so the last
+    store to each of them survives.
+    """
+
+    name = "dead_code_elimination"
+
+    def __init__(self):
+        super().__init__()
+        self.stats = {"stores": 0, "instructions": 0}
+        self.keep_exported = False
+
+    def run(self, program):
+        instructions = program.instructions
+        constants = self._constants(instructions)
+
+        live_registers = set()
+        live_memory = set()
+        if self.keep_exported:
+            live_memory = {f"@{name}" for name in program.symbol_table}
+        # Whether an element load follows, or the lists outlive the program
+        elements_live = self.keep_exported
+
+        variables = {
+            operand
+            for instruction in instructions
+            for operand in instruction.operands
+            if is_memory(operand)
+        }
+
+        kept = []
+        for instruction in reversed(instructions):
+            if not instruction.is_code:
+                kept.append(instruction)
+                continue
+
+            if instruction.opcode in BRANCH_OPCODES:
+                live_memory.update(variables)
+                elements_live = True
+                live_registers.update(instruction.uses())
+                kept.append(instruction)
+                continue
+
+            if instruction.opcode in STORE_OPCODES:
+                target = instruction.operands[0]
+                if instruction.opcode == "ST" and is_memory(target):
+                    live = target == "@print" or target in live_memory
+                    live_memory.discard(target)
+                else:
+                    live = elements_live
+                if not live:
+                    self.stats["stores"] += 1
+                    continue
+                if instruction.opcode in (*VECTOR_OPCODES, *BLOCK_OPCODES):
+                    elements_live = True
+            else:
+                defs = instruction.defs()
+                if not any(register in live_registers for register in defs) and not (
+                    self._may_trap(instruction, constants)
+                ):
+                    self.stats["instructions"] += 1
+                    continue
+                live_registers.difference_update(defs)
+                if memory_opcode(instruction.opcode) == "LD":
+                    source = instruction.operands[1]
+                    if is_memory(source):
+                        live_memory.add(source)
+                    elif not is_immediate(source):
+                        elements_live = True
+
+            live_registers.update(instruction.uses())
+            kept.append(instruction)
+
+        kept.reverse()
+        program.instructions[:] = kept
+        return program
+
+    def _constants(self, instructions):
+        """Registers loaded with an immediate exactly once, and their values."""
+        constants = {}
+        redefined = set()
+        for instruction in instructions:
+            for register in instruction.defs():
+                if register in constants or register in redefined:
+                    constants.pop(register, None)
+                    redefined.add(register)
+                elif instruction.opcode == "LD" and is_immediate(instruction.operands[1]):
+                    constants[register] = parse_immediate(instruction.operands[1])
+                else:
+                    redefined.add(register)
+        return constants
+
+    def _may_trap(self, instruction, constants):
+        """
+        Whether the instruction may raise at run time (see semantics):
+        division by zero and zero to a negative power, and for reals also a
+        result that is not finite and a negative base with a fractional
+        exponent. An instruction whose operands are all known is evaluated
+        to find out; real arithmetic on an unknown value may always fail.
+        """
+        opcode = instruction.opcode
+        if opcode not in TRAPPING_OPCODES:
+            return False
+        sources = instruction.operands[1:]
+        if all(source in constants for source in sources):
+            try:
+                evaluate(opcode, *(constants[source] for source in sources))
+            except (ArithmeticError, ValueError):
+                return True
+            return False
+        if opcode == "DIV.i":
+            return constants.get(sources[1], 0) == 0
+        if opcode == "EXP.i":
+            base, exponent = sources
+            return not (constants.get(exponent, -1) >= 0 or constants.get(base, 0) != 0)
+        return True
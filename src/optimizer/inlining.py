@@ -0,0 +1,223 @@
+from src.code_generator.data_layout import statement_calls
+from src.code_generator.type_inference import TypeInference
+from src.optimizer.algebraic_simplification import can_trap
+from src.optimizer.optimization_pass import OptimizationPass
+
+
+# Times the body of a loop is assumed to run when its count is not a literal
+LOOP_WEIGHT = 10
+# Most instructions inlining may add at one call site
+MAX_GROWTH = 40
+
+
+def _is_call(expr):
+    return isinstance(expr, tuple) and len(expr) == 4 and expr[1] == "("
+
+
+def _size(expr):
+    """
+    Instructions an expression lowers to, roughly: one per leaf and
+    operator, and for a call the argument stores, the CALL and the load of
+    its result.
+    """
+    if _is_call(expr):
+        arguments = expr[2]
+        return sum(_size(argument) for argument in arguments) + len(arguments) + 2
+    if isinstance(expr, tuple) and len(expr) == 4:
+        return 1 + _size(expr[2])
+    if isinstance(expr, tuple):
+        return 1 + _size(expr[1]) + _size(expr[2])
+    return 1
+
+
+def _registers(expr):
+    """
+    Registers the lowering of an expression may need at once, at most:
+    operands are lowered left first, and converting one to a real or
+    computing an element's address takes up to two more.
+    """
+    if _is_call(expr):
+        # The arguments are lowered before the statement, the result is one load
+        return max([1, *(_registers(argument) for argument in expr[2])])
+    if isinstance(expr, tuple) and len(expr) == 4:
+        return 3
+    if isinstance(expr, tuple):
+        return max(_registers(expr[1]), 1 + _registers(expr[2]), 3)
+    return 1
+
+
+def _uses(expr, name):
+    """Times a parameter is read in a function body."""
+    if expr == name:
+        return 1
+    if _is_call(expr):
+        return sum(_uses(argument, name) for argument in expr[2])
+    if isinstance(expr, tuple) and len(expr) == 3:
+        return _uses(expr[1], name) + _uses(expr[2], name)
+    return 0
+
+
+def _substitute(expr, bindings):
+    """The body of a function with its parameters replaced by the arguments."""
+    if isinstance(expr, str):
+        return bindings.get(expr, expr)
+    if _is_call(expr):
+        name, _, arguments, _ = expr
+        return (name, "(", [_substitute(argument, bindings) for argument in arguments], ")")
+    if isinstance(expr, tuple) and len(expr) == 3:
+        operator, left, right = expr
+        return (operator, _substitute(left, bindings), _substitute(right, bindings))
+    return expr
+
+
+class Inlining(OptimizationPass):
+    """
+    Replace calls by the body of the function called.
+
+    A call costs its argument stores, the CALL, the result's store and
+    load and the RET on top of the body, and keeps every pass from seeing
+    through it; an inlined body costs only itself, with the arguments in
+    place of the parameters, but copies it to the call site. A call is
+    inlined when the body is no bigger than the call itself, or when the
+    instructions saved on each run of it, times how often it runs, make up
+    for the code added (at most MAX_GROWTH instructions). A call in a loop
+    runs as often as the loop repeats: the literal count of a
+    ``repeat 8`` or ``for i in 0..8`` loop, LOOP_WEIGHT times otherwise,
+    multiplied for nested loops.
+
+    Functions are handled in the order they are defined, so a body is
+    inlined into its callers after the calls in it were. Expressions are
+    pure, so substituting an argument for each read of its parameter
+    computes the same value, except that an argument never read would no
+    longer raise: calls with such an argument are kept. A function whose
+    calls were all inlined leaves no code (see CodeGenerator).
+    """
+
+    name = "inlining"
+    stage = "ast"
+
+    def __init__(self):
+        super().__init__()
+        self.stats = {"inlined": 0, "kept": 0}
+        # Instructions saved per run by the calls inlined in the current statement
+        self.saved = 0
+
+    def run(self, asts):
+        types = TypeInference().infer(asts)
+        # function name -> (parameters, body after inlining)
+        self.functions = {}
+        inlined = []
+        for line, ast in enumerate(asts, 1):
+            if isinstance(ast, tuple) and ast[0] == "def":
+                _, name, parameters, body = ast
+                body = self._inline_statement(body, 1)
+                self.functions[name] = (parameters, body)
+                inlined.append(("def", name, parameters, body))
+                continue
+            if line in types.errors or not statement_calls(ast):
+                inlined.append(ast)
+                continue
+            frequency = _frequency(asts, types, line)
+            inlined.append(self._inline_statement(ast, frequency))
+        return inlined
+
+    def _inline_statement(self, ast, frequency):
+        """
+        The statement (or function body) with its calls inlined where worth
+        it, or as it is if that costs more than it saves once the budget is
+        counted: a call keeps its arguments and result in memory, while an
+        inlined body needing more registers than num_registers makes the
+        emitter spill, a store and a load per value over the budget on
+        each run, which can outweigh the instructions the calls saved.
+        """
+        stats = dict(self.stats)
+        self.saved = 0
+        inlined = self._inline_expressions(ast, frequency)
+        if self.num_registers is not None:
+            spills = sum(
+                2 * max(_registers(expr) - self.num_registers, 0)
+                for expr in _expressions(inlined)
+            )
+            if spills and spills >= self.saved:
+                self.stats = stats
+                self.stats["kept"] += len(statement_calls(ast))
+                return ast
+        return inlined
+
+    def _inline_expressions(self, ast, frequency):
+        if isinstance(ast, tuple) and ast[0] == "=":
+            return ("=", ast[1], self._inline(ast[2], frequency))
+        if isinstance(ast, tuple) and ast[0] == "repeat":
+            return ("repeat", self._inline(ast[1], frequency))
+        if isinstance(ast, tuple) and ast[0] == "for":
+            _, var_name, start, end = ast
+            return ("for", var_name, self._inline(start, frequency), self._inline(end, frequency))
+        return self._inline(ast, frequency)
+
+    def _inline(self, expr, frequency):
+        """Inline the calls of an expression run `frequency` times, innermost first."""
+        if _is_call(expr):
+            name, _, arguments, _ = expr
+            call = (name, "(", [self._inline(argument, frequency) for argument in arguments], ")")
+            if self._worth_inlining(call, frequency):
+                self.stats["inlined"] += 1
+                self.saved += self._saving(call)[0]
+                parameters, body = self.functions[name]
+                return _substitute(body, dict(zip(parameters, call[2])))
+            self.stats["kept"] += 1
+            return call
+        if isinstance(expr, tuple) and len(expr) == 3:
+            operator, left, right = expr
+            return (operator, self._inline(left, frequency), self._inline(right, frequency))
+        return expr
+
+    def _worth_inlining(self, call, frequency):
+        name, _, arguments, _ = call
+        parameters, body = self.functions[name]
+        if any(
+            _uses(body, parameter) == 0 and can_trap(argument)
+            for parameter, argument in zip(parameters, arguments)
+        ):
+            return False
+        saved, growth = self._saving(call)
+        if saved <= 0:
+            return False
+        if growth <= 0:
+            return True
+        return growth <= MAX_GROWTH and saved * frequency >= growth
+
+    def _saving(self, call):
+        """(instructions saved per run, instructions added) by inlining the call."""
+        name, _, arguments, _ = call
+        parameters, body = self.functions[name]
+        inlined = _size(_substitute(body, dict(zip(parameters, arguments))))
+        # Stores of the arguments, CALL and result load, then the body, its store and RET
+        saved = _size(call) + _size(body) + 2 - inlined
+        return saved, inlined - _size(call)
+
+
+def _expressions(ast):
+    """The expressions a statement evaluates."""
+    if isinstance(ast, tuple) and ast[0] == "=":
+        return [ast[2]]
+    if isinstance(ast, tuple) and ast[0] == "repeat":
+        return [ast[1]]
+    if isinstance(ast, tuple) and ast[0] == "for":
+        return [ast[2], ast[3]]
+    return [ast]
+
+
+def _frequency(asts, types, line):
+    """Times the statement on `line` runs per run of the program, estimated."""
+    frequency = 1
+    for header, end in types.loops.items():
+        if not header < line < end or header in types.errors:
+            continue
+        ast = asts[header - 1]
+        if ast[0] == "repeat" and isinstance(ast[1], int):
+            frequency *= max(ast[1], 0)
+        elif ast[0] == "for" and isinstance(ast[2], int) and isinstance(ast[3], int):
+            frequency *= max(ast[3] - ast[2], 0)
+        else:
+            frequency *= LOOP_WEIGHT
+    return frequency
@@ -0,0 +1,26 @@
+class OptimizationPass:
+    """
+    Base class for passes run by the PassManager.
+
+    Subclasses set ``name`` and implement ``run``. IR passes (the default
+    ``stage``) rewrite the IRProgram's instructions in place; passes with
+    ``stage = "ast"`` receive the list of per-line ASTs and return a new one.
+    Anything worth reporting (hit counts, folded expressions, ...) goes into
+    ``stats``. ``num_registers`` is the emitter's register budget (None for
+    unlimited), for passes that lengthen live ranges, and ``target`` the
+    Target description (None for the default).
+    """
+
+    name = None
+    stage = "ir"
+
+    def __init__(self):
+        self.stats = {}
+        self.num_registers = None
+        self.target = None
+
+    def run(self, program):
+        raise NotImplementedError
+
+    def report(self):
+        return [f"{key}: {value}" for key, value in self.stats.items()]
@@ -0,0 +1,183 @@
+from dataclasses import dataclass
+import copy
+import time
+
+from src.code_generator.emitter import Emitter
+from src.optimizer.algebraic_simplification import AlgebraicSimplification
+from src.optimizer.constant_folding import ConstantFolding
+from src.optimizer.constant_propagation import ConstantPropagation
+from src.optimizer.dead_code_elimination import DeadCodeElimination
+from src.optimizer.inlining import Inlining
+from src.optimizer.instruction_scheduling import InstructionScheduling
+from src.optimizer.peephole import PeepholeOptimizer
+from src.optimizer.register_promotion import RegisterPromotion
+from src.optimizer.strength_reduction import StrengthReduction
+from src.optimizer.value_numbering import ValueNumbering
+
+
+# Every pass the manager knows about, by name
+PASSES = {
+    "algebraic_simplification": AlgebraicSimplification,
+    "constant_folding": ConstantFolding,
+    "constant_propagation": ConstantPropagation,
+    "dead_code_elimination": DeadCodeElimination,
+    "inlining": Inlining,
+    "instruction_scheduling": InstructionScheduling,
+    "peephole": PeepholeOptimizer,
+    "register_promotion": RegisterPromotion,
+    "strength_reduction": StrengthReduction,
+    "value_numbering": ValueNumbering,
+}
+
+# Pass pipelines for -O0 .. -O3
+OPTIMIZATION_LEVELS = {
+    0: [],
+    1: ["inlining", "constant_folding", "peephole"],
+    2: [
+        "inlining",
+        "algebraic_simplification",
+        "constant_propagation",
+        "value_numbering",
+        "strength_reduction",
+        "peephole",
+        "dead_code_elimination",
+        "instruction_scheduling",
+    ],
+}
+# -O3 also keeps hot variables in registers for the whole program
+OPTIMIZATION_LEVELS[3] = [
+    "inlining",
+    "algebraic_simplification",
+    "constant_propagation",
+    "register_promotion",
+    "value_numbering",
+    "strength_reduction",
+    "peephole",
+    "dead_code_elimination",
+    "instruction_scheduling",
+]
+
+
+@dataclass
+class PassResult:
+    optimization_pass: object
+    seconds: float
+    size_before: int
+    size_after: int
+    unit: str
+    reverted: bool = False
+
+
+def count_nodes(ast):
+    """Number of operator and leaf nodes in an AST."""
+    if isinstance(ast, tuple) and ast[0] == "def":
+        return 1 + count_nodes(ast[3])
+    if isinstance(ast, tuple) and len(ast) == 4 and ast[1] == "(":
+        return 1 + sum(count_nodes(argument) for argument in ast[2])
+    if isinstance(ast, tuple):
+        return 1 + sum(count_nodes(child) for child in ast[1:])
+    return 1
+
+
+class PassManager:
+    def __init__(
+        self,
+        passes=None,
+        optimization_level=1,
+        num_registers=None,
+        keep_exported=False,
+        target=None,
+    ):
+        """
+        Initialize the PassManager with a pass pipeline.
+
+        AST-stage passes always run before lowering and IR passes after it;
+        within each stage the given order is kept.
+
+        :param passes: Pass names to run in order; overrides optimization_level
+        :param optimization_level: 0-3, selects a pipeline from OPTIMIZATION_LEVELS
+        :param num_registers: Register budget of the emitter, respected by the passes
+        :param keep_exported: Keep the final stores to symbol-table variables
+        :param target: Target description for cost-driven passes (None for the default)
+        """
+        if optimization_level not in OPTIMIZATION_LEVELS:
+            raise ValueError(f"Unknown optimization level -O{optimization_level}")
+        names = OPTIMIZATION_LEVELS[optimization_level] if passes is None else passes
+
+        unknown = [name for name in names if name not in PASSES]
+        if unknown:
+            raise ValueError(f"Unknown pass(es): {', '.join(unknown)}")
+
+        self.num_registers = num_registers
+        self.passes = [PASSES[name]() for name in names]
+        for optimization_pass in self.passes:
+            optimization_pass.num_registers = num_registers
+            optimization_pass.target = target
+            if hasattr(optimization_pass, "keep_exported"):
+                optimization_pass.keep_exported = keep_exported
+        self.results = []
+
+    def run_ast(self, asts):
+        """Run the AST-stage passes over one AST per line and return the new ASTs."""
+        self.results = []
+        for optimization_pass in self.passes:
+            if optimization_pass.stage != "ast":
+                continue
+            before = sum(count_nodes(ast) for ast in asts if ast is not None)
+            start = time.perf_counter()
+            asts = optimization_pass.run(asts)
+            elapsed = time.perf_counter() - start
+            after = sum(count_nodes(ast) for ast in asts if ast is not None)
+            self.results.append(
+                PassResult(optimization_pass, elapsed, before, after, "nodes")
+            )
+        return asts
+
+    def run(self, program):
+        """
+        Run the IR-stage passes over the IRProgram, recording timing and size deltas.
+
+        With a register budget, a pass whose output no longer fits in the
+        registers (while its input did) is undone.
+        """
+        for optimization_pass in self.passes:
+            if optimization_pass.stage != "ir":
+                continue
+            budget = Emitter(self.num_registers)
+            fits = self.num_registers is not None and budget.fits(program.instructions)
+            saved = copy.deepcopy(program.instructions) if fits else None
+
+            before = program.count()
+            start = time.perf_counter()
+            optimization_pass.run(program)
+            elapsed = time.perf_counter() - start
+
+            reverted = fits and not budget.fits(program.instructions)
+            if reverted:
+                program.instructions[:] = saved
+            self.results.append(
+                PassResult(
+                    optimization_pass,
+                    elapsed,
+                    before,
+                    program.count(),
+                    "instructions",
+                    reverted,
+                )
+            )
+        return program
+
+    def report(self):
+        lines = []
+        for result in self.results:
+            delta = result.size_after - result.size_before
+            lines.append(
+                f"{result.optimization_pass.name}: {result.size_before} -> {result.size_after} "
+                f"{result.unit} ({delta:+d}) in {result.seconds * 1000:.2f} ms"
+            )
+            if result.reverted:
+                lines.append(
+                    f"  reverted: needs more than {self.num_registers} registers"
+                )
+            lines.extend(f"  {line}" for line in result.optimization_pass.report())
+        return lines
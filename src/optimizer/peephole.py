@@ -0,0 +1,443 @@
+from src.code_generator.instruction import (
+    BARRIER_OPCODES,
+    BLOCK_OPCODES,
+    BRANCH_OPCODES,
+    VECTOR_OPCODES,
+    Instruction,
+    format_assembly,
+    is_immediate,
+    is_memory,
+    is_register,
+    parse_address,
+    parse_assembly,
+)
+from src.code_generator.semantics import parse_immediate
+from src.optimizer.alias_analysis import ElementLocation, list_of, may_alias
+from src.optimizer.optimization_pass import OptimizationPass
+
+
+class PeepholeContext:
+    """
+    Forward knowledge of what each register currently holds.
+
+    A register can hold several values at once, e.g. after ``LD R0 #5`` and
+    ``ST @x R0`` it holds both the immediate ``#5`` and the contents of ``@x``.
+    Element keys remember which list element they are, so a store only
+    forgets the elements it may alias. Byte elements (LD.b, ST.b) are not
+    tracked: a byte load holds nothing reusable and a byte store forgets
+    every element of its list, as FILL, COPY and vector operations do.
+    Everything is forgotten at a LABEL, where a loop branches in, and at a
+    CALL.
+
+    With a register budget (``num_registers``) the context also keeps how
+    many registers are live at each position, so a rule can check that
+    keeping a register alive for longer still fits (within_budget) before
+    it rewrites anything.
+    """
+
+    def __init__(self, instructions=(), num_registers=None):
+        self.holds = {}
+        # key -> registers holding it, and register -> order it was first
+        # tracked in, so a lookup does not scan every register
+        self.holders = {}
+        self.rank = {}
+        self.versions = {}
+        # element key -> ElementLocation
+        self.locations = {}
+        # Register -> position of its last read when the sweep started, or a
+        # later one: rules record the reads they add. Instructions are only
+        # removed at the current index, so every later position has moved
+        # up by the number removed
+        self.last_use = last_uses(instructions)
+        self.removed = 0
+        self.num_registers = num_registers
+        # Rewrites within_budget turned down
+        self.over_budget = 0
+        if num_registers is not None:
+            self._compute_pressure(instructions)
+
+    def _compute_pressure(self, instructions):
+        """Registers live at each position, intervals running from definition to last use."""
+        first_def = {}
+        # Register -> position of its last definition or read
+        self.live_end = {}
+        for index, instruction in enumerate(instructions):
+            for register in instruction.defs():
+                first_def.setdefault(register, index)
+            for register in instruction.uses() + instruction.defs():
+                self.live_end[register] = index
+        self.pressure = [0] * (len(instructions) + 1)
+        for register, start in first_def.items():
+            self.pressure[start] += 1
+            self.pressure[self.live_end[register] + 1] -= 1
+        running = 0
+        for index in range(len(self.pressure)):
+            running += self.pressure[index]
+            self.pressure[index] = running
+
+    def within_budget(self, register, index):
+        """
+        True if the register can be kept alive up to the instruction at
+        `index`, which will read it, within the register budget; the longer
+        interval is then recorded. Only the stretch between its last use and
+        `index` gains a register.
+        """
+        if self.num_registers is None:
+            return True
+        position = index + self.removed
+        start = self.live_end.get(register, position) + 1
+        if any(
+            self.pressure[between] >= self.num_registers
+            for between in range(start, position)
+        ):
+            self.over_budget += 1
+            return False
+        for between in range(start, position):
+            self.pressure[between] += 1
+        self.live_end[register] = max(self.live_end.get(register, position), position)
+        return True
+
+    def last_read(self, register, index):
+        """Position of the last read of the register, or `index` if it has none."""
+        return self.last_use.get(register, index + self.removed) - self.removed
+
+    def read_at(self, register, index):
+        """Record that the instruction at `index` now reads the register."""
+        position = index + self.removed
+        self.last_use[register] = max(self.last_use.get(register, position), position)
+
+    def renamed(self, old, new):
+        """Record that the reads of `old` now read `new`."""
+        if old in self.last_use:
+            self.last_use[new] = max(self.last_use.get(new, 0), self.last_use[old])
+        if self.num_registers is not None and old in self.live_end:
+            # new takes over the rest of old's interval
+            self.live_end[new] = max(self.live_end.get(new, 0), self.live_end[old])
+
+    def remove(self, instructions, index):
+        """Delete the instruction at `index`, the one being rewritten."""
+        del instructions[index]
+        self.removed += 1
+
+    def key_of(self, operand):
+        """Describe the value a load from ``operand`` produces."""
+        if is_immediate(operand):
+            return ("imm", operand)
+        if is_memory(operand):
+            return ("mem", operand)
+        # Element load: the address is only valid for these register definitions
+        base, index, scale, displacement = parse_address(operand)
+        key = (
+            "ind",
+            base,
+            self.versions.get(base, 0),
+            index,
+            self.versions.get(index, 0),
+            scale,
+            displacement,
+        )
+        if key not in self.locations:
+            self.locations[key] = self._location(operand, index, scale, displacement, key)
+        return key
+
+    def _location(self, operand, index, scale, displacement, key):
+        list_name = list_of(operand)
+        if index is None:
+            return ElementLocation(list_name, displacement)
+        constant = next(
+            (held[1] for held in self.holds.get(index, ()) if held[0] == "imm"), None
+        )
+        if constant is not None and isinstance(parse_immediate(constant), int):
+            return ElementLocation(list_name, parse_immediate(constant) * scale + displacement)
+        return ElementLocation(list_name, key[3:])
+
+    def holder(self, key):
+        """The register tracked first among those holding ``key``, or None."""
+        registers = self.holders.get(key)
+        if not registers:
+            return None
+        return min(registers, key=self.rank.__getitem__)
+
+    def update(self, instruction):
+        if instruction.opcode in BARRIER_OPCODES:
+            self.holds = {}
+            self.holders = {}
+            self.rank = {}
+        if not instruction.is_code:
+            return
+
+        if instruction.opcode in ("FILL", "FILL.b", "ST.b", *VECTOR_OPCODES, *BLOCK_OPCODES):
+            list_name = list_of(instruction.operands[0])
+            self._forget(
+                lambda key: key[0] == "ind"
+                and (list_name is None or self.locations[key].list_name in (None, list_name))
+            )
+            return
+
+        if instruction.opcode == "ST":
+            target, value = instruction.operands
+            if is_memory(target):
+                self._drop(("mem", target))
+                if target != "@print":
+                    self._hold(value, {("mem", target)})
+            else:
+                stored = self.key_of(target)
+                location = self.locations[stored]
+                self._forget(
+                    lambda key: key[0] == "ind" and may_alias(self.locations[key], location)
+                )
+                self._hold(value, {stored})
+            return
+
+        for register in instruction.defs():
+            if instruction.opcode == "LD":
+                keys = {self.key_of(instruction.operands[1])}
+            elif instruction.opcode == "MOV":
+                keys = set(self.holds.get(instruction.operands[1], ()))
+            else:
+                keys = set()
+            self.versions[register] = self.versions.get(register, 0) + 1
+            for key in self.holds.pop(register, ()):
+                self.holders[key].discard(register)
+                if not self.holders[key]:
+                    del self.holders[key]
+            self._hold(register, keys)
+
+    def _hold(self, register, keys):
+        """Record that the register also holds ``keys``."""
+        if register not in self.holds:
+            self.holds[register] = set()
+            self.rank.setdefault(register, len(self.rank))
+        self.holds[register] |= keys
+        for key in keys:
+            self.holders.setdefault(key, set()).add(register)
+
+    def _drop(self, key):
+        for register in self.holders.pop(key, ()):
+            self.holds[register].discard(key)
+
+    def _forget(self, predicate):
+        for key in [key for key in self.holders if predicate(key)]:
+            self._drop(key)
+
+
+def last_uses(instructions):
+    """Register -> position of the last instruction reading it."""
+    last_use = {}
+    for index, instruction in enumerate(instructions):
+        for register in instruction.uses():
+            last_use[register] = index
+    return last_use
+
+
+def _rename_span(instructions, index, old, new, last_use=None):
+    """
+    Find the instructions after ``index`` that read ``old`` before it is redefined.
+
+    Returns their positions, or None when ``new`` is overwritten while ``old``
+    is still needed, in which case the rename would be unsafe. So is a read
+    past a LABEL or branch, which may see ``old`` from another path.
+
+    :param last_use: Position of the last read of ``old``, or any later one
+        (see last_uses); the scan stops there instead of at the end of the
+        program, which keeps a pass over a long program linear
+    """
+    positions = []
+    new_clobbered = False
+    branched = False
+    end = len(instructions) if last_use is None else min(last_use + 1, len(instructions))
+    for j in range(index + 1, end):
+        instruction = instructions[j]
+        if old in instruction.uses():
+            if new_clobbered or branched:
+                return None
+            positions.append(j)
+        if instruction.opcode == "LABEL" or instruction.opcode in BRANCH_OPCODES:
+            branched = True
+        defs = instruction.defs()
+        if old in defs:
+            break
+        if new in defs:
+            new_clobbered = True
+    return positions
+
+
+class PeepholeRule:
+    """
+    Base class for peephole rules.
+
+    ``apply`` inspects ``instructions[index]`` together with the context built
+    from everything before it, rewrites in place and returns True on a hit.
+    """
+
+    name = None
+
+    def apply(self, instructions, index, context):
+        raise NotImplementedError
+
+
+class ImmediateReuseRule(PeepholeRule):
+    """Replace ``LD Rb #n`` with a copy when some register already holds ``#n``."""
+
+    name = "immediate_reuse"
+
+    def apply(self, instructions, index, context):
+        instruction = instructions[index]
+        if instruction.opcode != "LD" or not is_immediate(instruction.operands[1]):
+            return False
+
+        dest = instruction.operands[0]
+        holder = context.holder(("imm", instruction.operands[1]))
+        if holder is None:
+            return False
+        # Only worth it if the copy will be propagated away afterwards
+        if holder != dest and (
+            _rename_span(instructions, index, dest, holder, context.last_read(dest, index))
+            is None
+        ):
+            return False
+        if not context.within_budget(holder, index):
+            return False
+
+        instructions[index] = Instruction("MOV", [dest, holder], line=instruction.line)
+        context.read_at(holder, index)
+        return True
+
+
+class RedundantLoadStoreRule(PeepholeRule):
+    """
+    Remove memory traffic whose effect is already known:
+    loads of a value some register holds, stores of a value the location
+    already has, and stores overwritten before they are ever read.
+    """
+
+    name = "redundant_load_store"
+
+    def __init__(self, window=64):
+        self.window = window
+
+    def apply(self, instructions, index, context):
+        instruction = instructions[index]
+
+        if instruction.opcode == "LD" and not is_immediate(instruction.operands[1]):
+            holder = context.holder(context.key_of(instruction.operands[1]))
+            if holder is None or not context.within_budget(holder, index):
+                return False
+            instructions[index] = Instruction(
+                "MOV", [instruction.operands[0], holder], line=instruction.line
+            )
+            context.read_at(holder, index)
+            return True
+
+        if instruction.opcode == "ST":
+            target, value = instruction.operands
+            if not is_memory(target) or target == "@print":
+                return False
+            if ("mem", target) in context.holds.get(value, ()) or self._overwritten(
+                instructions, index, target
+            ):
+                context.remove(instructions, index)
+                return True
+
+        return False
+
+    def _overwritten(self, instructions, index, target):
+        end = min(len(instructions), index + 1 + self.window)
+        for j in range(index + 1, end):
+            instruction = instructions[j]
+            if instruction.opcode == "LABEL" or instruction.opcode in BRANCH_OPCODES:
+                # The store may be read on the other path
+                return False
+            if instruction.opcode == "LD" and instruction.operands[1] == target:
+                return False
+            if instruction.opcode == "ST" and instruction.operands[0] == target:
+                return True
+        return False
+
+
+class CopyPropagationRule(PeepholeRule):
+    """Rewrite reads of a copied register to the original and drop the ``MOV``."""
+
+    name = "copy_propagation"
+
+    def apply(self, instructions, index, context):
+        instruction = instructions[index]
+        if instruction.opcode != "MOV":
+            return False
+
+        dest, src = instruction.operands
+        if not is_register(src):
+            return False
+        positions = (
+            []
+            if dest == src
+            else _rename_span(instructions, index, dest, src, context.last_read(dest, index))
+        )
+        if positions is None:
+            return False
+
+        for j in positions:
+            instructions[j].replace_use(dest, src)
+        context.renamed(dest, src)
+        context.remove(instructions, index)
+        return True
+
+
+DEFAULT_RULES = (ImmediateReuseRule, RedundantLoadStoreRule, CopyPropagationRule)
+
+
+class PeepholeOptimizer(OptimizationPass):
+    name = "peephole"
+
+    def __init__(self, rules=None, max_iterations=10):
+        """
+        Initialize the optimizer with a list of rules.
+
+        :param rules: PeepholeRule instances, applied in order (defaults to all built-in rules)
+        :param max_iterations: Upper bound on full sweeps before giving up on a fixed point
+        """
+        super().__init__()
+        self.rules = [rule() for rule in DEFAULT_RULES] if rules is None else list(rules)
+        self.max_iterations = max_iterations
+        self.stats = {rule.name: 0 for rule in self.rules}
+        self.stats["over_budget"] = 0
+        self.instructions_before = 0
+        self.instructions_after = 0
+
+    def run(self, program):
+        """Optimize an IRProgram in place."""
+        self._optimize(program.instructions)
+        return program
+
+    def optimize(self, assembly_code):
+        """Optimize a list of assembly strings and return the rewritten list."""
+        instructions = parse_assembly(assembly_code)
+        self._optimize(instructions)
+        return format_assembly(instructions)
+
+    def _optimize(self, instructions):
+        self.instructions_before = self._count(instructions)
+        for _ in range(self.max_iterations):
+            if not self._sweep(instructions):
+                break
+        self.instructions_after = self._count(instructions)
+
+    def _sweep(self, instructions):
+        context = PeepholeContext(instructions, self.num_registers)
+        changed = False
+        index = 0
+        while index < len(instructions):
+            for rule in self.rules:
+                if rule.apply(instructions, index, context):
+                    self.stats[rule.name] += 1
+                    changed = True
+                    break
+            else:
+                context.update(instructions[index])
+                index += 1
+        # Held back by the register budget in the last sweep, the one that stopped
+        self.stats["over_budget"] = context.over_budget
+        return changed
+
+    def _count(self, instructions):
+        return sum(1 for instruction in instructions if instruction.is_code)
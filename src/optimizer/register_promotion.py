@@ -0,0 +1,130 @@
+from collections import Counter
+import copy
+
+from src.code_generator.emitter import Emitter
+from src.code_generator.instruction import BARRIER_OPCODES, BRANCH_OPCODES, is_memory
+from src.optimizer.optimization_pass import OptimizationPass
+from src.optimizer.peephole import _rename_span, last_uses
+
+
+class RegisterPromotion(OptimizationPass):
+    """
+    Keep hot variables in registers for the whole program.
+
+    Variables are promoted in order of how often they are loaded. For a
+    promoted variable every load after the first reads the register that
+    holds its current value instead: the one the variable was last stored
+    from, or the first load. A store is only written back when memory is
+    read again afterwards or the value survives to the end of the program;
+    stores overwritten by the next store go away. Nothing is forwarded past a
+    LABEL or CALL, and a store followed by a branch is kept, since a loop (or
+    a called function) may read the variable on the other path.
+
+    With a register budget (``num_registers``) a variable is only promoted
+    if the program still fits in the registers afterwards, so the hottest
+    variables get them first.
+    """
+
+    name = "register_promotion"
+
+    def __init__(self):
+        super().__init__()
+        self.stats = {
+            "promoted": 0,
+            "loads_forwarded": 0,
+            "stores_removed": 0,
+            "over_budget": 0,
+        }
+
+    def run(self, program):
+        loads = Counter(
+            instruction.operands[1]
+            for instruction in program.instructions
+            if instruction.opcode == "LD" and is_memory(instruction.operands[1])
+        )
+        # Counter keeps first-seen order for ties
+        candidates = [variable for variable, count in loads.most_common() if count > 1]
+
+        for variable in candidates:
+            saved = (
+                copy.deepcopy(program.instructions)
+                if self.num_registers is not None
+                else None
+            )
+            forwarded, removed = self._promote(program.instructions, variable)
+            if saved is not None and not Emitter(self.num_registers).fits(
+                program.instructions
+            ):
+                program.instructions[:] = saved
+                self.stats["over_budget"] += 1
+                continue
+            if forwarded or removed:
+                self.stats["promoted"] += 1
+                self.stats["loads_forwarded"] += forwarded
+                self.stats["stores_removed"] += removed
+        return program
+
+    def _promote(self, instructions, variable):
+        """Forward the variable's value to its loads; returns (forwarded, removed)."""
+        current = None
+        forwarded = 0
+        # Positions before any load was deleted: each deletion is at the
+        # current index and moves every later read up by one
+        last_use = last_uses(instructions)
+        removed = 0
+        index = 0
+        while index < len(instructions):
+            instruction = instructions[index]
+            if instruction.opcode in BARRIER_OPCODES:
+                current = None
+            elif instruction.opcode == "ST" and instruction.operands[0] == variable:
+                current = instruction.operands[1]
+            elif instruction.opcode == "LD" and instruction.operands[1] == variable:
+                dest = instruction.operands[0]
+                positions = None
+                if current is not None:
+                    positions = _rename_span(
+                        instructions,
+                        index,
+                        dest,
+                        current,
+                        last_use.get(dest, index + removed) - removed,
+                    )
+                if positions is None:
+                    current = dest
+                else:
+                    for position in positions:
+                        instructions[position].replace_use(dest, current)
+                    if dest in last_use:
+                        last_use[current] = max(last_use.get(current, 0), last_use[dest])
+                    del instructions[index]
+                    removed += 1
+                    forwarded += 1
+                    continue
+            elif current is not None and current in instruction.defs():
+                # The register is reused for something else; reload next time
+                current = None
+            index += 1
+
+        return forwarded, self._remove_overwritten_stores(instructions, variable)
+
+    def _remove_overwritten_stores(self, instructions, variable):
+        """Drop stores followed by another store before any load of the variable or branch."""
+        accesses = [
+            index
+            for index, instruction in enumerate(instructions)
+            if instruction.opcode in ("LD", "ST") and variable in instruction.operands
+            or instruction.opcode == "LABEL"
+            or instruction.opcode in BRANCH_OPCODES
+        ]
+        overwritten = {
+            index
+            for index, following in zip(accesses, accesses[1:])
+            if instructions[index].opcode == "ST" and instructions[following].opcode == "ST"
+        }
+        instructions[:] = [
+            instruction
+            for index, instruction in enumerate(instructions)
+            if index not in overwritten
+        ]
+        return len(overwritten)
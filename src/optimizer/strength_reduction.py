@@ -0,0 +1,260 @@
+import math
+
+from src.code_generator.cost_model import total_cycles
+from src.code_generator.target import default_target
+from src.code_generator.instruction import Instruction, is_immediate, memory_opcode
+from src.code_generator.semantics import (
+    INT_RESULTS,
+    REAL_RESULTS,
+    evaluate,
+    format_immediate,
+    parse_immediate,
+    to_float32,
+)
+from src.optimizer.constant_folding import remove_unused_immediates
+from src.optimizer.optimization_pass import OptimizationPass
+
+
+def power_of_two(value):
+    """k if value == 2**k for an integer k >= 0, else None."""
+    if isinstance(value, int) and value > 0 and value & (value - 1) == 0:
+        return value.bit_length() - 1
+    return None
+
+
+def is_power_of_two_real(value):
+    mantissa, _ = math.frexp(abs(value))
+    return mantissa == 0.5
+
+
+class StrengthReduction(OptimizationPass):
+    """
+    Replace expensive operations by a constant with cheaper equivalents.
+
+    - ``EXP`` by a constant exponent becomes a multiply chain built by
+      exponentiation by squaring (reals only for exponent 2, the one case
+      where the product rounds exactly like the power).
+    - ``MUL.i`` by 2**k becomes ``SHL``.
+    - ``DIV.i`` of an integer by 2**k becomes ``SHR`` with a bias that keeps
+      rounding toward zero for negative dividends.
+    - ``DIV.f`` by a constant becomes ``MUL.f`` by its reciprocal when the
+      reciprocal is exact (powers of two), so results do not change.
+
+    A rewrite is only applied when the target has its opcodes and it is
+    cheaper under the cost model in src.code_generator.cost_model; the
+    cycles saved are reported.
+    """
+
+    name = "strength_reduction"
+
+    def __init__(self):
+        super().__init__()
+        self.stats = {
+            "exponents": 0,
+            "shifts": 0,
+            "divisions": 0,
+            "reciprocals": 0,
+            "cycles_saved": 0,
+        }
+
+    def run(self, program):
+        self.program = program
+        self.machine = self.target or default_target()
+        constants = {}
+        # register -> "INT" or "REAL", where known
+        types = {}
+        result = []
+        # Registers read by a reduced instruction but not by its replacement
+        released = set()
+
+        for instruction in program.instructions:
+            replacement = None
+            if instruction.is_code:
+                replacement = self._reduce(instruction, constants, types)
+
+            if replacement is None:
+                replacement = [instruction]
+            else:
+                saved = total_cycles([instruction], self.machine) - total_cycles(
+                    replacement, self.machine
+                )
+                self.stats["cycles_saved"] += saved
+                released.update(instruction.uses())
+                released.difference_update(
+                    register for new in replacement for register in new.uses()
+                )
+
+            for new in replacement:
+                self._track(new, constants, types)
+            result.extend(replacement)
+
+        program.instructions[:] = result
+        # Constants that were only used as the operand of a reduced instruction;
+        # other unused loads are left to dead code elimination
+        remove_unused_immediates(program.instructions, released)
+        return program
+
+    def _track(self, instruction, constants, types):
+        for register in instruction.defs():
+            constants.pop(register, None)
+            types.pop(register, None)
+        if not instruction.is_code or not instruction.defs():
+            return
+
+        dest = instruction.operands[0]
+        opcode = instruction.opcode
+        if memory_opcode(opcode) == "LD":
+            source = instruction.operands[1]
+            if is_immediate(source):
+                constants[dest] = parse_immediate(source)
+                types[dest] = "INT" if isinstance(constants[dest], int) else "REAL"
+            elif dest in self.program.register_types:
+                # Variables and list elements, typed by the lowering
+                types[dest] = self.program.register_types[dest]
+        elif opcode == "MOV":
+            source = instruction.operands[1]
+            if source in constants:
+                constants[dest] = constants[source]
+            if source in types:
+                types[dest] = types[source]
+        elif opcode in INT_RESULTS:
+            types[dest] = "INT"
+        elif opcode in REAL_RESULTS:
+            types[dest] = "REAL"
+            if opcode == "FL.i" and instruction.operands[1] in constants:
+                constants[dest] = evaluate("FL.i", constants[instruction.operands[1]])
+
+    def _reduce(self, instruction, constants, types):
+        """Cheaper instructions computing the same value, or None."""
+        opcode = instruction.opcode
+        if opcode in ("EXP.i", "EXP.f"):
+            dest, base, exponent = instruction.operands
+            if exponent in constants:
+                return self._cheaper(
+                    instruction,
+                    self._reduce_power(instruction, dest, base, constants[exponent]),
+                    "exponents",
+                )
+        elif opcode == "MUL.i":
+            dest, left, right = instruction.operands
+            if right not in constants and left in constants:
+                left, right = right, left
+            if right in constants:
+                return self._cheaper(
+                    instruction,
+                    self._reduce_multiply(instruction, dest, left, constants[right]),
+                    "shifts",
+                )
+        elif opcode == "DIV.i":
+            dest, left, right = instruction.operands
+            if right in constants and types.get(left) == "INT":
+                return self._cheaper(
+                    instruction,
+                    self._reduce_divide(instruction, dest, left, constants[right]),
+                    "divisions",
+                )
+        elif opcode == "DIV.f":
+            dest, left, right = instruction.operands
+            if right in constants:
+                return self._cheaper(
+                    instruction,
+                    self._reduce_real_divide(instruction, dest, left, constants[right]),
+                    "reciprocals",
+                )
+        return None
+
+    def _cheaper(self, instruction, replacement, stat):
+        if replacement is None or not all(
+            self.machine.has(new.opcode) for new in replacement
+        ):
+            return None
+        if total_cycles(replacement, self.machine) >= total_cycles([instruction], self.machine):
+            return None
+        self.stats[stat] += 1
+        return replacement
+
+    def _new(self, instruction, opcode, *operands):
+        return Instruction(opcode, list(operands), line=instruction.line)
+
+    def _immediate(self, instruction, value):
+        """(register, [LD register #value])"""
+        register = self.program.new_register()
+        return register, [self._new(instruction, "LD", register, format_immediate(value))]
+
+    def _reduce_power(self, instruction, dest, base, exponent):
+        if instruction.opcode == "EXP.f":
+            # Only x*x rounds exactly like x^2: the product is exact in double
+            if exponent == 2:
+                return [self._new(instruction, "MUL.f", dest, base, base)]
+            if exponent == 1:
+                return [self._new(instruction, "MOV", dest, base)]
+            return None
+
+        if not isinstance(exponent, int) or exponent < 0:
+            return None
+        if exponent == 0:
+            # Integer x^0 is 1 for every x, 0 included
+            return [self._new(instruction, "LD", dest, "#1")]
+        if exponent == 1:
+            return [self._new(instruction, "MOV", dest, base)]
+
+        # Left-to-right binary exponentiation: square for every bit, multiply
+        # by the base for every set bit after the leading one
+        code = []
+        accumulator = base
+        bits = bin(exponent)[3:]
+        for position, bit in enumerate(bits):
+            last = position == len(bits) - 1
+            square = dest if last and bit == "0" else self.program.new_register()
+            code.append(self._new(instruction, "MUL.i", square, accumulator, accumulator))
+            accumulator = square
+            if bit == "1":
+                product = dest if last else self.program.new_register()
+                code.append(self._new(instruction, "MUL.i", product, accumulator, base))
+                accumulator = product
+        return code
+
+    def _reduce_multiply(self, instruction, dest, operand, value):
+        shift = power_of_two(value)
+        if shift is None:
+            return None
+        if shift == 0:
+            return [self._new(instruction, "MOV", dest, operand)]
+        r_shift, code = self._immediate(instruction, shift)
+        return code + [self._new(instruction, "SHL", dest, operand, r_shift)]
+
+    def _reduce_divide(self, instruction, dest, operand, value):
+        shift = power_of_two(value)
+        if shift is None:
+            return None
+        if shift == 0:
+            return [self._new(instruction, "MOV", dest, operand)]
+
+        # An arithmetic shift rounds toward minus infinity; adding 2**k - 1 to
+        # negative dividends first makes it truncate toward zero like DIV.i.
+        # sign = x >> 31 is 0 or -1, and sign - (sign << k) is 0 or 2**k - 1.
+        r_31, code = self._immediate(instruction, 31)
+        r_shift, load_shift = self._immediate(instruction, shift)
+        code += load_shift
+        r_sign = self.program.new_register()
+        r_scaled = self.program.new_register()
+        r_bias = self.program.new_register()
+        r_biased = self.program.new_register()
+        return code + [
+            self._new(instruction, "SHR", r_sign, operand, r_31),
+            self._new(instruction, "SHL", r_scaled, r_sign, r_shift),
+            self._new(instruction, "SUB.i", r_bias, r_sign, r_scaled),
+            self._new(instruction, "ADD.i", r_biased, operand, r_bias),
+            self._new(instruction, "SHR", dest, r_biased, r_shift),
+        ]
+
+    def _reduce_real_divide(self, instruction, dest, operand, value):
+        if value == 0 or not is_power_of_two_real(value):
+            return None
+        # x * (1/c) == x / c for every x only when 1/c is exact
+        reciprocal = to_float32(1 / value)
+        if reciprocal != 1 / value:
+            return None
+        r_reciprocal, code = self._immediate(instruction, reciprocal)
+        return code + [self._new(instruction, "MUL.f", dest, operand, r_reciprocal)]
+
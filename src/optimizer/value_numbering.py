@@ -0,0 +1,247 @@
+from src.code_generator.instruction import (
+    BARRIER_OPCODES,
+    BLOCK_OPCODES,
+    VECTOR_OPCODES,
+    Instruction,
+    is_immediate,
+    is_memory,
+    parse_address,
+)
+from src.code_generator.semantics import parse_immediate
+from src.optimizer.alias_analysis import ElementLocation, ElementMemory, list_of
+from src.optimizer.optimization_pass import OptimizationPass
+from src.optimizer.peephole import _rename_span
+
+
+# Operations whose operands may be swapped without changing the result
+COMMUTATIVE_OPCODES = (
+    "ADD.i", "MUL.i", "ADD.f", "MUL.f", "EQ.i", "NE.i", "EQ.f", "NE.f",
+)
+
+
+class ValueNumbering(OptimizationPass):
+    """
+    Global value numbering over the whole (straight-line) program.
+
+    Every register gets a number naming the value it holds; two instructions
+    computing the same operation on the same numbers compute the same value.
+    When a register from an earlier statement still holds that value, the
+    later instruction is dropped and its readers use that register instead.
+
+    Memory is numbered too: ``ST @x R1`` makes ``@x`` hold the number of R1,
+    so a later ``LD @x`` is a reuse. List elements are tracked per location
+    with the alias analysis in src.optimizer.alias_analysis: a store to
+    ``x[1]`` is forwarded to later loads of ``x[1]`` and only forgets what
+    was known about elements it may alias. Byte elements are not tracked:
+    ``LD.b`` always gets a fresh number and ``ST.b`` forgets its list, as
+    vector operations do.
+    Immediate loads are never reused, reloading them is cheaper than keeping
+    a register busy. A LABEL or CALL starts over with memory unknown and no
+    holders, as no register lives across it.
+
+    Reusing a register lengthens its live range. With a register budget
+    (``num_registers``) a reuse that would need more registers than the
+    emitter has is skipped.
+    """
+
+    name = "value_numbering"
+
+    def __init__(self):
+        super().__init__()
+        self.stats = {"expressions": 0, "loads": 0, "over_budget": 0}
+
+    def run(self, program):
+        instructions = program.instructions
+        self._number_registers = {}
+        self._numbers = {}
+        # value number -> registers that were defined holding it
+        self._holders = {}
+        # "@x" -> number of stores to it so far
+        self._memory_versions = {}
+        self._elements = ElementMemory()
+        # value number -> constant it stands for
+        self._constant_values = {}
+        # Labels and calls passed so far; memory numbered before the last one is stale
+        self._labels = 0
+        self._compute_pressure(instructions)
+        removed = set()
+
+        for index, instruction in enumerate(instructions):
+            if instruction.opcode in BARRIER_OPCODES:
+                self._labels += 1
+                self._holders = {}
+                self._elements = ElementMemory()
+            if not instruction.is_code:
+                continue
+
+            if instruction.opcode == "ST":
+                self._store(instruction)
+                continue
+            if instruction.opcode in ("FILL", "FILL.b", "ST.b", *VECTOR_OPCODES, *BLOCK_OPCODES):
+                self._elements.fill(list_of(instruction.operands[0]))
+                continue
+
+            defs = instruction.defs()
+            if not defs:
+                continue
+            dest = defs[0]
+            if instruction.opcode == "MOV":
+                self._number_registers[dest] = self._number_of(instruction.operands[1])
+                continue
+
+            number = self._value_number(instruction, index)
+            holder = self._holder(number, dest)
+            if holder is not None and self._reuse(instructions, index, dest, holder):
+                removed.add(index)
+                stat = "loads" if instruction.opcode == "LD" else "expressions"
+                self.stats[stat] += 1
+                continue
+
+            self._number_registers[dest] = number
+            self._holders.setdefault(number, []).append(dest)
+
+        program.instructions[:] = [
+            instruction
+            for index, instruction in enumerate(instructions)
+            if index not in removed
+        ]
+        return program
+
+    def _number_of(self, register):
+        """Value number of a register, giving unknown registers a fresh one."""
+        if register not in self._number_registers:
+            key = ("register", register)
+            self._number_registers[register] = self._numbers.setdefault(
+                key, len(self._numbers)
+            )
+        return self._number_registers[register]
+
+    def _value_number(self, instruction, index):
+        """Number of the value a register-defining instruction produces."""
+        opcode, operands = instruction.opcode, instruction.operands
+        if opcode == "LD.b":
+            return self._numbers.setdefault(("element", index), len(self._numbers))
+        if opcode == "LD" and not is_immediate(operands[1]) and not is_memory(operands[1]):
+            location = self._location(operands[1])
+            number = self._elements.lookup(location)
+            if number is None:
+                # Nothing known about this element: a value of its own
+                number = self._numbers.setdefault(("element", index), len(self._numbers))
+                self._elements.load(location, number)
+            return number
+
+        key = self._key(instruction)
+        number = self._numbers.get(key)
+        if number is None:
+            number = self._numbers[key] = len(self._numbers)
+            if key[0] == "imm":
+                self._constant_values[number] = key[2]
+        return number
+
+    def _key(self, instruction):
+        opcode, operands = instruction.opcode, instruction.operands
+        if opcode == "LD":
+            source = operands[1]
+            if is_immediate(source):
+                value = parse_immediate(source)
+                return ("imm", type(value).__name__, value)
+            return ("mem", source, self._memory_versions.get(source, 0), self._labels)
+
+        numbers = [self._number_of(operand) for operand in operands[1:]]
+        if opcode in COMMUTATIVE_OPCODES:
+            numbers.sort()
+        return (opcode, *numbers)
+
+    def _location(self, address):
+        _, index, scale, displacement = parse_address(address)
+        list_name = list_of(address)
+        if index is None:
+            return ElementLocation(list_name, displacement)
+        index_number = self._number_of(index)
+        if isinstance(self._constant_values.get(index_number), int):
+            offset = self._constant_values[index_number] * scale + displacement
+            return ElementLocation(list_name, offset)
+        return ElementLocation(list_name, ("index", index_number, scale, displacement))
+
+    def _store(self, instruction):
+        target, value = instruction.operands
+        if is_memory(target):
+            if target != "@print":
+                version = self._memory_versions.get(target, 0) + 1
+                self._memory_versions[target] = version
+                # The stored register now also holds the variable
+                self._numbers[("mem", target, version, self._labels)] = self._number_of(value)
+            return
+        # The stored register now also holds the element it was written to
+        self._elements.store(self._location(target), self._number_of(value))
+
+    def _holder(self, number, dest):
+        for register in self._holders.get(number, ()):
+            if register != dest and self._number_registers.get(register) == number:
+                return register
+        return None
+
+    def _reuse(self, instructions, index, dest, holder):
+        """Make the readers of ``dest`` read ``holder`` and drop instructions[index]."""
+        instruction = instructions[index]
+        # Cheaper to reload an immediate than to keep a register live for it
+        if instruction.opcode == "LD" and is_immediate(instruction.operands[1]):
+            return False
+
+        positions = _rename_span(
+            instructions, index, dest, holder, self._last_use.get(dest, index)
+        )
+        if positions is None:
+            return False
+        if not self._within_budget(holder, index, dest):
+            self.stats["over_budget"] += 1
+            return False
+
+        for position in positions:
+            instructions[position].replace_use(dest, holder)
+        # Keep indices stable for the pressure bookkeeping; dropped at the end
+        instructions[index] = Instruction(line=instruction.line)
+        self._number_registers[dest] = self._number_registers[holder]
+        return True
+
+    def _compute_pressure(self, instructions):
+        """Register intervals [definition, last use] and how many overlap each index."""
+        self._first_def = {}
+        self._last_use = {}
+        for index, instruction in enumerate(instructions):
+            for register in instruction.defs():
+                self._first_def.setdefault(register, index)
+            for register in instruction.uses() + instruction.defs():
+                self._last_use[register] = index
+
+        self._pressure = [0] * (len(instructions) + 1)
+        if self.num_registers is None:
+            return
+        for register, start in self._first_def.items():
+            self._pressure[start] += 1
+            self._pressure[self._last_use[register] + 1] -= 1
+        running = 0
+        for index in range(len(self._pressure)):
+            running += self._pressure[index]
+            self._pressure[index] = running
+
+    def _within_budget(self, holder, index, dest):
+        """
+        Extend holder's interval over dest's; dest's interval disappears.
+
+        Only the stretch between holder's old last use and ``index`` gains a
+        register, the rest of dest's interval just changes owner.
+        """
+        start = self._last_use.get(holder, index) + 1
+        if self.num_registers is not None:
+            if any(
+                self._pressure[position] + 1 > self.num_registers
+                for position in range(start, index)
+            ):
+                return False
+            for position in range(start, index):
+                self._pressure[position] += 1
+        self._last_use[holder] = max(
+            self._last_use.get(holder, index), self._last_use.get(dest, index)
+        )
+        return True
@@ -11,6 +11,7 @@ class SymbolEntry:
     length: int
     token_type: str
     value: Any = None
+    element_type: Optional[str] = None
 
 
 class SymbolTable:
@@ -24,6 +25,7 @@ class SymbolTable:
         position: int,
         token_type: str,
         value: Optional[Any] = None,
+        element_type: Optional[str] = None,
     ):
         self.symbols[lexeme] = SymbolEntry(
             lexeme=lexeme,
@@ -32,6 +34,7 @@ class SymbolTable:
             length=len(lexeme),
             token_type=token_type,
             value=value,
+            element_type=element_type,
         )
 
     def lookup(self, lexeme: str):
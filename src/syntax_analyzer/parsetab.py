@@ -6,9 +6,9 @@ _tabversion = '3.10'
 
 _lr_method = 'LALR'
 
-_lr_signature = 'ASSIGNMENT DIVIDE EQUAL_TO ERR GREATER_THAN GREATER_THAN_OR_EQUAL INT INTEGER_DIVISION LBRACKET LESS_THAN LESS_THAN_OR_EQUAL LIST LPAREN MINUS NOT_EQUAL PLUS POW RBRACKET REAL RPAREN TIMES VAR\nexpression : expression PLUS term\n          | expression MINUS term\n          | expression EQUAL_TO term\n          | expression NOT_EQUAL term\n          | expression GREATER_THAN term\n          | expression GREATER_THAN_OR_EQUAL term\n          | expression LESS_THAN term\n          | expression LESS_THAN_OR_EQUAL term\nexpression : term\nterm : term TIMES factor\n     | term DIVIDE factor\n     | term INTEGER_DIVISION factor\n     | term POW factor\nterm : factor\nfactor : INT\n      | REAL\nfactor : VARfactor : LIST LBRACKET expression RBRACKETfactor : VAR LBRACKET expression RBRACKETexpression : VAR LBRACKET expression RBRACKET ASSIGNMENT expressionfactor : LPAREN expression RPARENexpression : VAR ASSIGNMENT expression'
+_lr_signature = 'statementASSIGNMENT COLON COMMA DEF DIVIDE ELEMENT_TYPE EQUAL_TO ERR FOR GREATER_THAN GREATER_THAN_OR_EQUAL IN INT INTEGER_DIVISION LBRACE LBRACKET LESS_THAN LESS_THAN_OR_EQUAL LIST LPAREN MINUS NOT_EQUAL OF PLUS POW RANGE RBRACE RBRACKET REAL REPEAT RPAREN TIMES VARstatement : expressionstatement : REPEAT expression LBRACEstatement : FOR VAR IN expression RANGE expression LBRACEstatement : RBRACEstatement : function_head ASSIGNMENT expression\n        function_head : DEF VAR LPAREN parameters RPAREN\n                      | DEF VAR LPAREN RPAREN\n        \n        parameters : VAR\n                   | parameters COMMA VAR\n        \n        expression : expression PLUS term\n                  | expression MINUS term\n                  | expression EQUAL_TO term\n                  | expression NOT_EQUAL term\n                  | expression GREATER_THAN term\n                  | expression GREATER_THAN_OR_EQUAL term\n                  | expression LESS_THAN term\n                  | expression LESS_THAN_OR_EQUAL term\n        expression : term\n        term : term TIMES factor\n             | term DIVIDE factor\n             | term INTEGER_DIVISION factor\n             | term POW factor\n        term : factor\n        factor : INT\n              | REAL\n        factor : VAR\n        factor : LIST LBRACKET expression RBRACKET\n               | LIST LBRACKET expression RBRACKET OF ELEMENT_TYPE\n        \n        factor : VAR LPAREN arguments RPAREN\n               | VAR LPAREN RPAREN\n        \n        arguments : expression\n                  | arguments COMMA expression\n        factor : VAR LBRACKET expression RBRACKETexpression : VAR LBRACKET expression RBRACKET ASSIGNMENT expressionexpression : VAR ASSIGNMENT VAR LBRACKET expression COLON expression RBRACKETfactor : LPAREN expression RPARENexpression : VAR ASSIGNMENT expression'
     
-_lr_action_items = {'VAR':([0,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,42,46,],[3,3,26,26,26,26,26,26,26,26,26,26,26,26,3,3,3,3,3,]),'INT':([0,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,42,46,],[5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,5,]),'REAL':([0,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,42,46,],[6,6,6,6,6,6,6,6,6,6,6,6,6,6,6,6,6,6,6,]),'LIST':([0,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,42,46,],[7,7,7,7,7,7,7,7,7,7,7,7,7,7,7,7,7,7,7,]),'LPAREN':([0,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,42,46,],[8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,]),'$end':([1,2,3,4,5,6,25,26,27,28,29,30,31,32,33,34,35,36,37,39,41,43,44,47,48,],[0,-9,-17,-14,-15,-16,-1,-17,-2,-3,-4,-5,-6,-7,-8,-10,-11,-12,-13,-22,-21,-19,-18,-19,-20,]),'PLUS':([1,2,3,4,5,6,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,43,44,45,47,48,],[9,-9,-17,-14,-15,-16,9,-1,-17,-2,-3,-4,-5,-6,-7,-8,-10,-11,-12,-13,9,9,9,-21,-19,-18,9,-19,9,]),'MINUS':([1,2,3,4,5,6,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,43,44,45,47,48,],[10,-9,-17,-14,-15,-16,10,-1,-17,-2,-3,-4,-5,-6,-7,-8,-10,-11,-12,-13,10,10,10,-21,-19,-18,10,-19,10,]),'EQUAL_TO':([1,2,3,4,5,6,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,43,44,45,47,48,],[11,-9,-17,-14,-15,-16,11,-1,-17,-2,-3,-4,-5,-6,-7,-8,-10,-11,-12,-13,11,11,11,-21,-19,-18,11,-19,11,]),'NOT_EQUAL':([1,2,3,4,5,6,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,43,44,45,47,48,],[12,-9,-17,-14,-15,-16,12,-1,-17,-2,-3,-4,-5,-6,-7,-8,-10,-11,-12,-13,12,12,12,-21,-19,-18,12,-19,12,]),'GREATER_THAN':([1,2,3,4,5,6,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,43,44,45,47,48,],[13,-9,-17,-14,-15,-16,13,-1,-17,-2,-3,-4,-5,-6,-7,-8,-10,-11,-12,-13,13,13,13,-21,-19,-18,13,-19,13,]),'GREATER_THAN_OR_EQUAL':([1,2,3,4,5,6,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,43,44,45,47,48,],[14,-9,-17,-14,-15,-16,14,-1,-17,-2,-3,-4,-5,-6,-7,-8,-10,-11,-12,-13,14,14,14,-21,-19,-18,14,-19,14,]),'LESS_THAN':([1,2,3,4,5,6,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,43,44,45,47,48,],[15,-9,-17,-14,-15,-16,15,-1,-17,-2,-3,-4,-5,-6,-7,-8,-10,-11,-12,-13,15,15,15,-21,-19,-18,15,-19,15,]),'LESS_THAN_OR_EQUAL':([1,2,3,4,5,6,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,43,44,45,47,48,],[16,-9,-17,-14,-15,-16,16,-1,-17,-2,-3,-4,-5,-6,-7,-8,-10,-11,-12,-13,16,16,16,-21,-19,-18,16,-19,16,]),'RPAREN':([2,3,4,5,6,24,25,26,27,28,29,30,31,32,33,34,35,36,37,39,41,43,44,47,48,],[-9,-17,-14,-15,-16,41,-1,-17,-2,-3,-4,-5,-6,-7,-8,-10,-11,-12,-13,-22,-21,-19,-18,-19,-20,]),'RBRACKET':([2,3,4,5,6,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,43,44,45,47,48,],[-9,-17,-14,-15,-16,-1,-17,-2,-3,-4,-5,-6,-7,-8,-10,-11,-12,-13,43,-22,44,-21,-19,-18,47,-19,-20,]),'TIMES':([2,3,4,5,6,25,26,27,28,29,30,31,32,33,34,35,36,37,41,43,44,47,],[17,-17,-14,-15,-16,17,-17,17,17,17,17,17,17,17,-10,-11,-12,-13,-21,-19,-18,-19,]),'DIVIDE':([2,3,4,5,6,25,26,27,28,29,30,31,32,33,34,35,36,37,41,43,44,47,],[18,-17,-14,-15,-16,18,-17,18,18,18,18,18,18,18,-10,-11,-12,-13,-21,-19,-18,-19,]),'INTEGER_DIVISION':([2,3,4,5,6,25,26,27,28,29,30,31,32,33,34,35,36,37,41,43,44,47,],[19,-17,-14,-15,-16,19,-17,19,19,19,19,19,19,19,-10,-11,-12,-13,-21,-19,-18,-19,]),'POW':([2,3,4,5,6,25,26,27,28,29,30,31,32,33,34,35,36,37,41,43,44,47,],[20,-17,-14,-15,-16,20,-17,20,20,20,20,20,20,20,-10,-11,-12,-13,-21,-19,-18,-19,]),'LBRACKET':([3,7,26,],[21,23,42,]),'ASSIGNMENT':([3,43,],[22,46,]),}
+_lr_action_items = {'REPEAT':([0,],[3,]),'FOR':([0,],[4,]),'RBRACE':([0,],[6,]),'VAR':([0,3,4,9,10,15,16,17,18,19,20,21,22,25,26,27,28,29,30,31,32,35,46,58,61,64,66,72,73,77,82,],[5,5,24,33,5,37,37,37,37,37,37,37,37,5,48,5,5,37,37,37,37,5,5,67,5,5,5,5,5,83,5,]),'DEF':([0,],[9,]),'INT':([0,3,10,15,16,17,18,19,20,21,22,25,26,27,28,29,30,31,32,35,46,61,64,66,72,73,82,],[12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,]),'REAL':([0,3,10,15,16,17,18,19,20,21,22,25,26,27,28,29,30,31,32,35,46,61,64,66,72,73,82,],[13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,]),'LIST':([0,3,10,15,16,17,18,19,20,21,22,25,26,27,28,29,30,31,32,35,46,61,64,66,72,73,82,],[14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,]),'LPAREN':([0,3,5,10,15,16,17,18,19,20,21,22,25,26,27,28,29,30,31,32,33,35,37,46,48,61,64,66,72,73,82,],[10,10,27,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,10,58,10,27,10,27,10,10,10,10,10,10,]),'$end':([1,2,5,6,8,11,12,13,36,37,38,39,40,41,42,43,44,45,48,49,51,53,54,55,56,57,59,63,65,70,79,81,84,85,87,],[0,-1,-26,-4,-18,-23,-24,-25,-10,-26,-11,-12,-13,-14,-15,-16,-17,-2,-26,-37,-30,-5,-19,-20,-21,-22,-36,-33,-29,-27,-33,-34,-28,-3,-35,]),'PLUS':([2,5,8,11,12,13,23,34,36,37,38,39,40,41,42,43,44,47,48,49,51,52,53,54,55,56,57,59,60,62,63,65,70,71,74,75,79,80,81,84,86,87,],[15,-26,-18,-23,-24,-25,15,15,-10,-26,-11,-12,-13,-14,-15,-16,-17,15,-26,15,-30,15,15,-19,-20,-21,-22,-36,15,15,-33,-29,-27,15,15,15,-33,15,15,-28,15,-35,]),'MINUS':([2,5,8,11,12,13,23,34,36,37,38,39,40,41,42,43,44,47,48,49,51,52,53,54,55,56,57,59,60,62,63,65,70,71,74,75,79,80,81,84,86,87,],[16,-26,-18,-23,-24,-25,16,16,-10,-26,-11,-12,-13,-14,-15,-16,-17,16,-26,16,-30,16,16,-19,-20,-21,-22,-36,16,16,-33,-29,-27,16,16,16,-33,16,16,-28,16,-35,]),'EQUAL_TO':([2,5,8,11,12,13,23,34,36,37,38,39,40,41,42,43,44,47,48,49,51,52,53,54,55,56,57,59,60,62,63,65,70,71,74,75,79,80,81,84,86,87,],[17,-26,-18,-23,-24,-25,17,17,-10,-26,-11,-12,-13,-14,-15,-16,-17,17,-26,17,-30,17,17,-19,-20,-21,-22,-36,17,17,-33,-29,-27,17,17,17,-33,17,17,-28,17,-35,]),'NOT_EQUAL':([2,5,8,11,12,13,23,34,36,37,38,39,40,41,42,43,44,47,48,49,51,52,53,54,55,56,57,59,60,62,63,65,70,71,74,75,79,80,81,84,86,87,],[18,-26,-18,-23,-24,-25,18,18,-10,-26,-11,-12,-13,-14,-15,-16,-17,18,-26,18,-30,18,18,-19,-20,-21,-22,-36,18,18,-33,-29,-27,18,18,18,-33,18,18,-28,18,-35,]),'GREATER_THAN':([2,5,8,11,12,13,23,34,36,37,38,39,40,41,42,43,44,47,48,49,51,52,53,54,55,56,57,59,60,62,63,65,70,71,74,75,79,80,81,84,86,87,],[19,-26,-18,-23,-24,-25,19,19,-10,-26,-11,-12,-13,-14,-15,-16,-17,19,-26,19,-30,19,19,-19,-20,-21,-22,-36,19,19,-33,-29,-27,19,19,19,-33,19,19,-28,19,-35,]),'GREATER_THAN_OR_EQUAL':([2,5,8,11,12,13,23,34,36,37,38,39,40,41,42,43,44,47,48,49,51,52,53,54,55,56,57,59,60,62,63,65,70,71,74,75,79,80,81,84,86,87,],[20,-26,-18,-23,-24,-25,20,20,-10,-26,-11,-12,-13,-14,-15,-16,-17,20,-26,20,-30,20,20,-19,-20,-21,-22,-36,20,20,-33,-29,-27,20,20,20,-33,20,20,-28,20,-35,]),'LESS_THAN':([2,5,8,11,12,13,23,34,36,37,38,39,40,41,42,43,44,47,48,49,51,52,53,54,55,56,57,59,60,62,63,65,70,71,74,75,79,80,81,84,86,87,],[21,-26,-18,-23,-24,-25,21,21,-10,-26,-11,-12,-13,-14,-15,-16,-17,21,-26,21,-30,21,21,-19,-20,-21,-22,-36,21,21,-33,-29,-27,21,21,21,-33,21,21,-28,21,-35,]),'LESS_THAN_OR_EQUAL':([2,5,8,11,12,13,23,34,36,37,38,39,40,41,42,43,44,47,48,49,51,52,53,54,55,56,57,59,60,62,63,65,70,71,74,75,79,80,81,84,86,87,],[22,-26,-18,-23,-24,-25,22,22,-10,-26,-11,-12,-13,-14,-15,-16,-17,22,-26,22,-30,22,22,-19,-20,-21,-22,-36,22,22,-33,-29,-27,22,22,22,-33,22,22,-28,22,-35,]),'LBRACKET':([5,14,37,48,],[25,35,61,64,]),'ASSIGNMENT':([5,7,48,63,69,76,],[26,28,26,73,-7,-6,]),'TIMES':([5,8,11,12,13,36,37,38,39,40,41,42,43,44,48,51,54,55,56,57,59,63,65,70,79,84,],[-26,29,-23,-24,-25,29,-26,29,29,29,29,29,29,29,-26,-30,-19,-20,-21,-22,-36,-33,-29,-27,-33,-28,]),'DIVIDE':([5,8,11,12,13,36,37,38,39,40,41,42,43,44,48,51,54,55,56,57,59,63,65,70,79,84,],[-26,30,-23,-24,-25,30,-26,30,30,30,30,30,30,30,-26,-30,-19,-20,-21,-22,-36,-33,-29,-27,-33,-28,]),'INTEGER_DIVISION':([5,8,11,12,13,36,37,38,39,40,41,42,43,44,48,51,54,55,56,57,59,63,65,70,79,84,],[-26,31,-23,-24,-25,31,-26,31,31,31,31,31,31,31,-26,-30,-19,-20,-21,-22,-36,-33,-29,-27,-33,-28,]),'POW':([5,8,11,12,13,36,37,38,39,40,41,42,43,44,48,51,54,55,56,57,59,63,65,70,79,84,],[-26,32,-23,-24,-25,32,-26,32,32,32,32,32,32,32,-26,-30,-19,-20,-21,-22,-36,-33,-29,-27,-33,-28,]),'LBRACE':([5,8,11,12,13,23,36,37,38,39,40,41,42,43,44,48,49,51,54,55,56,57,59,63,65,70,79,80,81,84,87,],[-26,-18,-23,-24,-25,45,-10,-26,-11,-12,-13,-14,-15,-16,-17,-26,-37,-30,-19,-20,-21,-22,-36,-33,-29,-27,-33,85,-34,-28,-35,]),'RPAREN':([5,8,11,12,13,27,34,36,37,38,39,40,41,42,43,44,48,49,50,51,52,54,55,56,57,58,59,63,65,67,68,70,75,79,81,83,84,87,],[-26,-18,-23,-24,-25,51,59,-10,-26,-11,-12,-13,-14,-15,-16,-17,-26,-37,65,-30,-31,-19,-20,-21,-22,69,-36,-33,-29,-8,76,-27,-32,-33,-34,-9,-28,-35,]),'RBRACKET':([5,8,11,12,13,36,37,38,39,40,41,42,43,44,47,48,49,51,54,55,56,57,59,60,63,65,70,71,74,79,81,84,86,87,],[-26,-18,-23,-24,-25,-10,-26,-11,-12,-13,-14,-15,-16,-17,63,-26,-37,-30,-19,-20,-21,-22,-36,70,-33,-29,-27,79,63,-33,-34,-28,87,-35,]),'COMMA':([5,8,11,12,13,36,37,38,39,40,41,42,43,44,48,49,50,51,52,54,55,56,57,59,63,65,67,68,70,75,79,81,83,84,87,],[-26,-18,-23,-24,-25,-10,-26,-11,-12,-13,-14,-15,-16,-17,-26,-37,66,-30,-31,-19,-20,-21,-22,-36,-33,-29,-8,77,-27,-32,-33,-34,-9,-28,-35,]),'RANGE':([5,8,11,12,13,36,37,38,39,40,41,42,43,44,48,49,51,54,55,56,57,59,62,63,65,70,79,81,84,87,],[-26,-18,-23,-24,-25,-10,-26,-11,-12,-13,-14,-15,-16,-17,-26,-37,-30,-19,-20,-21,-22,-36,72,-33,-29,-27,-33,-34,-28,-35,]),'COLON':([5,8,11,12,13,36,37,38,39,40,41,42,43,44,48,49,51,54,55,56,57,59,63,65,70,74,79,81,84,87,],[-26,-18,-23,-24,-25,-10,-26,-11,-12,-13,-14,-15,-16,-17,-26,-37,-30,-19,-20,-21,-22,-36,-33,-29,-27,82,-33,-34,-28,-35,]),'IN':([24,],[46,]),'OF':([70,],[78,]),'ELEMENT_TYPE':([78,],[84,]),}
 
 _lr_action = {}
 for _k, _v in _lr_action_items.items():
@@ -17,7 +17,7 @@ for _k, _v in _lr_action_items.items():
       _lr_action[_x][_k] = _y
 del _lr_action_items
 
-_lr_goto_items = {'expression':([0,8,21,22,23,42,46,],[1,24,38,39,40,45,48,]),'term':([0,8,9,10,11,12,13,14,15,16,21,22,23,42,46,],[2,2,25,27,28,29,30,31,32,33,2,2,2,2,2,]),'factor':([0,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,42,46,],[4,4,4,4,4,4,4,4,4,4,34,35,36,37,4,4,4,4,4,]),}
+_lr_goto_items = {'statement':([0,],[1,]),'expression':([0,3,10,25,26,27,28,35,46,61,64,66,72,73,82,],[2,23,34,47,49,52,53,60,62,71,74,75,80,81,86,]),'function_head':([0,],[7,]),'term':([0,3,10,15,16,17,18,19,20,21,22,25,26,27,28,35,46,61,64,66,72,73,82,],[8,8,8,36,38,39,40,41,42,43,44,8,8,8,8,8,8,8,8,8,8,8,8,]),'factor':([0,3,10,15,16,17,18,19,20,21,22,25,26,27,28,29,30,31,32,35,46,61,64,66,72,73,82,],[11,11,11,11,11,11,11,11,11,11,11,11,11,11,11,54,55,56,57,11,11,11,11,11,11,11,11,]),'arguments':([27,],[50,]),'parameters':([58,],[68,]),}
 
 _lr_goto = {}
 for _k, _v in _lr_goto_items.items():
@@ -26,27 +26,42 @@ for _k, _v in _lr_goto_items.items():
        _lr_goto[_x][_k] = _y
 del _lr_goto_items
 _lr_productions = [
-  ("S' -> expression","S'",1,None,None,None),
-  ('expression -> expression PLUS term','expression',3,'p_expression_binary','syntax_analyzer.py',14),
-  ('expression -> expression MINUS term','expression',3,'p_expression_binary','syntax_analyzer.py',15),
-  ('expression -> expression EQUAL_TO term','expression',3,'p_expression_binary','syntax_analyzer.py',16),
-  ('expression -> expression NOT_EQUAL term','expression',3,'p_expression_binary','syntax_analyzer.py',17),
-  ('expression -> expression GREATER_THAN term','expression',3,'p_expression_binary','syntax_analyzer.py',18),
-  ('expression -> expression GREATER_THAN_OR_EQUAL term','expression',3,'p_expression_binary','syntax_analyzer.py',19),
-  ('expression -> expression LESS_THAN term','expression',3,'p_expression_binary','syntax_analyzer.py',20),
-  ('expression -> expression LESS_THAN_OR_EQUAL term','expression',3,'p_expression_binary','syntax_analyzer.py',21),
-  ('expression -> term','expression',1,'p_expression_term','syntax_analyzer.py',26),
-  ('term -> term TIMES factor','term',3,'p_term_binary','syntax_analyzer.py',31),
-  ('term -> term DIVIDE factor','term',3,'p_term_binary','syntax_analyzer.py',32),
-  ('term -> term INTEGER_DIVISION factor','term',3,'p_term_binary','syntax_analyzer.py',33),
-  ('term -> term POW factor','term',3,'p_term_binary','syntax_analyzer.py',34),
-  ('term -> factor','term',1,'p_term_factor','syntax_analyzer.py',39),
-  ('factor -> INT','factor',1,'p_factor_number','syntax_analyzer.py',44),
-  ('factor -> REAL','factor',1,'p_factor_number','syntax_analyzer.py',45),
-  ('factor -> VAR','factor',1,'p_factor_var','syntax_analyzer.py',50),
-  ('factor -> LIST LBRACKET expression RBRACKET','factor',4,'p_factor_list_declaration','syntax_analyzer.py',55),
-  ('factor -> VAR LBRACKET expression RBRACKET','factor',4,'p_factor_list_access','syntax_analyzer.py',61),
-  ('expression -> VAR LBRACKET expression RBRACKET ASSIGNMENT expression','expression',6,'p_assignment_list_element','syntax_analyzer.py',69),
-  ('factor -> LPAREN expression RPAREN','factor',3,'p_factor_expr','syntax_analyzer.py',86),
-  ('expression -> VAR ASSIGNMENT expression','expression',3,'p_assignment','syntax_analyzer.py',90),
+  ("S' -> statement","S'",1,None,None,None),
+  ('statement -> expression','statement',1,'p_statement_expression','syntax_analyzer.py',26),
+  ('statement -> REPEAT expression LBRACE','statement',3,'p_statement_repeat','syntax_analyzer.py',30),
+  ('statement -> FOR VAR IN expression RANGE expression LBRACE','statement',7,'p_statement_for','syntax_analyzer.py',36),
+  ('statement -> RBRACE','statement',1,'p_statement_end','syntax_analyzer.py',51),
+  ('statement -> function_head ASSIGNMENT expression','statement',3,'p_statement_function','syntax_analyzer.py',58),
+  ('function_head -> DEF VAR LPAREN parameters RPAREN','function_head',5,'p_function_head','syntax_analyzer.py',72),
+  ('function_head -> DEF VAR LPAREN RPAREN','function_head',4,'p_function_head','syntax_analyzer.py',73),
+  ('parameters -> VAR','parameters',1,'p_parameters','syntax_analyzer.py',94),
+  ('parameters -> parameters COMMA VAR','parameters',3,'p_parameters','syntax_analyzer.py',95),
+  ('expression -> expression PLUS term','expression',3,'p_expression_binary','syntax_analyzer.py',101),
+  ('expression -> expression MINUS term','expression',3,'p_expression_binary','syntax_analyzer.py',102),
+  ('expression -> expression EQUAL_TO term','expression',3,'p_expression_binary','syntax_analyzer.py',103),
+  ('expression -> expression NOT_EQUAL term','expression',3,'p_expression_binary','syntax_analyzer.py',104),
+  ('expression -> expression GREATER_THAN term','expression',3,'p_expression_binary','syntax_analyzer.py',105),
+  ('expression -> expression GREATER_THAN_OR_EQUAL term','expression',3,'p_expression_binary','syntax_analyzer.py',106),
+  ('expression -> expression LESS_THAN term','expression',3,'p_expression_binary','syntax_analyzer.py',107),
+  ('expression -> expression LESS_THAN_OR_EQUAL term','expression',3,'p_expression_binary','syntax_analyzer.py',108),
+  ('expression -> term','expression',1,'p_expression_term','syntax_analyzer.py',117),
+  ('term -> term TIMES factor','term',3,'p_term_binary','syntax_analyzer.py',122),
+  ('term -> term DIVIDE factor','term',3,'p_term_binary','syntax_analyzer.py',123),
+  ('term -> term INTEGER_DIVISION factor','term',3,'p_term_binary','syntax_analyzer.py',124),
+  ('term -> term POW factor','term',3,'p_term_binary','syntax_analyzer.py',125),
+  ('term -> factor','term',1,'p_term_factor','syntax_analyzer.py',130),
+  ('factor -> INT','factor',1,'p_factor_number','syntax_analyzer.py',135),
+  ('factor -> REAL','factor',1,'p_factor_number','syntax_analyzer.py',136),
+  ('factor -> VAR','factor',1,'p_factor_var','syntax_analyzer.py',141),
+  ('factor -> LIST LBRACKET expression RBRACKET','factor',4,'p_factor_list_declaration','syntax_analyzer.py',147),
+  ('factor -> LIST LBRACKET expression RBRACKET OF ELEMENT_TYPE','factor',6,'p_factor_list_declaration','syntax_analyzer.py',148),
+  ('factor -> VAR LPAREN arguments RPAREN','factor',4,'p_factor_call','syntax_analyzer.py',157),
+  ('factor -> VAR LPAREN RPAREN','factor',3,'p_factor_call','syntax_analyzer.py',158),
+  ('arguments -> expression','arguments',1,'p_arguments','syntax_analyzer.py',166),
+  ('arguments -> arguments COMMA expression','arguments',3,'p_arguments','syntax_analyzer.py',167),
+  ('factor -> VAR LBRACKET expression RBRACKET','factor',4,'p_factor_list_access','syntax_analyzer.py',172),
+  ('expression -> VAR LBRACKET expression RBRACKET ASSIGNMENT expression','expression',6,'p_assignment_list_element','syntax_analyzer.py',180),
+  ('expression -> VAR ASSIGNMENT VAR LBRACKET expression COLON expression RBRACKET','expression',8,'p_assignment_list_slice','syntax_analyzer.py',199),
+  ('factor -> LPAREN expression RPAREN','factor',3,'p_factor_expr','syntax_analyzer.py',217),
+  ('expression -> VAR ASSIGNMENT expression','expression',3,'p_assignment','syntax_analyzer.py',221),
 ]
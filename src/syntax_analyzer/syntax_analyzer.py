@@ -1,13 +1,111 @@
 import ply.yacc as yacc
 
+from src.code_generator.semantics import DEFAULT_ELEMENT_TYPE
+from src.lexical_analyzer.lexical_analyzer import RESERVED_TOKENS
+
+
+# Operators that apply element by element when an operand is a whole list
+LIST_OPERATORS = ("+", "-", "*")
+
 
 class SyntaxAnalyzer:
-    def __init__(self, symbol_table, lexical_analyzer):
+    start = "statement"
+
+    def __init__(self, symbol_table, lexical_analyzer, keep_output=True):
+        """
+        :param symbol_table: SymbolTable the lexical analyzer fills
+        :param lexical_analyzer: LexicalAnalyzer providing the tokens
+        :param keep_output: Collect the bracket form of every line in
+            ast_output; a streaming caller writes last_output after each
+            parse instead
+        """
         self.lexer = lexical_analyzer
         self.tokens = self.lexer.tokens
         self.parser = yacc.yacc(module=self)
+        self.keep_output = keep_output
         self.ast_output = []
+        # Bracket form (or error) of the line parsed last, None if it gave no AST
+        self.last_output = None
         self.symbol_table = symbol_table
+        # Loops opened and not closed yet, innermost last: (variable, start,
+        # end) of a for loop, None for repeat
+        self.loops = []
+        # (name, parameters) of the function whose body is being parsed
+        self.function = None
+
+    def p_statement_expression(self, p):
+        """statement : expression"""
+        p[0] = p[1]
+
+    def p_statement_repeat(self, p):
+        """statement : REPEAT expression LBRACE"""
+        self._validate_loop_bound(p[2], p.lineno(1), p.lexpos(1))
+        self.loops.append(None)
+        p[0] = ("repeat", p[2])
+
+    def p_statement_for(self, p):
+        """statement : FOR VAR IN expression RANGE expression LBRACE"""
+        for bound in (p[4], p[6]):
+            self._validate_loop_bound(bound, p.lineno(1), p.lexpos(1))
+        self._validate_assignable(p[2], p.lineno(2), p.lexpos(2))
+        self.symbol_table.insert(
+            lexeme=p[2],
+            line_number=p.lineno(2),
+            position=p.lexpos(2),
+            token_type="VAR",
+            value=p[4] if isinstance(p[4], int) else None,
+        )
+        self.loops.append((p[2], p[4], p[6]))
+        p[0] = ("for", p[2], p[4], p[6])
+
+    def p_statement_end(self, p):
+        """statement : RBRACE"""
+        if not self.loops:
+            raise ValueError(f"Unmatched '}}' at line {p.lineno(1)}, pos {p.lexpos(1) + 1}")
+        self.loops.pop()
+        p[0] = ("end",)
+
+    def p_statement_function(self, p):
+        """statement : function_head ASSIGNMENT expression"""
+        name, parameters, lineno, lexpos = p[1]
+        self.function = None
+        self.symbol_table.insert(
+            lexeme=name,
+            line_number=lineno,
+            position=lexpos,
+            token_type="FUNCTION",
+            value=parameters,
+        )
+        p[0] = ("def", name, parameters, p[3])
+
+    def p_function_head(self, p):
+        """
+        function_head : DEF VAR LPAREN parameters RPAREN
+                      | DEF VAR LPAREN RPAREN
+        """
+        name, lineno, lexpos = p[2], p.lineno(2), p.lexpos(2)
+        parameters = p[4] if len(p) == 6 else ()
+        if self.loops:
+            raise ValueError(
+                f"Function '{name}' must be defined outside loops at line {lineno}, pos {lexpos + 1}"
+            )
+        if self.symbol_table.lookup(name) is not None:
+            raise ValueError(f"'{name}' is already defined at line {lineno}, pos {lexpos + 1}")
+        for parameter in parameters:
+            if parameters.count(parameter) > 1:
+                raise ValueError(
+                    f"Function '{name}' has the parameter '{parameter}' twice at line {lineno}, pos {lexpos + 1}"
+                )
+        # The body that follows may only read the parameters
+        self.function = (name, parameters)
+        p[0] = (name, parameters, lineno, lexpos)
+
+    def p_parameters(self, p):
+        """
+        parameters : VAR
+                   | parameters COMMA VAR
+        """
+        p[0] = (p[1],) if len(p) == 2 else p[1] + (p[3],)
 
     def p_expression_binary(self, p):
         """
@@ -20,6 +118,10 @@ class SyntaxAnalyzer:
                   | expression LESS_THAN term
                   | expression LESS_THAN_OR_EQUAL term
         """
+        if isinstance(p[1], tuple) and p[1][0] == "=" and _is_slice(p[1][2]):
+            raise ValueError(
+                f"A slice can only be assigned, not used with '{p[2]}' at line {p.lineno(2)}, pos {p.lexpos(2) + 1}"
+            )
         p[0] = (p[2], p[1], p[3])
 
     def p_expression_term(self, p):
@@ -52,10 +154,30 @@ class SyntaxAnalyzer:
         p[0] = p[1]
 
     def p_factor_list_declaration(self, p):
-        """factor : LIST LBRACKET expression RBRACKET"""
+        """
+        factor : LIST LBRACKET expression RBRACKET
+               | LIST LBRACKET expression RBRACKET OF ELEMENT_TYPE
+        """
         if not isinstance(p[3], int) or p[3] <= 0:
             raise ValueError(f"List size must be a positive integer, got {p[3]}")
-        p[0] = ("list_decl", p[3])
+        element_type = p[6] if len(p) == 7 else DEFAULT_ELEMENT_TYPE
+        p[0] = ("list_decl", p[3], element_type)
+
+    def p_factor_call(self, p):
+        """
+        factor : VAR LPAREN arguments RPAREN
+               | VAR LPAREN RPAREN
+        """
+        arguments = p[3] if len(p) == 5 else ()
+        self._validate_call(p[1], arguments, p.lineno(1), p.lexpos(1))
+        p[0] = (p[1], "(", arguments, ")")
+
+    def p_arguments(self, p):
+        """
+        arguments : expression
+                  | arguments COMMA expression
+        """
+        p[0] = (p[1],) if len(p) == 2 else p[1] + (p[3],)
 
     def p_factor_list_access(self, p):
         """factor : VAR LBRACKET expression RBRACKET"""
@@ -71,31 +193,56 @@ class SyntaxAnalyzer:
         self._validate_list_index(
             p[1], p[3], len(symbol.value), p.lineno(1), p.lexpos(1)
         )
-        value = p[6] if isinstance(p[6], int) else None
-        symbol.value[p[3]] = value
-
-        if not isinstance(p[6], int):
-            raise ValueError(
-                f"List elements must be integers, got {p[6]} at line {p.lineno(1)}, pos {p.lexpos(1) + 1}"
-            )
+        self._validate_list_element(
+            p[1], symbol.element_type, p[6], p.lineno(1), p.lexpos(1)
+        )
 
-        symbol.value[p[3]] = p[6]
+        # Elements indexed by a loop variable are not tracked
+        if isinstance(p[3], int):
+            symbol.value[p[3]] = p[6]
         p[0] = ("list_assign", p[1], p[3], p[6])
 
+    def p_assignment_list_slice(self, p):
+        """expression : VAR ASSIGNMENT VAR LBRACKET expression COLON expression RBRACKET"""
+        self._validate_assignable(p[1], p.lineno(1), p.lexpos(1))
+        symbol = self._validate_list_variable(p[3], p.lineno(3), p.lexpos(3))
+        self._validate_list_slice(
+            p[3], p[5], p[7], len(symbol.value), p.lineno(3), p.lexpos(3)
+        )
+        self.symbol_table.insert(
+            lexeme=p[1],
+            line_number=p.lineno(1),
+            position=p.lexpos(1),
+            token_type="LIST",
+            value=symbol.value[p[5] : p[7]],
+            element_type=symbol.element_type,
+        )
+        size = p[7] - p[5]
+        p[0] = ("=", p[1], ("list_slice", p[3], p[5], p[7], size, symbol.element_type))
+
     def p_factor_expr(self, p):
         """factor : LPAREN expression RPAREN"""
         p[0] = p[2]
 
     def p_assignment(self, p):
         """expression : VAR ASSIGNMENT expression"""
-        if isinstance(p[3], tuple) and p[3][0] == "list_decl":
-            list_size = p[3][1]
+        self._validate_assignable(p[1], p.lineno(1), p.lexpos(1))
+        list_operation = self._list_operation(p[3], p.lineno(1), p.lexpos(1))
+        if list_operation is not None:
+            p[3] = list_operation
+        if isinstance(p[3], tuple) and p[3][0] in ("list_decl", "list_op"):
+            list_size, element_type = p[3][-2:]
+            if p[3][0] == "list_decl":
+                value = [0.0 if element_type == "real" else 0] * list_size
+            else:
+                value = [None] * list_size
             self.symbol_table.insert(
                 lexeme=p[1],
                 line_number=p.lineno(1),
                 position=p.lexpos(1),
                 token_type="LIST",
-                value=[0] * list_size,
+                value=value,
+                element_type=element_type,
             )
         else:
             value = (
@@ -127,50 +274,71 @@ class SyntaxAnalyzer:
             if symbol and symbol.value is not None:
                 return symbol.value
             return None
-        elif isinstance(expr, tuple):
+        elif isinstance(expr, tuple) and len(expr) == 3:
+            left = self._evaluate_expression(expr[1])
+            right = self._evaluate_expression(expr[2])
+            if left is None or right is None:
+                # List elements are not tracked, so neither is anything computed from them
+                return None
             if expr[0] == "+":
-                return self._evaluate_expression(expr[1]) + self._evaluate_expression(
-                    expr[2]
-                )
+                return left + right
             elif expr[0] == "-":
-                return self._evaluate_expression(expr[1]) - self._evaluate_expression(
-                    expr[2]
-                )
+                return left - right
             elif expr[0] == "*":
-                return self._evaluate_expression(expr[1]) * self._evaluate_expression(
-                    expr[2]
-                )
+                return left * right
             elif expr[0] == "/":
-                return self._evaluate_expression(expr[1]) / self._evaluate_expression(
-                    expr[2]
-                )
+                return left / right
             elif expr[0] == "%":
-                return self._evaluate_expression(expr[1]) % self._evaluate_expression(
-                    expr[2]
-                )
+                return left % right
             elif expr[0] == "^":
-                return self._evaluate_expression(expr[1]) ** self._evaluate_expression(
-                    expr[2]
-                )
+                return left**right
         return None
 
     def _validate_variable(self, var_name, lineno, lexpos):
+        """Symbol of a variable read; None for a parameter of the function being defined."""
+        if self.function is not None:
+            name, parameters = self.function
+            if var_name not in parameters:
+                raise ValueError(
+                    f"Function '{name}' can only use its parameters, got '{var_name}' at line {lineno}, pos {lexpos + 1}"
+                )
+            return None
         symbol = self.symbol_table.lookup(var_name)
         if not symbol:
             raise ValueError(
                 f"Undefined variable '{var_name}' at line {lineno}, pos {lexpos + 1}"
             )
+        if symbol.token_type == "FUNCTION":
+            raise ValueError(
+                f"Function '{var_name}' is used without a call at line {lineno}, pos {lexpos + 1}"
+            )
         return symbol
 
     def _validate_list_variable(self, var_name, lineno, lexpos):
         symbol = self._validate_variable(var_name, lineno, lexpos)
-        if symbol.token_type != "LIST":
+        if symbol is None or symbol.token_type != "LIST":
             raise ValueError(
                 f"Variable '{var_name}' is not a list at line {lineno}, pos {lexpos + 1}"
             )
         return symbol
 
     def _validate_list_index(self, list_name, index, size, lineno, lexpos):
+        """
+        Indices are integer literals within the list, or the variable of an
+        enclosing for loop whose literal bounds keep it within the list.
+        """
+        loop = self._loop_of(index)
+        if loop is not None:
+            _, start, end = loop
+            if not (isinstance(start, int) and isinstance(end, int)):
+                raise ValueError(
+                    f"Loop variable '{index}' needs literal bounds to index list '{list_name}' at line {lineno}, pos {lexpos + 1}"
+                )
+            if start < end and (start < 0 or end > size):
+                raise ValueError(
+                    f"Index range {start}..{end} out of range for list '{list_name}' of size {size} at line {lineno}, pos {lexpos + 1}"
+                )
+            return
         if not isinstance(index, int):
             raise ValueError(
                 f"List index must be an integer, got {index} at line {lineno}, pos {lexpos + 1}"
@@ -180,6 +348,134 @@ class SyntaxAnalyzer:
                 f"Index {index} out of range for list '{list_name}' of size {size} at line {lineno}, pos {lexpos + 1}"
             )
 
+    def _validate_list_slice(self, list_name, start, end, size, lineno, lexpos):
+        """x[start:end] takes at least one element and stays within the list."""
+        for bound in (start, end):
+            if not isinstance(bound, int):
+                raise ValueError(
+                    f"List index must be an integer, got {bound} at line {lineno}, pos {lexpos + 1}"
+                )
+        self._validate_list_index(list_name, start, size, lineno, lexpos)
+        if end <= start or end > size:
+            raise ValueError(
+                f"Slice {start}:{end} out of range for list '{list_name}' of size {size} at line {lineno}, pos {lexpos + 1}"
+            )
+
+    def _validate_loop_bound(self, bound, lineno, lexpos):
+        """Loops count in integers; a variable bound is checked when the loop is compiled."""
+        if isinstance(bound, float):
+            raise ValueError(
+                f"Loop bounds must be integers, got {bound} at line {lineno}, pos {lexpos + 1}"
+            )
+
+    def _validate_assignable(self, var_name, lineno, lexpos):
+        """
+        The variable of a for loop only changes by the loop itself; functions
+        are not variables, and their bodies assign nothing.
+        """
+        if self.function is not None:
+            raise ValueError(
+                f"Function '{self.function[0]}' cannot assign to '{var_name}' at line {lineno}, pos {lexpos + 1}"
+            )
+        symbol = self.symbol_table.lookup(var_name)
+        if symbol is not None and symbol.token_type == "FUNCTION":
+            raise ValueError(
+                f"Cannot assign to function '{var_name}' at line {lineno}, pos {lexpos + 1}"
+            )
+        if self._loop_of(var_name) is not None:
+            raise ValueError(
+                f"Cannot assign to loop variable '{var_name}' inside its loop at line {lineno}, pos {lexpos + 1}"
+            )
+
+    def _validate_call(self, name, arguments, lineno, lexpos):
+        """
+        Calls name a function defined on an earlier line, so a function never
+        calls itself, with one expression per parameter.
+        """
+        if self.function is not None and name in self.function[1]:
+            raise ValueError(
+                f"Parameter '{name}' is not a function at line {lineno}, pos {lexpos + 1}"
+            )
+        if self.function is not None and name == self.function[0]:
+            raise ValueError(
+                f"Function '{name}' cannot call itself at line {lineno}, pos {lexpos + 1}"
+            )
+        symbol = self.symbol_table.lookup(name)
+        if symbol is None or symbol.token_type != "FUNCTION":
+            raise ValueError(f"Undefined function '{name}' at line {lineno}, pos {lexpos + 1}")
+        if len(arguments) != len(symbol.value):
+            raise ValueError(
+                f"Function '{name}' takes {len(symbol.value)} arguments, got {len(arguments)} at line {lineno}, pos {lexpos + 1}"
+            )
+        for argument in arguments:
+            if isinstance(argument, tuple) and argument[0] in ("=", "list_assign"):
+                raise ValueError(
+                    f"Arguments of '{name}' must be expressions, not assignments at line {lineno}, pos {lexpos + 1}"
+                )
+
+    def _loop_of(self, var_name):
+        """(variable, start, end) of the innermost open for loop over the variable, or None."""
+        for loop in reversed(self.loops):
+            if loop is not None and loop[0] == var_name:
+                return loop
+        return None
+
+    def _list_operation(self, expr, lineno, lexpos):
+        """
+        Whole-list form of an assigned expression (z = x + y, z = x * 2), or None.
+
+        Both operands must be lists of the same size and element type, or
+        one a list and the other a number that fits its elements.
+        """
+        if not isinstance(expr, tuple) or len(expr) != 3 or expr[0] not in LIST_OPERATORS:
+            return None
+        operator, left, right = expr
+        symbols = [self._list_symbol(operand) for operand in (left, right)]
+        lists = [symbol for symbol in symbols if symbol is not None]
+        if not lists:
+            return None
+        size, element_type = len(lists[0].value), lists[0].element_type
+        for operand, symbol in zip((left, right), symbols):
+            if symbol is not None:
+                if len(symbol.value) != size or symbol.element_type != element_type:
+                    raise ValueError(
+                        f"Lists '{left}' and '{right}' differ in size or element type at line {lineno}, pos {lexpos + 1}"
+                    )
+            elif isinstance(operand, (int, float)) and not isinstance(operand, bool):
+                self._validate_list_element(
+                    lists[0].lexeme, element_type, operand, lineno, lexpos
+                )
+            else:
+                raise ValueError(
+                    f"Whole-list '{operator}' takes a list and a list or number, got {operand} at line {lineno}, pos {lexpos + 1}"
+                )
+        return ("list_op", operator, left, right, size, element_type)
+
+    def _list_symbol(self, operand):
+        """Symbol table entry of an operand naming a list, else None."""
+        if not isinstance(operand, str):
+            return None
+        symbol = self.symbol_table.lookup(operand)
+        return symbol if symbol is not None and symbol.token_type == "LIST" else None
+
+    def _validate_list_element(self, list_name, element_type, value, lineno, lexpos):
+        """Element values are literals that fit the list's element type."""
+        if element_type == "real":
+            if not isinstance(value, (int, float)):
+                raise ValueError(
+                    f"List elements must be numbers, got {value} at line {lineno}, pos {lexpos + 1}"
+                )
+            return
+        if not isinstance(value, int):
+            raise ValueError(
+                f"List elements must be integers, got {value} at line {lineno}, pos {lexpos + 1}"
+            )
+        bits = 8 if element_type == "int8" else 32
+        if not -(2 ** (bits - 1)) <= value < 2 ** (bits - 1):
+            raise ValueError(
+                f"Element {value} out of range for {element_type} list '{list_name}' at line {lineno}, pos {lexpos + 1}"
+            )
+
     def _format_ast(self, ast):
         if isinstance(ast, (int, float)):
             return str(ast)
@@ -187,7 +483,26 @@ class SyntaxAnalyzer:
             return ast
         elif isinstance(ast, tuple):
             if ast[0] == "list_decl":
-                return f"(list[(2)])"
+                if ast[2] != DEFAULT_ELEMENT_TYPE:
+                    return f"(list[({ast[1]})] of {ast[2]})"
+                return f"(list[({ast[1]})])"
+            elif ast[0] == "list_op":
+                return self._format_ast(ast[1:4])
+            elif ast[0] == "list_slice":
+                return f"({ast[1]}[({ast[2]}):({ast[3]})])"
+            elif ast[0] == "repeat":
+                return f"repeat ({self._format_ast(ast[1])}) {{"
+            elif ast[0] == "for":
+                start, end = (self._format_ast(bound) for bound in ast[2:])
+                return f"for {ast[1]} in ({start})..({end}) {{"
+            elif ast[0] == "end":
+                return "}"
+            elif ast[0] == "def":
+                _, name, parameters, body = ast
+                return f"(def {name}({','.join(parameters)})={self._format_ast(body)})"
+            elif len(ast) == 4 and ast[1] == "(":  # Function call
+                arguments = ",".join(self._format_ast(argument) for argument in ast[2])
+                return f"({ast[0]}({arguments}))"
             elif len(ast) == 4 and ast[1] == "[":  # List access operation
                 return f"({ast[0]}[({ast[2]})])"  # Added outer parentheses
             elif ast[0] == "list_assign":
@@ -202,23 +517,58 @@ class SyntaxAnalyzer:
         return str(ast)
 
     def parse(self, input_text):
+        # A body that failed to parse leaves no function behind
+        self.function = None
+        self.last_output = None
         try:
             ast = self.parser.parse(input_text, lexer=self.lexer.lexer)
             if ast:
-                formatted_ast = self._format_ast(ast)
-                self.ast_output.append(formatted_ast)
+                self._output(self._format_ast(ast))
             return ast
         except ValueError as e:
-            self.ast_output.append(str(e))
+            self._output(str(e))
             return None
         except SyntaxError as e:
             val, line_no, pos = e.args[0]
-            self.ast_output.append(f"SyntaxError at line {line_no}, pos {pos + 1}")
+            reserved = self._reserved_word(input_text, pos)
+            if reserved is not None:
+                word, pos = reserved
+                self._output(
+                    f"SyntaxError at line {line_no}, pos {pos + 1}: "
+                    f"'{word}' is a reserved word and cannot name a variable"
+                )
+            else:
+                self._output(f"SyntaxError at line {line_no}, pos {pos + 1}")
             return None
         except Exception as e:
-            self.ast_output.append(str(e))
+            self._output(str(e))
             return None
 
+    def _reserved_word(self, input_text, pos):
+        """
+        (word, position) of the reserved word a syntax error at `pos` is
+        down to, or None: the offending token itself (``x = of + 1``), or
+        the one before an offending ``=`` (``for = 2``), which was taken
+        as the start of a loop or definition.
+        """
+        lexer = self.lexer.lexer.clone()
+        lexer.input(input_text)
+        previous = None
+        for tok in iter(lexer.token, None):
+            if tok.lexpos == pos:
+                if tok.type in RESERVED_TOKENS:
+                    return tok.value, tok.lexpos
+                if tok.type == "ASSIGNMENT" and previous is not None and previous.type in RESERVED_TOKENS:
+                    return previous.value, previous.lexpos
+                return None
+            previous = tok
+        return None
+
+    def _output(self, text):
+        self.last_output = text
+        if self.keep_output:
+            self.ast_output.append(text)
+
     def save_parsed_output(self, filename):
         with open(filename, "w") as f:
             for output in self.ast_output:
@@ -228,4 +578,8 @@ class SyntaxAnalyzer:
         return self.ast_output
     
     def get_parsed_output_as_str(self):
-        return "\n".join(self.ast_output)
\ No newline at end of file
+        return "\n".join(self.ast_output)
+
+
+def _is_slice(expr):
+    return isinstance(expr, tuple) and expr[0] == "list_slice"
@@ -0,0 +1,530 @@
+import sys
+import time
+
+from src.assembler.disassembler import Disassembler
+from src.assembler.object_format import (
+    FORM_ABSOLUTE,
+    FORM_ABSOLUTE_SCALED,
+    FORM_DISPLACEMENT,
+    FORM_IMMEDIATE,
+    FORM_INDIRECT,
+    FORM_PRINT,
+    FORM_SCALED,
+    FORM_VECTOR_SCALAR_LEFT,
+    FORM_VECTOR_SCALAR_RIGHT,
+)
+from src.code_generator.data_layout import WORD_SIZE
+from src.code_generator.instruction import (
+    BLOCK_OPCODES,
+    VECTOR_OPCODES,
+    is_immediate,
+    is_memory,
+    is_register,
+    memory_opcode,
+    parse_address,
+    parse_assembly,
+)
+from src.code_generator.semantics import (
+    OPERATIONS,
+    format_value,
+    parse_immediate,
+    to_int8,
+)
+
+
+# Decoded opcodes, roughly by how often they run
+(
+    LOAD_IMMEDIATE,
+    LOAD_VARIABLE,
+    STORE_VARIABLE,
+    OPERATE,
+    LOAD_ELEMENT,
+    STORE_ELEMENT,
+    PRINT,
+    MOVE,
+    FILL,
+    LOAD_BYTE,
+    STORE_BYTE,
+    VECTOR,
+    COPY,
+    BRANCH,
+    BRANCH_ZERO,
+    CALL,
+    RETURN,
+) = range(17)
+
+# Printed values are written out in batches of this many lines
+OUTPUT_BATCH = 4096
+
+
+def _convert(value, _):
+    """FL.i in the two-operand shape of OPERATE."""
+    return OPERATIONS["FL.i"](value)
+
+
+class VirtualMachine:
+    """
+    Executes laika assembly as emitted by the code generator.
+
+    ``load`` pre-decodes every instruction into a tuple (opcode, a, b, c, d)
+    of small integers and ready-made values: register numbers, word
+    addresses, immediate constants and the semantics.OPERATIONS function of
+    arithmetic instructions. ``run`` then only indexes Python lists.
+    ``load_object`` builds the same tuples straight from the records of a
+    binary object file (which may be memory-mapped), without parsing text.
+
+    Memory is the program's static data segment (see DataLayout): a
+    ``bytearray`` of 4-byte words, viewed as int32 and float32 through
+    ``memoryview`` casts, with a tag byte per word recording which of the
+    two it holds. int8 list elements (LD.b, ST.b, FILL.b) go through a
+    signed byte view; a word written that way reads back as an integer.
+    Vector operations apply their scalar operation to each lane in turn;
+    COPY moves its bytes (and the tags of the words) with one slice
+    assignment. Labels are resolved when the program is loaded: branches
+    hold the index of the instruction after their LABEL. CALL pushes the
+    index of the instruction after it on a return stack that RET pops.
+    Absolute addresses become word indices when the program is loaded;
+    addresses computed at run time are checked against the segment.
+    """
+
+    def __init__(self, output=None):
+        """
+        :param output: Stream printed values are written to (default: stdout)
+        """
+        self.output = output if output is not None else sys.stdout
+        self.code = []
+        self.describe = None
+        self.executed = 0
+        self.seconds = 0.0
+
+    def load(self, assembly_code, layout=None):
+        """
+        Decode assembly lines and lay out memory.
+
+        Variables the code still names (``@x``) are looked up in the layout
+        or given a word after the data segment.
+
+        :param assembly_code: Lines of laika assembly (e.g. CodeGenerator.assembly_code)
+        :param layout: DataLayout the code was emitted for (IRProgram.layout)
+        """
+        instructions = []
+        self.labels = {}
+        for instruction in parse_assembly(assembly_code):
+            if instruction.opcode == "LABEL":
+                self.labels[instruction.operands[0]] = len(instructions)
+            elif instruction.is_code:
+                instructions.append(instruction)
+        self.layout = layout
+        self.variables = dict(layout.scalars) if layout is not None else {}
+        self.size = layout.size if layout is not None else 0
+
+        self.num_registers = 0
+        self.code = [self._decode(instruction) for instruction in instructions]
+        self._allocate(self.size)
+        self.describe = lambda index: str(instructions[index])
+        return self
+
+    def load_object(self, object_file):
+        """
+        Decode a binary object file (see src.assembler.object_format).
+
+        :param object_file: ObjectFile over bytes or a memory map
+        """
+        self.size = object_file.data_size
+        self.num_registers = 0
+        self.code = []
+        # Branches name their LABEL by its record index
+        self.labels = {}
+        position = 0
+        for index, (opcode, *_) in enumerate(object_file.instructions()):
+            if opcode == "LABEL":
+                self.labels[index] = position
+            elif opcode not in ("ERROR", "COMMENT"):
+                position += 1
+        indices = []
+        for index, (opcode, form, _, a, b, c, d) in enumerate(object_file.instructions()):
+            if opcode in ("ERROR", "COMMENT", "LABEL"):
+                continue
+            self.num_registers = max(self.num_registers, a + 1, b + 1, c + 1)
+            self.code.append(self._decode_record(opcode, form, a, b, c, d, object_file))
+            indices.append(index)
+        self._allocate(self.size)
+        disassembler = Disassembler(object_file)
+        self.describe = lambda index: disassembler.format_instruction(indices[index])
+        return self
+
+    def _allocate(self, size):
+        """Zeroed memory for a data segment of `size` bytes."""
+        words = (size + WORD_SIZE - 1) // WORD_SIZE
+        self.words = words
+        self.memory = bytearray(words * WORD_SIZE)
+        self.tags = bytearray(words)
+        self.integers = memoryview(self.memory).cast("i")
+        self.reals = memoryview(self.memory).cast("f")
+        self.bytes = memoryview(self.memory).cast("b")
+
+    def _word(self, address):
+        """Word index of an absolute address, checked against the data segment."""
+        word, misaligned = divmod(address, WORD_SIZE)
+        if misaligned or not 0 <= address < self.size:
+            raise ValueError(f"Address {address} is outside the data segment")
+        return word
+
+    def _variable(self, name):
+        if name not in self.variables:
+            self.variables[name] = (self.size + WORD_SIZE - 1) // WORD_SIZE * WORD_SIZE
+            self.size = self.variables[name] + WORD_SIZE
+        return self._word(self.variables[name])
+
+    def _register(self, operand):
+        if not is_register(operand):
+            raise ValueError(f"Expected a register, got '{operand}'")
+        number = int(operand[1:])
+        self.num_registers = max(self.num_registers, number + 1)
+        return number
+
+    def _address(self, operand, width=WORD_SIZE):
+        """
+        A word index for absolute addresses of words, else (base, index,
+        scale, displacement) with register numbers and -1 for an absent
+        register or base.
+        """
+        if is_memory(parse_address(operand)[0]):
+            if self.layout is None:
+                raise ValueError(f"No data layout to resolve '{operand}'")
+            operand = self.layout.resolve(operand)
+        base, index, scale, displacement = parse_address(operand)
+        if base.isdigit():
+            if index is None and width == WORD_SIZE:
+                return self._word(int(base) + displacement)
+            if index is None:
+                return (-1, -1, 1, int(base) + displacement)
+            return (-1, self._register(index), scale, int(base))
+        return (
+            self._register(base),
+            -1 if index is None else self._register(index),
+            scale,
+            displacement,
+        )
+
+    def _lanes(self, address, lanes):
+        """Word index of the first of `lanes` words at `address`, all in the segment."""
+        self._word(address + (lanes - 1) * WORD_SIZE)
+        return self._word(address)
+
+    def _vector(self, opcode, target, sources, lanes):
+        """
+        The decoded vector operation.
+
+        :param target: Address of the destination
+        :param sources: (register, -1) or (-1, address) of the left and right operand
+        """
+        (left_register, left), (right_register, right) = (
+            (register, self._lanes(address, lanes) if register < 0 else 0)
+            for register, address in sources
+        )
+        return (
+            VECTOR,
+            (self._lanes(target, lanes), lanes, left_register, right_register),
+            left,
+            right,
+            OPERATIONS[VECTOR_OPCODES[opcode]],
+        )
+
+    def _block(self, opcode, target, source, count):
+        """
+        The decoded block move.
+
+        :param target: Address of the first element written
+        :param source: Address of the first element read
+        :param count: Register holding the number of elements
+        """
+        width = 1 if opcode == "COPY.b" else WORD_SIZE
+        for address in (target, source):
+            if width == WORD_SIZE:
+                self._word(address)
+            elif not 0 <= address < self.size:
+                raise ValueError(f"Address {address} is outside the data segment")
+        return (COPY, target, source, count, width)
+
+    def _decode(self, instruction):
+        opcode, operands = instruction.opcode, instruction.operands
+        if opcode == "LD.b":
+            address = self._address(operands[1], width=1)
+            return (LOAD_BYTE, self._register(operands[0]), address, 0, None)
+        if opcode == "ST.b":
+            address = self._address(operands[0], width=1)
+            return (STORE_BYTE, address, self._register(operands[1]), 0, None)
+        if opcode == "LD":
+            dest, source = self._register(operands[0]), operands[1]
+            if is_immediate(source):
+                return (LOAD_IMMEDIATE, dest, parse_immediate(source), 0, None)
+            if is_memory(source):
+                return (LOAD_VARIABLE, dest, self._variable(source[1:]), 0, None)
+            address = self._address(source)
+            if isinstance(address, int):
+                return (LOAD_VARIABLE, dest, address, 0, None)
+            return (LOAD_ELEMENT, dest, address, 0, None)
+        if opcode == "ST":
+            target, value = operands[0], self._register(operands[1])
+            if target == "@print":
+                return (PRINT, value, 0, 0, None)
+            if is_memory(target):
+                return (STORE_VARIABLE, self._variable(target[1:]), value, 0, None)
+            address = self._address(target)
+            if isinstance(address, int):
+                return (STORE_VARIABLE, address, value, 0, None)
+            return (STORE_ELEMENT, address, value, 0, None)
+        if opcode == "MOV":
+            return (MOVE, self._register(operands[0]), self._register(operands[1]), 0, None)
+        if opcode == "BR":
+            return (BRANCH, self._label(operands[0]), 0, 0, None)
+        if opcode == "BZ":
+            return (BRANCH_ZERO, self._label(operands[1]), self._register(operands[0]), 0, None)
+        if opcode == "CALL":
+            return (CALL, self._label(operands[0]), 0, 0, None)
+        if opcode == "RET":
+            return (RETURN, 0, 0, 0, None)
+        if opcode in ("FILL", "FILL.b"):
+            width = 1 if opcode == "FILL.b" else WORD_SIZE
+            address = self._address(operands[0], width)
+            if isinstance(address, int):
+                address = (-1, -1, 1, address * WORD_SIZE)
+            value, count = (self._register(operand) for operand in operands[1:])
+            return (FILL, address, value, count, width)
+        if opcode in VECTOR_OPCODES:
+            target, *sources = (
+                (self._register(operand), -1)
+                if is_register(operand)
+                else (-1, self._absolute(operand))
+                for operand in operands[:3]
+            )
+            return self._vector(opcode, target[1], sources, parse_immediate(operands[3]))
+        if opcode in BLOCK_OPCODES:
+            width = 1 if opcode == "COPY.b" else WORD_SIZE
+            target, source = (self._absolute(operand, width) for operand in operands[:2])
+            return self._block(opcode, target, source, self._register(operands[2]))
+        if opcode == "FL.i":
+            dest, source = (self._register(operand) for operand in operands)
+            return (OPERATE, dest, source, source, _convert)
+        if opcode in OPERATIONS:
+            dest, left, right = (self._register(operand) for operand in operands)
+            return (OPERATE, dest, left, right, OPERATIONS[opcode])
+        raise ValueError(f"Unknown instruction '{instruction}'")
+
+    def _label(self, label):
+        """Index of the instruction a branch to the label continues at."""
+        if label not in self.labels:
+            raise ValueError(f"Unknown label '{label}'")
+        return self.labels[label]
+
+    def _absolute(self, operand, width=WORD_SIZE):
+        address = self._address(operand, width)
+        if isinstance(address, int):
+            return address * WORD_SIZE
+        base, index, _, displacement = address
+        if base >= 0 or index >= 0:
+            raise ValueError(f"Expected an absolute address, got '{operand}'")
+        return displacement
+
+    def _decode_record(self, opcode, form, a, b, c, d, object_file):
+        if opcode in VECTOR_OPCODES:
+            sources = [
+                (register, -1) if form == scalar_form else (-1, object_file.constant(d + offset))
+                for offset, register, scalar_form in (
+                    (1, b, FORM_VECTOR_SCALAR_LEFT),
+                    (2, c, FORM_VECTOR_SCALAR_RIGHT),
+                )
+            ]
+            return self._vector(opcode, object_file.constant(d), sources, a)
+        if opcode in BLOCK_OPCODES:
+            return self._block(
+                opcode, object_file.constant(d), object_file.constant(d + 1), a
+            )
+        if memory_opcode(opcode) in ("LD", "ST", "FILL"):
+            width = WORD_SIZE if memory_opcode(opcode) == opcode else 1
+            if form == FORM_PRINT:
+                return (PRINT, a, 0, 0, None)
+            if form == FORM_IMMEDIATE:
+                return (LOAD_IMMEDIATE, a, object_file.constant(d), 0, None)
+            if form == FORM_ABSOLUTE and opcode in ("LD", "ST"):
+                if opcode == "LD":
+                    return (LOAD_VARIABLE, a, self._word(d), 0, None)
+                return (STORE_VARIABLE, self._word(d), a, 0, None)
+            if form == FORM_ABSOLUTE:
+                address = (-1, -1, 1, d)
+            elif form == FORM_INDIRECT:
+                address = (b, -1, 1, 0)
+            elif form == FORM_DISPLACEMENT:
+                address = (b, -1, 1, d)
+            elif form == FORM_SCALED:
+                address = (b, c, d, 0)
+            elif form == FORM_ABSOLUTE_SCALED:
+                address = (-1, b, c, d)
+            else:
+                raise ValueError(f"Unknown operand form {form}")
+            if opcode == "LD":
+                return (LOAD_ELEMENT, a, address, 0, None)
+            if opcode == "ST":
+                return (STORE_ELEMENT, address, a, 0, None)
+            if opcode == "LD.b":
+                return (LOAD_BYTE, a, address, 0, None)
+            if opcode == "ST.b":
+                return (STORE_BYTE, address, a, 0, None)
+            return (FILL, address, a, c, width)
+        if opcode == "MOV":
+            return (MOVE, a, b, 0, None)
+        if opcode == "BR":
+            return (BRANCH, self._label(d), 0, 0, None)
+        if opcode == "BZ":
+            return (BRANCH_ZERO, self._label(d), a, 0, None)
+        if opcode == "CALL":
+            return (CALL, self._label(d), 0, 0, None)
+        if opcode == "RET":
+            return (RETURN, 0, 0, 0, None)
+        if opcode == "FL.i":
+            return (OPERATE, a, b, b, _convert)
+        return (OPERATE, a, b, c, OPERATIONS[opcode])
+
+    def run(self):
+        """
+        Execute the loaded program, writing printed values to the output.
+
+        :return: Number of instructions executed
+        """
+        code = self.code
+        registers = [0] * self.num_registers
+        integers, reals, tags, data = self.integers, self.reals, self.tags, self.bytes
+        memory = self.memory
+        words = self.words
+        printed = []
+        write = self.output.write
+        returns = []
+
+        def element(address):
+            base, index, scale, displacement = address
+            byte = displacement if base < 0 else registers[base] + displacement
+            if index >= 0:
+                byte += registers[index] * scale
+            word, misaligned = divmod(byte, WORD_SIZE)
+            if misaligned or not 0 <= word < words:
+                raise IndexError("element address out of range")
+            return word
+
+        def byte_at(address):
+            base, index, scale, displacement = address
+            byte = displacement if base < 0 else registers[base] + displacement
+            if index >= 0:
+                byte += registers[index] * scale
+            if not 0 <= byte < words * WORD_SIZE:
+                raise IndexError("element address out of range")
+            return byte
+
+        def store_byte(byte, value):
+            data[byte] = to_int8(value)
+            tags[byte // WORD_SIZE] = 0
+
+        def store(word, value):
+            if isinstance(value, float):
+                reals[word] = value
+                tags[word] = 1
+            else:
+                integers[word] = value
+                tags[word] = 0
+
+        def load(word):
+            return reals[word] if tags[word] else integers[word]
+
+        start = time.perf_counter()
+        pc = 0
+        count = len(code)
+        # Instructions executed beyond pc, for the iterations branched back over
+        repeated = 0
+        try:
+            while pc < count:
+                opcode, a, b, c, function = code[pc]
+                if opcode == LOAD_IMMEDIATE:
+                    registers[a] = b
+                elif opcode == LOAD_VARIABLE:
+                    registers[a] = reals[b] if tags[b] else integers[b]
+                elif opcode == STORE_VARIABLE:
+                    store(a, registers[b])
+                elif opcode == OPERATE:
+                    registers[a] = function(registers[b], registers[c])
+                elif opcode == LOAD_ELEMENT:
+                    registers[a] = load(element(b))
+                elif opcode == STORE_ELEMENT:
+                    store(element(a), registers[b])
+                elif opcode == PRINT:
+                    printed.append(format_value(registers[a]))
+                    if len(printed) == OUTPUT_BATCH:
+                        write("\n".join(printed) + "\n")
+                        printed.clear()
+                elif opcode == MOVE:
+                    registers[a] = registers[b]
+                elif opcode == BRANCH_ZERO:
+                    if registers[b] == 0:
+                        repeated += pc + 1 - a
+                        pc = a
+                        continue
+                elif opcode == BRANCH:
+                    repeated += pc + 1 - a
+                    pc = a
+                    continue
+                elif opcode == CALL:
+                    returns.append(pc + 1)
+                    repeated += pc + 1 - a
+                    pc = a
+                    continue
+                elif opcode == RETURN:
+                    target = returns.pop()
+                    repeated += pc + 1 - target
+                    pc = target
+                    continue
+                elif opcode == VECTOR:
+                    target, lanes, left_register, right_register = a
+                    for lane in range(lanes):
+                        left = registers[left_register] if left_register >= 0 else load(b + lane)
+                        right = (
+                            registers[right_register] if right_register >= 0 else load(c + lane)
+                        )
+                        store(target + lane, function(left, right))
+                elif opcode == LOAD_BYTE:
+                    registers[a] = data[byte_at(b)]
+                elif opcode == STORE_BYTE:
+                    store_byte(byte_at(a), registers[b])
+                elif opcode == COPY:
+                    size = registers[c] * function
+                    if size < 0 or max(a, b) + size > words * WORD_SIZE:
+                        raise IndexError("element address out of range")
+                    # Slicing the bytearray copies first, so the blocks may overlap
+                    memory[a : a + size] = memory[b : b + size]
+                    first, last = a // WORD_SIZE, (a + size + WORD_SIZE - 1) // WORD_SIZE
+                    if function == WORD_SIZE:
+                        tags[first:last] = tags[b // WORD_SIZE : b // WORD_SIZE + last - first]
+                    else:
+                        tags[first:last] = bytes(last - first)
+                else:
+                    base, _, _, displacement = a
+                    for offset in range(registers[c]):
+                        address = (base, -1, 1, displacement + offset * function)
+                        if function == WORD_SIZE:
+                            store(element(address), registers[b])
+                        else:
+                            store_byte(byte_at(address), registers[b])
+                pc += 1
+        except (ZeroDivisionError, OverflowError, ValueError, IndexError) as e:
+            raise RuntimeError(f"{str(e)} at instruction {pc + 1}: {self.describe(pc)}")
+        finally:
+            if printed:
+                write("\n".join(printed) + "\n")
+            self.executed = pc + repeated
+            self.seconds = time.perf_counter() - start
+        return self.executed
+
+    def report(self):
+        rate = self.executed / self.seconds if self.seconds else 0
+        return [
+            f"executed {self.executed} instructions in {self.seconds * 1000:.2f} ms "
+            f"({rate:,.0f} instructions/s)"
+        ]
@@ -0,0 +1,37 @@
+import io
+import os
+
+from src import compiler
+from src.code_generator.target import Target
+from src.compiler import parse_source  # noqa: F401 (used by the tests)
+from src.vm.vm import VirtualMachine
+
+
+TARGETS_DIR = os.path.join(
+    os.path.dirname(__file__), os.pardir, "src", "code_generator", "targets"
+)
+
+
+def load_target(name):
+    """Target description by name: 'laika', 'laika-lite', ..."""
+    return Target.load(os.path.join(TARGETS_DIR, f"{name}.json"))
+
+
+def compile_source(source, optimization_level=0, target=None, num_registers="target"):
+    """
+    src.compiler.compile_source with the target given by name.
+
+    :param target: Target name (None for the default target)
+    """
+    target = load_target(target) if target is not None else None
+    return compiler.compile_source(source, optimization_level, target, num_registers)
+
+
+def run(code_generator):
+    """Execute a compiled program in the VM and return the lines it prints."""
+    output = io.StringIO()
+    vm = VirtualMachine(output).load(
+        list(code_generator.assembly_lines()), code_generator.program.layout
+    )
+    vm.run()
+    return output.getvalue().splitlines()
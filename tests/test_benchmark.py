@@ -0,0 +1,21 @@
+import shutil
+
+import pytest
+
+from src.benchmark import generate_program, main, time_vm
+from src.compiler import compile_source
+
+
+def test_generated_program_compiles_and_runs():
+    code_generator = compile_source(generate_program(3), 2)
+    assert not code_generator.error_encountered
+    _, executed, output = time_vm(code_generator, 1)
+    assert executed > 0
+    assert output == ["2538", "3.0", "6"]
+
+
+@pytest.mark.skipif(shutil.which("cc") is None, reason="no C compiler")
+def test_vm_and_native_print_the_same(capsys):
+    assert main(["--iterations", "3", "--repeat", "1", "--cc", "cc"]) == 0
+    report = capsys.readouterr().out
+    assert "vm" in report and "native" in report and "speedup" in report
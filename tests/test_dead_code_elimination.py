@@ -0,0 +1,71 @@
+import io
+
+import pytest
+
+from src.code_generator.instruction import Instruction
+from src.code_generator.ir import IRProgram
+from src.optimizer.dead_code_elimination import DeadCodeElimination
+from src.vm.vm import VirtualMachine
+from tests.support import compile_source
+
+
+def outcome(source, optimization_level):
+    """(printed lines, run-time error or None) of a program in the VM."""
+    code_generator = compile_source(source, optimization_level)
+    output = io.StringIO()
+    vm = VirtualMachine(output).load(
+        list(code_generator.assembly_lines()), code_generator.program.layout
+    )
+    try:
+        vm.run()
+    except RuntimeError as e:
+        return output.getvalue().splitlines(), str(e).split(" at instruction")[0]
+    return output.getvalue().splitlines(), None
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "a = 0 - 2.0\nb = a ^ 0.5\n1",
+        "a = 1e20\nb = a * a\n1",
+        "a = 7\nb = a // 0\n1",
+    ],
+)
+@pytest.mark.parametrize("optimization_level", [2, 3])
+def test_unused_results_that_fail_still_fail(source, optimization_level):
+    expected = outcome(source, 0)
+    assert expected[1] is not None
+    assert outcome(source, optimization_level)[1] == expected[1]
+
+
+def eliminate(*lines):
+    program = IRProgram([Instruction.parse(line) for line in lines])
+    DeadCodeElimination().run(program)
+    return [str(instruction) for instruction in program]
+
+
+def test_removes_unused_arithmetic_that_cannot_fail():
+    assert eliminate(
+        "LD v0 @a",
+        "LD v1 #2.5",
+        "LD v2 #3.0",
+        "MUL.f v3 v1 v2",
+        "LD v4 #4",
+        "DIV.i v5 v0 v4",
+        "ADD.i v6 v0 v0",
+        "LD v7 #1",
+        "ST @print v7",
+    ) == ["LD v7 #1", "ST @print v7"]
+
+
+def test_keeps_unused_real_arithmetic_on_unknown_values():
+    kept = eliminate(
+        "LD v0 @a",
+        "LD v1 #2.0",
+        "MUL.f v2 v0 v1",
+        "LD v3 #2",
+        "EXP.f v4 v1 v3",
+        "LD v5 #1",
+        "ST @print v5",
+    )
+    assert kept == ["LD v0 @a", "LD v1 #2.0", "MUL.f v2 v0 v1", "LD v5 #1", "ST @print v5"]
@@ -0,0 +1,81 @@
+import io
+
+import pytest
+
+from src.compiler import parse_source
+from src.optimizer.inlining import Inlining
+from src.vm.vm import VirtualMachine
+from tests.support import compile_source, run
+
+
+def calls(code_generator):
+    return sum(line.startswith("CALL") for line in code_generator.assembly_lines())
+
+
+def inline(source, num_registers=None):
+    inlining = Inlining()
+    inlining.num_registers = num_registers
+    asts = inlining.run(parse_source(source)[0])
+    return asts, inlining.stats
+
+
+def test_small_body_is_inlined():
+    source = "def f(a, b) = a * b + 1\nx = 4\nf(x, 3)\nf(2, x) * 2"
+    unoptimized = compile_source(source, 0)
+    optimized = compile_source(source, 1)
+    assert calls(unoptimized) == 2
+    assert calls(optimized) == 0
+    assert run(optimized) == run(unoptimized) == ["13", "18"]
+
+
+def test_call_with_an_unread_argument_that_raises_is_kept():
+    source = "def g(a, b) = b * 2\ng(1 // 0, 3)"
+    outcomes = []
+    for optimization_level in (0, 1):
+        code_generator = compile_source(source, optimization_level)
+        assert calls(code_generator) == 1
+        vm = VirtualMachine(io.StringIO()).load(
+            list(code_generator.assembly_lines()), code_generator.program.layout
+        )
+        with pytest.raises(RuntimeError) as error:
+            vm.run()
+        outcomes.append(str(error.value).split(" at instruction")[0])
+    assert outcomes[0] == outcomes[1]
+
+
+def test_unread_argument_that_cannot_raise_is_dropped():
+    asts, stats = inline("def g(a, b) = b * 2\ng(7, 3)")
+    assert asts[1] == ("*", 3, 2)
+    assert stats == {"inlined": 1, "kept": 0}
+
+
+# Saves 2 instructions per run and adds 13
+BIG = "def h(a, b) = a * b + a * b - a * b + a\nx = 1\ny = 2"
+
+
+def test_call_run_once_is_kept_when_it_adds_more_than_it_saves():
+    _, stats = inline(f"{BIG}\nh(x + y, y)")
+    assert stats == {"inlined": 0, "kept": 1}
+
+
+@pytest.mark.parametrize("header", ["repeat 10 {", "for i in 0..10 {", "repeat x {"])
+def test_call_in_a_loop_is_weighted_by_its_count(header):
+    source = f"{BIG}\n{header}\ny = h(x + y, y)\n}}\ny"
+    _, stats = inline(source)
+    assert stats == {"inlined": 1, "kept": 0}
+    assert run(compile_source(source, 1)) == run(compile_source(source, 0))
+
+
+def test_call_in_a_short_loop_is_kept():
+    _, stats = inline(f"{BIG}\nrepeat 2 {{\ny = h(x + y, y)\n}}")
+    assert stats == {"inlined": 0, "kept": 1}
+
+
+def test_inlining_that_would_spill_more_than_it_saves_is_undone():
+    source = "def f(a) = a + (a + (a + (a + a)))\nx = 1\nx + (x + (x + f(x)))"
+    assert inline(source)[1] == {"inlined": 1, "kept": 0}
+    asts, stats = inline(source, num_registers=4)
+    assert stats == {"inlined": 0, "kept": 1}
+    assert asts[2] == parse_source(source)[0][2]
+    # One register over: a store and a load, fewer than the 6 instructions saved
+    assert inline(source, num_registers=7)[1] == {"inlined": 1, "kept": 0}
@@ -0,0 +1,71 @@
+from src.code_generator.instruction import Instruction
+from src.code_generator.ir import IRProgram
+from src.optimizer.instruction_scheduling import InstructionScheduling
+from tests.support import compile_source, run
+
+
+def schedule(*lines):
+    program = IRProgram([Instruction.parse(line) for line in lines])
+    for instruction in program:
+        instruction.line = 1
+    scheduling = InstructionScheduling()
+    scheduling.run(program)
+    return [str(instruction) for instruction in program], scheduling
+
+
+def test_independent_loads_are_issued_together():
+    order, scheduling = schedule(
+        "LD v0 @a",
+        "ADD.i v1 v0 v0",
+        "LD v2 @b",
+        "ADD.i v3 v2 v2",
+        "ADD.i v4 v1 v3",
+        "ST @print v4",
+    )
+    assert order == [
+        "LD v0 @a",
+        "LD v2 @b",
+        "ADD.i v1 v0 v0",
+        "ADD.i v3 v2 v2",
+        "ADD.i v4 v1 v3",
+        "ST @print v4",
+    ]
+    assert scheduling.stats == {"statements": 1, "cycles_before": 11, "cycles_after": 8}
+    assert scheduling.lines == ["line 1: 11 -> 8 cycles"]
+
+
+def slow_store_then_load(loaded_list):
+    return schedule(
+        "LD v0 @i",
+        "LD v1 @a",
+        "MUL.i v5 v1 v1",
+        "ST [@x+v0*4] v5",
+        f"LD v2 [@{loaded_list}+8]",
+        "ADD.i v3 v2 v2",
+        "ST @print v3",
+    )[0]
+
+
+def test_load_of_an_aliased_element_stays_after_the_store():
+    order = slow_store_then_load("x")
+    assert order.index("LD v2 [@x+8]") > order.index("ST [@x+v0*4] v5")
+
+
+def test_load_of_another_list_moves_ahead_of_the_store():
+    order = slow_store_then_load("y")
+    assert order.index("LD v2 [@y+8]") < order.index("ST [@x+v0*4] v5")
+
+
+def test_scheduled_loop_prints_the_same():
+    source = (
+        "x = list[8]\na = 3\nb = 2.5\nfor i in 0..8 {\nx[i] = 4\n"
+        "c = a * a + b * b - x[2] // 3\n}\nc"
+    )
+    optimized = compile_source(source, 2)
+    scheduling = next(
+        optimization_pass
+        for optimization_pass in optimized.pass_manager.passes
+        if optimization_pass.name == "instruction_scheduling"
+    )
+    assert scheduling.stats["cycles_after"] < scheduling.stats["cycles_before"]
+    assert run(optimized) == run(compile_source(source, 0))
@@ -0,0 +1,27 @@
+from src.lexical_analyzer.lexical_analyzer import LexicalAnalyzer
+from src.symbol_table.symbol_table import SymbolTable
+from src.syntax_analyzer.syntax_analyzer import SyntaxAnalyzer
+
+
+def parse(source):
+    symbol_table = SymbolTable()
+    lexer = LexicalAnalyzer(symbol_table)
+    parser = SyntaxAnalyzer(symbol_table, lexer, keep_output=False)
+    outputs = []
+    for line_number, line in enumerate(source.splitlines(), 1):
+        lexer.tokenize(line, line_number)
+        parser.parse(line)
+        outputs.append(parser.last_output)
+    return symbol_table, outputs
+
+
+def test_element_assignment_is_tracked():
+    symbol_table, _ = parse("x = list[3]\nx[1] = 7")
+    assert symbol_table.lookup("x").value == [0, 7, 0]
+
+
+def test_rejected_element_assignment_leaves_the_element():
+    symbol_table, outputs = parse("x = list[3] of int8\nx[1] = 5\nx[1] = 300\nx[2] = 1.5")
+    assert outputs[2].startswith("Element 300 out of range")
+    assert outputs[3].startswith("List elements must be integers")
+    assert symbol_table.lookup("x").value == [0, 5, 0]
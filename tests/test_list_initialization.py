@@ -0,0 +1,31 @@
+import time
+
+from tests.support import compile_source, run
+
+
+def test_declaration_size_does_not_depend_on_list_size():
+    small = compile_source("x = list[2]")
+    large = compile_source("x = list[1000000]")
+    assert small.program.count() == large.program.count()
+    assert len(list(small.assembly_lines())) == len(list(large.assembly_lines()))
+
+
+def test_declaration_compile_time_does_not_depend_on_list_size():
+    start = time.perf_counter()
+    compile_source("x = list[2]")
+    small = time.perf_counter() - start
+    start = time.perf_counter()
+    compile_source("x = list[1000000]")
+    large = time.perf_counter() - start
+    # An unrolled store loop takes seconds for a million elements
+    assert large < small * 10 + 0.5
+
+
+def test_declared_elements_read_as_zero():
+    assert run(compile_source("x = list[1000]\nx[999]\nx[0]")) == ["0", "0"]
+
+
+def test_int8_declaration_is_one_fill():
+    code_generator = compile_source("x = list[1000] of int8")
+    opcodes = [instruction.opcode for instruction in code_generator.program]
+    assert opcodes.count("FILL.b") == 1
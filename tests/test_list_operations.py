@@ -0,0 +1,30 @@
+import pytest
+
+from tests.support import compile_source, run
+
+
+INT8_PROGRAM = """
+b = list[9] of int8
+b[0] = 127
+b[8] = 100
+c = b + b
+d = b * 3
+e = c - 127
+c[0]
+d[8]
+e[0]
+e[1]
+"""
+
+
+@pytest.mark.parametrize("target", ["laika", "laika-lite"])
+@pytest.mark.parametrize("optimization_level", [0, 2])
+def test_int8_results_wrap_on_every_target(target, optimization_level):
+    code_generator = compile_source(INT8_PROGRAM, optimization_level, target)
+    assert run(code_generator) == ["-2", "44", "127", "-127"]
+
+
+def test_word_lists_use_vector_instructions():
+    code_generator = compile_source("x = list[8]\ny = list[8]\nz = x + y")
+    opcodes = [instruction.opcode for instruction in code_generator.program]
+    assert opcodes.count("VADD.i") == 2
@@ -0,0 +1,63 @@
+import io
+
+import pytest
+
+from src.assembler.assembler import Assembler
+from src.assembler.disassembler import Disassembler
+from src.assembler.object_format import INSTRUCTION, ObjectFile
+from src.vm.vm import VirtualMachine
+from tests.support import compile_source, run
+
+
+PROGRAM = """
+x = list[8]
+y = list[8] of int8
+z = list[8] of real
+x[2] = 7
+y[1] = 100
+w = x * 3
+v = x + w
+u = x[2:6]
+s = y[0:4]
+t = z * 2.5
+def area(a, b) = a * b
+for i in 0..8 {
+x[i] = 5
+}
+repeat 3 {
+k = area(x[2], 2.5)
+}
+k + u[0] + s[1] + v[2]
+q
+"""
+
+
+def assemble(code_generator):
+    lines = list(code_generator.assembly_lines())
+    data = Assembler().assemble(lines, code_generator.program.layout)
+    return lines, data
+
+
+@pytest.mark.parametrize("target", ["laika", "laika-lite"])
+@pytest.mark.parametrize("optimization_level", [0, 2])
+def test_disassembly_round_trip(target, optimization_level):
+    lines, data = assemble(compile_source(PROGRAM, optimization_level, target))
+    assert Disassembler(ObjectFile(data)).disassemble() == lines
+
+
+def test_object_runs_like_the_assembly():
+    code_generator = compile_source(PROGRAM, 2)
+    _, data = assemble(code_generator)
+    output = io.StringIO()
+    VirtualMachine(output).load_object(ObjectFile(data)).run()
+    assert output.getvalue().splitlines() == run(code_generator)
+
+
+def test_object_is_smaller_than_the_assembly():
+    source = "\n".join(
+        ["x = list[4]", "a = 1", "b = 2"]
+        + [f"b = a * {k % 7} + b\nx[{k % 4}] = {k % 9}\na + x[{k % 4}]" for k in range(500)]
+    )
+    lines, data = assemble(compile_source(source))
+    assert INSTRUCTION.size == 8
+    assert len(data) < 0.75 * sum(len(line) + 1 for line in lines)
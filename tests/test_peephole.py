@@ -0,0 +1,36 @@
+from tests.support import compile_source, run
+
+
+def long_program(lines):
+    source = ["x = list[4]", "x[1] = 2", "a = x[1]", "b = a + 1"]
+    for line in range(lines):
+        k = line % 9 + 1
+        source.append(
+            [f"a = a + {k}", f"b = b * {k} + a", f"x[{k % 4}] = {k}", f"a * {k} + x[{k % 4}]"][
+                line % 4
+            ]
+        )
+    return "\n".join(source)
+
+
+def peephole_result(code_generator):
+    return next(
+        result
+        for result in code_generator.pass_manager.results
+        if result.optimization_pass.name == "peephole"
+    )
+
+
+def test_peephole_keeps_to_the_register_budget():
+    code_generator = compile_source(long_program(300), 1, "laika-lite")
+    result = peephole_result(code_generator)
+    assert not result.reverted
+    assert result.size_after < result.size_before * 0.7
+    assert code_generator.spilled == 0
+    assert run(code_generator) == run(compile_source(long_program(300), 0, "laika-lite"))
+
+
+def test_peephole_reuses_loaded_values():
+    code_generator = compile_source("a = 2\nb = a + a\nb * a", 1)
+    opcodes = [instruction.opcode for instruction in code_generator.program]
+    assert opcodes.count("LD") == 1
@@ -0,0 +1,42 @@
+import re
+
+import pytest
+
+from tests.support import compile_source, run
+
+
+def nested_sum(depth):
+    expression = "a"
+    for _ in range(depth):
+        expression = f"a+({expression})"
+    return f"a = 3\nb = {expression}\nb\nb * (a + (b - (a * (b + (a - b)))))"
+
+
+def registers_used(code_generator):
+    return {
+        register
+        for line in code_generator.assembly_lines()
+        for register in re.findall(r"\bR\d+\b", line)
+    }
+
+
+@pytest.mark.parametrize("num_registers", ["target", 4, 2])
+@pytest.mark.parametrize("optimization_level", [0, 1, 3])
+def test_deep_expression_spills_within_budget(optimization_level, num_registers):
+    code_generator = compile_source(
+        nested_sum(12), optimization_level, "laika-lite", num_registers
+    )
+    budget = 8 if num_registers == "target" else num_registers
+    assert len(registers_used(code_generator)) <= budget
+    assert run(code_generator) == ["39", "1287"]
+
+
+def test_spills_only_when_needed():
+    assert compile_source(nested_sum(12), 0, "laika-lite").spilled > 0
+    assert compile_source(nested_sum(3), 0, "laika-lite").spilled == 0
+    assert compile_source(nested_sum(12), 0, "laika").spilled == 0
+
+
+def test_spill_slots_are_in_the_data_layout():
+    code_generator = compile_source(nested_sum(12), 0, "laika-lite", 2)
+    assert "0_spill0" in code_generator.program.layout.scalars
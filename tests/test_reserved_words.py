@@ -0,0 +1,29 @@
+import pytest
+
+from src.lexical_analyzer.lexical_analyzer import RESERVED_WORDS
+from tests.support import compile_source, parse_source
+
+
+@pytest.mark.parametrize("word", RESERVED_WORDS)
+def test_assigning_a_reserved_word_names_it(word):
+    asts, _, brackets = parse_source(f"{word} = 2")
+    assert asts == [None]
+    assert brackets == [
+        f"SyntaxError at line 1, pos 1: '{word}' is a reserved word and cannot name a variable"
+    ]
+
+
+def test_reading_a_reserved_word_names_it():
+    asts, _, brackets = parse_source("x = 1\ny = x + of")
+    assert asts[1] is None
+    assert brackets[1].endswith("pos 9: 'of' is a reserved word and cannot name a variable")
+
+
+def test_other_syntax_errors_are_unchanged():
+    _, _, brackets = parse_source("x = 3 4")
+    assert brackets == ["SyntaxError at line 1, pos 7"]
+
+
+def test_names_containing_reserved_words_compile():
+    code_generator = compile_source("offset = 2\nindex = offset * 3\ndefine = index + 1\ndefine")
+    assert not code_generator.error_encountered
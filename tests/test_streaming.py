@@ -0,0 +1,55 @@
+import io
+
+import pytest
+
+from src.code_generator.code_generator_new import CodeGenerator
+from src.code_generator.cost_model import Schedule, schedule_length
+from src.code_generator.emitter import Emitter
+from src.vm.vm import VirtualMachine
+from tests.support import compile_source, load_target, parse_source, run
+from tests.test_object_format import PROGRAM
+from tests.test_register_allocation import nested_sum
+
+
+def stream(source, target, num_registers):
+    asts, symbol_table, _ = parse_source(source)
+    emitter = Emitter(num_registers, target=target)
+    code_generator = CodeGenerator(symbol_table, emitter=emitter, target=target)
+    lines = []
+    schedule = Schedule(target)
+    for instructions in code_generator.stream(asts):
+        schedule.add(instructions)
+        lines.extend(emitter.statement_lines(instructions, code_generator.program.layout))
+    return code_generator, lines, schedule.length
+
+
+@pytest.mark.parametrize("source", [PROGRAM, nested_sum(12)])
+@pytest.mark.parametrize("target_name", ["laika", "laika-lite"])
+def test_stream_matches_the_whole_program(source, target_name):
+    target = load_target(target_name)
+    whole = compile_source(source, 0, target_name)
+    streamed, lines, cycles = stream(source, target, target.registers)
+    assert lines == list(whole.assembly_lines())
+    assert cycles == schedule_length(whole.program.instructions, target)
+    assert streamed.program.layout.lines() == whole.program.layout.lines()
+
+
+@pytest.mark.parametrize("target_name", ["laika", "laika-lite"])
+def test_stream_spills_each_statement(target_name):
+    source = nested_sum(12)
+    whole = compile_source(source, 0, target_name, 2)
+    streamed, lines, _ = stream(source, load_target(target_name), 2)
+    assert streamed.spilled > 0
+    assert {f"R{k}" for k in range(2)} >= {
+        operand for line in lines for operand in line.split()[1:] if operand.startswith("R")
+    }
+    output = io.StringIO()
+    VirtualMachine(output).load(lines, streamed.program.layout).run()
+    assert output.getvalue().splitlines() == run(whole)
+
+
+def test_stream_keeps_no_instructions():
+    source = "a = 1\n" + "\n".join(f"a = a + {k}\na * 2" for k in range(200))
+    code_generator, lines, _ = stream(source, load_target("laika"), None)
+    assert len(lines) > 800
+    assert code_generator.program.instructions == []
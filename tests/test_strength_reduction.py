@@ -0,0 +1,38 @@
+from src.code_generator.instruction import Instruction
+from src.code_generator.ir import IRProgram
+from src.optimizer.strength_reduction import StrengthReduction
+
+
+def program(*lines):
+    return IRProgram([Instruction.parse(line) for line in lines])
+
+
+def test_removes_only_the_constants_it_made_unused():
+    ir = program(
+        # Left dead by an earlier pass
+        "LD v0 #7",
+        "LD v1 @a",
+        "LD v2 #4",
+        "MUL.i v3 v1 v2",
+        "ST @print v3",
+    )
+    StrengthReduction().run(ir)
+    assert [str(instruction) for instruction in ir] == [
+        "LD v0 #7",
+        "LD v1 @a",
+        "LD v4 #2",
+        "SHL v3 v1 v4",
+        "ST @print v3",
+    ]
+
+
+def test_keeps_constants_still_read_elsewhere():
+    ir = program(
+        "LD v1 @a",
+        "LD v2 #4",
+        "MUL.i v3 v1 v2",
+        "ADD.i v4 v3 v2",
+        "ST @print v4",
+    )
+    StrengthReduction().run(ir)
+    assert "LD v2 #4" in [str(instruction) for instruction in ir]